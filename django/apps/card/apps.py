@@ -5,3 +5,11 @@ class CardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.card'
     verbose_name = 'Карточка'
+
+    def ready(self):
+        from utils.media import register_media_owner
+
+        from . import signals  # noqa: F401
+        from .models import CardPhoto
+
+        register_media_owner(CardPhoto, CardPhoto.VARIANT_FIELDS)
@@ -0,0 +1,10 @@
+from django.conf import settings
+
+from utils.cache import ModelCache, ModelListCache
+
+# Полное представление карточки (FullCardSerializer вместе с полями владельца)
+card_cache = ModelCache('card')
+# Список всех тегов карточек
+card_tag_cache = ModelCache('card_tag', backend='local')
+# id и владельцы активных карточек для ленты по фильтрам запроса, представления карточек берутся из card_cache
+card_feed_cache = ModelListCache('card_feed', timeout=settings.CARD_FEED_CACHE_TIMEOUT)
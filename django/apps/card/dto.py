@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class CardPhotoUploadDTO:
+    """Данные для загрузки фото карточки напрямую в хранилище"""
+    key: str
+    url: str
+    fields: dict[str, str]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.23 on 2026-10-19 14:29
+
+import apps.card.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('card', '0005_card_user_skips'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cardphoto',
+            name='feed',
+            field=models.ImageField(blank=True, null=True, upload_to=apps.card.models.CardPhoto.upload_photo_variant, verbose_name='Фото для ленты'),
+        ),
+        migrations.AddField(
+            model_name='cardphoto',
+            name='full',
+            field=models.ImageField(blank=True, null=True, upload_to=apps.card.models.CardPhoto.upload_photo_variant, verbose_name='Фото в полном размере'),
+        ),
+        migrations.AddField(
+            model_name='cardphoto',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Высота'),
+        ),
+        migrations.AddField(
+            model_name='cardphoto',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to=apps.card.models.CardPhoto.upload_photo_variant, verbose_name='Миниатюра'),
+        ),
+        migrations.AddField(
+            model_name='cardphoto',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Ширина'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.23 on 2026-10-19 14:31
+
+import apps.card.models
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('card', '0006_auto_20261019_1729'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cardphoto',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='SHA-256 содержимого'),
+        ),
+        migrations.AddField(
+            model_name='cardphoto',
+            name='perceptual_hash',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True, verbose_name='Перцептивный хеш'),
+        ),
+        migrations.AlterField(
+            model_name='cardphoto',
+            name='feed',
+            field=models.ImageField(blank=True, max_length=255, null=True, upload_to=apps.card.models.CardPhoto.upload_photo_variant, verbose_name='Фото для ленты'),
+        ),
+        migrations.AlterField(
+            model_name='cardphoto',
+            name='full',
+            field=models.ImageField(blank=True, max_length=255, null=True, upload_to=apps.card.models.CardPhoto.upload_photo_variant, verbose_name='Фото в полном размере'),
+        ),
+        migrations.AlterField(
+            model_name='cardphoto',
+            name='photo',
+            field=models.ImageField(max_length=255, upload_to=apps.card.models.CardPhoto.upload_photo, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'heic'])], verbose_name='Фото'),
+        ),
+        migrations.AlterField(
+            model_name='cardphoto',
+            name='thumbnail',
+            field=models.ImageField(blank=True, max_length=255, null=True, upload_to=apps.card.models.CardPhoto.upload_photo_variant, verbose_name='Миниатюра'),
+        ),
+    ]
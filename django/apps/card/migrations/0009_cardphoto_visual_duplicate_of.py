@@ -0,0 +1,19 @@
+# Generated by Django 3.2.23 on 2026-10-19 16:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('card', '0008_auto_20261019_1819'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cardphoto',
+            name='visual_duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='card.cardphoto', verbose_name='Визуально похожее фото'),
+        ),
+    ]
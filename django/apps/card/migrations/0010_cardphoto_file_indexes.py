@@ -0,0 +1,35 @@
+# Generated by Django 3.2.23 on 2026-10-19 16:06
+
+import apps.card.models
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('card', '0009_cardphoto_visual_duplicate_of'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cardphoto',
+            name='feed',
+            field=models.ImageField(blank=True, db_index=True, max_length=255, null=True, upload_to=apps.card.models.CardPhoto.upload_photo_variant, verbose_name='Фото для ленты'),
+        ),
+        migrations.AlterField(
+            model_name='cardphoto',
+            name='full',
+            field=models.ImageField(blank=True, db_index=True, max_length=255, null=True, upload_to=apps.card.models.CardPhoto.upload_photo_variant, verbose_name='Фото в полном размере'),
+        ),
+        migrations.AlterField(
+            model_name='cardphoto',
+            name='photo',
+            field=models.ImageField(db_index=True, max_length=255, upload_to=apps.card.models.CardPhoto.upload_photo, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'heic'])], verbose_name='Фото'),
+        ),
+        migrations.AlterField(
+            model_name='cardphoto',
+            name='thumbnail',
+            field=models.ImageField(blank=True, db_index=True, max_length=255, null=True, upload_to=apps.card.models.CardPhoto.upload_photo_variant, verbose_name='Миниатюра'),
+        ),
+    ]
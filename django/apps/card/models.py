@@ -1,5 +1,6 @@
 from django.core.validators import MinValueValidator, FileExtensionValidator, MaxValueValidator
 from django.db import models
+from django_cleanup import cleanup
 
 from apps.city.models import City
 from apps.user.models import User
@@ -9,6 +10,7 @@ class CardTag(models.Model):
     """Тег карточки"""
     name = models.CharField(max_length=255, verbose_name='Название')
     order = models.PositiveIntegerField(default=0, verbose_name='Сортировка')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Время изменения')
 
     class Meta:
         verbose_name = 'Тег карточки'
@@ -38,6 +40,7 @@ class Card(models.Model):
     status = models.CharField(max_length=100, verbose_name='Статус', choices=Statuses.choices, default=Statuses.ACTIVE)
     tags = models.ManyToManyField(CardTag, related_name='cards', verbose_name='Теги')
     user_skips = models.ManyToManyField(User, related_name='card_skips', verbose_name='Пропуски пользователя')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Время изменения')
 
     class Meta:
         verbose_name = 'Карточка'
@@ -47,15 +50,38 @@ class Card(models.Model):
         return str(self.header[:100]) + '...'
 
 
+@cleanup.ignore
 class CardPhoto(models.Model):
-    """Фото карточки"""
+    """Фото карточки
+
+    Файлы хранятся по хешу содержимого и могут использоваться несколькими фото сразу,
+    поэтому django_cleanup их не удаляет - это делает CardPhotoService.delete_unused_files
+    """
+    # Уменьшенные копии без EXIF. Оригинал клиентам не отдается
+    VARIANT_FIELDS = ('thumbnail', 'feed', 'full')
+    FILE_FIELDS = ('photo', *VARIANT_FIELDS)
 
     def upload_photo(instance, filename):
-        return f'cards/{instance.card_id}/photos/{filename}'
+        return f'cards/photos/{instance.content_hash[:2]}/{filename}'
+
+    def upload_photo_variant(instance, filename):  # noqa: N805
+        return f'cards/photos/{instance.content_hash[:2]}/variants/{filename}'
 
     card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name='photos', verbose_name='Карточка')
-    photo = models.ImageField(upload_to=upload_photo, verbose_name='Фото',
+    photo = models.ImageField(upload_to=upload_photo, max_length=255, db_index=True, verbose_name='Фото',
                               validators=[FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'heic'])])
+    width = models.PositiveIntegerField(null=True, blank=True, verbose_name='Ширина')
+    height = models.PositiveIntegerField(null=True, blank=True, verbose_name='Высота')
+    thumbnail = models.ImageField(upload_to=upload_photo_variant, max_length=255, null=True, blank=True, db_index=True,
+                                  verbose_name='Миниатюра')
+    feed = models.ImageField(upload_to=upload_photo_variant, max_length=255, null=True, blank=True, db_index=True,
+                             verbose_name='Фото для ленты')
+    full = models.ImageField(upload_to=upload_photo_variant, max_length=255, null=True, blank=True, db_index=True,
+                             verbose_name='Фото в полном размере')
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name='SHA-256 содержимого')
+    perceptual_hash = models.BigIntegerField(null=True, blank=True, db_index=True, verbose_name='Перцептивный хеш')
+    visual_duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                                            verbose_name='Визуально похожее фото')
 
     class Meta:
         verbose_name = 'Фото карточки'
@@ -1,9 +1,11 @@
+import os
 from datetime import date
 
+from django.conf import settings
 from rest_framework import serializers
 
 from .models import CardTag, CardPhoto, Card, CardRequest
-from .services import CardService
+from .services import CardService, CardPhotoService
 from ..city.serializers import CitySerializer
 from ..user.serializers import ShortUserSerializer
 
@@ -18,25 +20,82 @@ class CardTagSerializer(serializers.ModelSerializer):
 
 class CardPhotoSerializer(serializers.ModelSerializer):
     """Сериализатор для фото карточки"""
+    key = serializers.CharField(write_only=True, required=False,
+                                help_text='Ключ файла, загруженного напрямую в хранилище (photo-upload)')
 
     class Meta:
         model = CardPhoto
-        fields = ('id', 'photo',)
+        fields = ('id', 'photo', 'key', 'width', 'height', 'thumbnail', 'feed', 'full')
+        read_only_fields = ('width', 'height', 'thumbnail', 'feed', 'full')
 
         extra_kwargs = {
             'id': {'read_only': False, 'required': False},
-            'photo': {'required': False},
+            # Оригинал может содержать EXIF (в том числе геопозицию), отдаются только уменьшенные копии
+            'photo': {'required': False, 'write_only': True},
         }
 
+    def validate_photo(self, value):
+        # Основная проверка размера выполняется при загрузке (utils.uploads.LimitedMultiPartParser)
+        max_size = settings.IMAGE_UPLOAD_MAX_SIZES['photo']
+
+        if value and value.size > max_size:
+            raise serializers.ValidationError(
+                f'Размер файла превышает максимальный размер ({max_size // (1024 * 1024)} МБ).')
+
+        return value
+
+    def validate_key(self, value: str):
+        user = self.context['request'].user
+        key_name = value.removeprefix(CardPhotoService.get_upload_prefix(user))
+        is_valid_name = '/' not in key_name and os.path.splitext(key_name)[1] in CardPhotoService.UPLOAD_CONTENT_TYPES
+        if key_name == value or not is_valid_name:
+            raise serializers.ValidationError('Недопустимый ключ файла.')
+        if not CardPhoto._meta.get_field('photo').storage.exists(value):
+            raise serializers.ValidationError('Файл не загружен в хранилище.')
+        return value
+
     def validate(self, data):
-        if 'id' not in data and 'photo' not in data:
+        sources = [field for field in ('id', 'photo', 'key') if field in data]
+        if not sources:
             raise serializers.ValidationError('Не передан файл.', code='required')
-        if 'id' in data and 'photo' in data:
-            raise serializers.ValidationError('Нельзя одновременно передать id и photo', code='invalid')
+        if len(sources) > 1:
+            raise serializers.ValidationError(f'Нельзя одновременно передать {" и ".join(sources)}', code='invalid')
         return data
 
 
-class ShortCardSerializer(serializers.ModelSerializer):
+class CreateCardPhotoUploadSerializer(serializers.Serializer):
+    """Сериализатор для запроса ссылки на загрузку фото карточки в хранилище"""
+    file_name = serializers.CharField(max_length=255)
+
+
+class CardPhotoUploadSerializer(serializers.Serializer):
+    """Сериализатор для ссылки на загрузку фото карточки в хранилище"""
+    key = serializers.CharField()
+    url = serializers.URLField()
+    fields = serializers.DictField(child=serializers.CharField())
+
+
+class CardOwnerOnlyFieldsMixin:
+    """Поля карточки, которые видит только ее владелец.
+    С with_owner_only_fields в контексте поля не скрываются (для кэша, общего для всех пользователей)
+    """
+    owner_only_fields = ('created_at', 'status')
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.context.get('with_owner_only_fields'):
+            return data
+        return self.hide_owner_only_fields(data, self.context['request'].user)
+
+    @classmethod
+    def hide_owner_only_fields(cls, data: dict, user) -> dict:
+        """Скрыть поля, которые видит только владелец карточки"""
+        if data['owner']['id'] == user.id:
+            return data
+        return {field: value for field, value in data.items() if field not in cls.owner_only_fields}
+
+
+class ShortCardSerializer(CardOwnerOnlyFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для краткой информации о карточке"""
     owner = ShortUserSerializer()
     city = CitySerializer()
@@ -53,19 +112,13 @@ class ShortCardSerializer(serializers.ModelSerializer):
         card_service = CardService(instance)
         return card_service.get_free_slots_number()
 
-    def to_representation(self, instance):
-        user = self.context['request'].user
-        if instance.owner == user:
-            return super().to_representation(instance)
-        else:
-            excluded_fields = ['created_at', 'status']
-            data = super().to_representation(instance)
-            for field in excluded_fields:
-                data.pop(field, None)
-            return data
+    @classmethod
+    def from_full(cls, data: dict) -> dict:
+        """Краткое представление карточки из полного (FullCardSerializer)"""
+        return {field: data[field] for field in cls.Meta.fields}
 
 
-class FullCardSerializer(serializers.ModelSerializer):
+class FullCardSerializer(CardOwnerOnlyFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для полной информации о карточке"""
     owner = ShortUserSerializer()
     city = CitySerializer()
@@ -82,17 +135,6 @@ class FullCardSerializer(serializers.ModelSerializer):
         card_service = CardService(instance)
         return card_service.get_free_slots_number()
 
-    def to_representation(self, instance):
-        user = self.context['request'].user
-        if instance.owner == user:
-            return super().to_representation(instance)
-        else:
-            excluded_fields = ['created_at', 'status']
-            data = super().to_representation(instance)
-            for field in excluded_fields:
-                data.pop(field, None)
-            return data
-
 
 class CreateCardSerializer(serializers.ModelSerializer):
     """Сериализатор для создания карточки"""
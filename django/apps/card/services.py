@@ -1,14 +1,24 @@
 import json
+import os
+import uuid
 from datetime import date
 
+from django.conf import settings
 from django.core.files import File
+from django.core.files.base import ContentFile
 from django.db import transaction
-from django.db.models import QuerySet
+from django.db.models import Count, OuterRef, Prefetch, QuerySet, Q, Subquery
+from django.db.models.functions import Coalesce
 from django_celery_beat.models import PeriodicTask, ClockedSchedule
 
+from utils.files import get_file_hash
+from utils.storages import generate_presigned_post
+from . import tasks
+from .dto import CardPhotoUploadDTO
 from .exceptions import CardActionError
 from .models import Card, CardPhoto, CardRequest, CardTag
 from ..chat.services import ChatMessageService
+from ..review.services import ReviewService
 from ..user.models import User
 
 
@@ -32,10 +42,7 @@ class CardService:
 
         card = Card.objects.create(**card_data)
         if photos:
-            for p in photos:
-                if 'photo' not in p:
-                    continue
-                card.photos.create(photo=p['photo'])
+            CardPhotoService.create_many(card, photos)
         if tags:
             card.tags.add(*tags)
 
@@ -45,6 +52,18 @@ class CardService:
 
         return card
 
+    @staticmethod
+    def prefetch_representation(queryset: QuerySet[Card]) -> QuerySet[Card]:
+        """Загрузить данные для представления карточек (владелец со средней оценкой, город, фото, теги,
+        количество одобренных заявок) несколькими запросами на все карточки, а не запросами на каждую
+        """
+        approved_requests_number = CardRequest.objects.filter(
+            card=OuterRef('pk'), status=CardRequest.Statuses.APPROVED
+        ).order_by().values('card').annotate(number=Count('id')).values('number')
+        return queryset.select_related('city').prefetch_related(
+            Prefetch('owner', queryset=ReviewService.annotate_average_points(User.objects.all())), 'photos', 'tags',
+        ).annotate(approved_requests_number=Coalesce(Subquery(approved_requests_number), 0))
+
     @staticmethod
     def get_cards_sorted_by_status(queryset: QuerySet[Card]) -> list[Card]:
         """Получить карточки отсортированные по статусу (Активные, Черновики, Завершенные)"""
@@ -62,17 +81,15 @@ class CardService:
         return active_cards + draft_cards + completed_cards
 
     @staticmethod
-    def get_cards_for_user_feed(user: User, base_queryset: QuerySet[Card] = None) -> QuerySet[Card]:
-        """Получить карточки для ленты пользователя"""
-        queryset = base_queryset or Card.objects.all()
-        active_card_ids: set[int] = set(queryset.filter(status=Card.Statuses.ACTIVE).exclude(owner=user).values_list('id', flat=True))
+    def get_card_ids_for_user_feed(user: User, cards: list[tuple[int, int]]) -> list[int]:
+        """Получить id карточек для ленты пользователя из id и владельцев активных карточек (общих для всех)"""
+        card_ids = [card_id for card_id, owner_id in cards if owner_id != user.id]
         skipped_card_ids: set[int] = set(user.card_skips.values_list('id', flat=True))
-        diff_ids = active_card_ids - skipped_card_ids
-        if diff_ids:
-            return queryset.filter(id__in=diff_ids).order_by('-created_at')
-        else:
-            user.card_skips.clear()
-            return queryset.filter(id__in=active_card_ids).order_by('-created_at')
+        feed = [card_id for card_id in card_ids if card_id not in skipped_card_ids]
+        if feed:
+            return feed
+        user.card_skips.clear()
+        return card_ids
 
     def skip_card_by_user(self, user: User) -> None:
         """Пропустить карточку"""
@@ -132,11 +149,8 @@ class CardService:
                     new_card_deadline = value
                     is_deadline_changed = (new_card_deadline != self._card.deadline)
                 case 'photos':
-                    CardPhoto.objects.exclude(id__in=[p['id'] for p in value if 'id' in p]).delete()
-                    for p in value:
-                        if 'photo' not in p:
-                            continue
-                        self._card.photos.create(photo=p['photo'])
+                    self._card.photos.exclude(id__in=[p['id'] for p in value if 'id' in p]).delete()
+                    CardPhotoService.create_many(self._card, value)
                 case 'tags':
                     tags_to_remove = list(self._card.tags.exclude(id__in=[t.id for t in value]).values_list('id', flat=True))
                     self._card.tags.remove(*tags_to_remove)
@@ -168,7 +182,191 @@ class CardService:
 
     def get_free_slots_number(self) -> int:
         """Получить количество свободных слотов, доступных для отправки заявки на совместное проживание"""
-        return self._card.limit - self._card.requests.filter(status=CardRequest.Statuses.APPROVED).count()
+        approved_requests_number = getattr(self._card, 'approved_requests_number', None)
+        if approved_requests_number is None:
+            approved_requests_number = self._card.requests.filter(status=CardRequest.Statuses.APPROVED).count()
+        return self._card.limit - approved_requests_number
+
+
+class CardPhotoService:
+    """Сервис для работы с фото карточек
+
+    Файлы фото хранятся по SHA-256 содержимого: повторная загрузка того же файла не сохраняет его
+    заново и не создает уменьшенные копии повторно. Для почти одинаковых изображений (совпадает перцептивный хеш
+    и пропорции) запоминается ссылка на похожее фото, но уменьшенные копии создаются из своего файла.
+
+    Фото можно загрузить напрямую в S3-совместимое хранилище по ссылке из create_upload, а затем передать
+    ключ файла: при обработке файл переносится из UPLOAD_PREFIX в постоянное место.
+    """
+    UPLOAD_PREFIX = 'uploads'
+    UPLOAD_CONTENT_TYPES = {
+        '.jpg': 'image/jpeg',
+        '.jpeg': 'image/jpeg',
+        '.png': 'image/png',
+        '.heic': 'image/heic',
+    }
+
+    def __init__(self, card_photo: CardPhoto):
+        self._card_photo = card_photo
+
+    @staticmethod
+    def create(card: Card, photo: File) -> CardPhoto:
+        """Сохранить оригинал фото, уменьшенные копии создаются в фоновой задаче"""
+        content_hash = get_file_hash(photo)
+        card_photo = CardPhoto(card=card, content_hash=content_hash)
+
+        duplicate = (CardPhoto.objects.filter(content_hash=content_hash).exclude(full='').exclude(full=None).first() or
+                     CardPhoto.objects.filter(content_hash=content_hash).first())
+        if duplicate:
+            card_photo_service = CardPhotoService(card_photo)
+            card_photo_service._copy_from(duplicate, fields=('photo', 'width', 'height', 'perceptual_hash',
+                                                             *settings.CARD_PHOTO_VARIANTS))
+        else:
+            photo_name = f'{content_hash}{os.path.splitext(photo.name)[1].lower()}'
+            stored_photo_name = card_photo.photo.field.generate_filename(card_photo, photo_name)
+            if card_photo.photo.storage.exists(stored_photo_name):
+                card_photo.photo = stored_photo_name
+            else:
+                card_photo.photo.save(photo_name, photo, save=False)
+        card_photo.save()
+
+        if not card_photo.full:
+            transaction.on_commit(lambda: tasks.process_card_photo.delay(card_photo.id))
+        return card_photo
+
+    @staticmethod
+    def get_upload_prefix(user: User) -> str:
+        """Получить префикс ключей файлов, загружаемых пользователем напрямую в хранилище"""
+        return f'{CardPhotoService.UPLOAD_PREFIX}/{user.id}/'
+
+    @staticmethod
+    def create_upload(user: User, file_name: str) -> CardPhotoUploadDTO:
+        """Получить ссылку для загрузки фото напрямую в хранилище"""
+        extension = os.path.splitext(file_name)[1].lower()
+        content_type = CardPhotoService.UPLOAD_CONTENT_TYPES.get(extension)
+        if not content_type:
+            raise CardActionError('Файл не является изображением (jpg, jpeg, png, heic).')
+
+        key = f'{CardPhotoService.get_upload_prefix(user)}{uuid.uuid4().hex}{extension}'
+        presigned_post = generate_presigned_post(CardPhoto._meta.get_field('photo').storage, key,
+                                                 content_type=content_type,
+                                                 max_size=settings.IMAGE_UPLOAD_MAX_SIZES['photo'],
+                                                 expires_in=settings.CARD_PHOTO_UPLOAD_URL_EXPIRES)
+        if presigned_post is None:
+            raise CardActionError('Загрузка напрямую в хранилище недоступна.')
+        return CardPhotoUploadDTO(key=key, url=presigned_post['url'], fields=presigned_post['fields'])
+
+    @staticmethod
+    def create_many(card: Card, photos: list[dict]) -> None:
+        """Создать новые фото из данных сериализатора: файл (photo) или ключ прямой загрузки (key).
+        Уже существующие фото (id) пропускаются
+        """
+        for p in photos:
+            if 'photo' in p:
+                CardPhotoService.create(card, p['photo'])
+            elif 'key' in p:
+                CardPhotoService.create_from_upload(card, p['key'])
+
+    @staticmethod
+    def create_from_upload(card: Card, key: str) -> CardPhoto:
+        """Создать фото из файла, загруженного напрямую в хранилище, файл обрабатывается в фоновой задаче"""
+        if CardPhoto.objects.filter(photo=key).exists():
+            raise CardActionError('Файл уже используется.')
+        card_photo = CardPhoto.objects.create(card=card, photo=key)
+        transaction.on_commit(lambda: tasks.process_card_photo.delay(card_photo.id))
+        return card_photo
+
+    @staticmethod
+    def delete_unused_files(file_names: list[str]) -> None:
+        """Удалить файлы, на которые больше не ссылается ни одно фото карточки"""
+        storage = CardPhoto._meta.get_field('photo').storage
+        for file_name in set(file_names):
+            references = Q()
+            for field in CardPhoto.FILE_FIELDS:
+                references |= Q(**{field: file_name})
+            if file_name and not CardPhoto.objects.filter(references).exists():
+                storage.delete(file_name)
+
+    def create_variants(self) -> None:
+        """Создать уменьшенные копии фото без EXIF и сохранить размеры оригинала"""
+        # Pillow и NumPy нужны только в фоновой задаче, поэтому не загружаются вместе с сервисом
+        from PIL import UnidentifiedImageError
+
+        from utils.images import create_image_variant, get_perceptual_hash, open_image
+
+        if self._card_photo.photo.name.startswith(f'{self.UPLOAD_PREFIX}/'):
+            self._store_upload()
+            if self._card_photo.full:
+                return
+
+        try:
+            with self._card_photo.photo.open('rb') as f:
+                image = open_image(f)
+        except UnidentifiedImageError:
+            return
+
+        self._card_photo.width, self._card_photo.height = image.size
+        self._card_photo.perceptual_hash = get_perceptual_hash(image)
+        # Похожее фото только отмечается: копии всегда создаются из загруженного файла,
+        # файлы других фото используются лишь при совпадении содержимого (_store_upload)
+        self._card_photo.visual_duplicate_of = self._get_visual_duplicate()
+
+        name = self._card_photo.content_hash or os.path.splitext(os.path.basename(self._card_photo.photo.name))[0]
+        extension = settings.IMAGE_VARIANTS_FORMAT.lower()
+        for variant, max_size in settings.CARD_PHOTO_VARIANTS.items():
+            variant_file = getattr(self._card_photo, variant)
+            variant_name = f'{name}_{variant}.{extension}'
+            stored_variant_name = variant_file.field.generate_filename(self._card_photo, variant_name)
+            if variant_file.storage.exists(stored_variant_name):
+                setattr(self._card_photo, variant, stored_variant_name)
+                continue
+            variant_io = create_image_variant(image, max_size, image_format=settings.IMAGE_VARIANTS_FORMAT,
+                                              quality=settings.IMAGE_VARIANTS_QUALITY)
+            variant_file.save(variant_name, ContentFile(variant_io.getvalue()), save=False)
+        self._card_photo.save(update_fields=['width', 'height', 'perceptual_hash', 'visual_duplicate_of',
+                                             *settings.CARD_PHOTO_VARIANTS])
+
+    def _store_upload(self) -> None:
+        """Перенести файл, загруженный напрямую в хранилище, в постоянное место (по SHA-256 содержимого).
+        Если такой файл уже обработан, используются его уменьшенные копии
+        """
+        upload_name = self._card_photo.photo.name
+        storage = self._card_photo.photo.storage
+        with storage.open(upload_name, 'rb') as f:
+            content_hash = get_file_hash(f)
+            self._card_photo.content_hash = content_hash
+            duplicate = (CardPhoto.objects.filter(content_hash=content_hash).exclude(id=self._card_photo.id)
+                         .exclude(full='').exclude(full=None).first())
+            if duplicate:
+                self._copy_from(duplicate, fields=('photo', 'width', 'height', 'perceptual_hash',
+                                                   *settings.CARD_PHOTO_VARIANTS))
+            else:
+                photo_name = f'{content_hash}{os.path.splitext(upload_name)[1].lower()}'
+                stored_photo_name = self._card_photo.photo.field.generate_filename(self._card_photo, photo_name)
+                if storage.exists(stored_photo_name):
+                    self._card_photo.photo = stored_photo_name
+                else:
+                    self._card_photo.photo.save(photo_name, f, save=False)
+        self._card_photo.save(update_fields=['content_hash', 'photo', 'width', 'height', 'perceptual_hash',
+                                             *settings.CARD_PHOTO_VARIANTS])
+        storage.delete(upload_name)
+
+    def _get_visual_duplicate(self) -> CardPhoto | None:
+        """Найти обработанное фото с тем же перцептивным хешем и теми же пропорциями"""
+        width, height = self._card_photo.width, self._card_photo.height
+        candidates = (CardPhoto.objects.filter(perceptual_hash=self._card_photo.perceptual_hash)
+                      .exclude(id=self._card_photo.id).exclude(full='').exclude(full=None))
+        for candidate in candidates[:10]:
+            if not candidate.width or not candidate.height:
+                continue
+            if abs(candidate.width * height - candidate.height * width) <= 0.01 * candidate.width * height:
+                return candidate
+
+    def _copy_from(self, card_photo: CardPhoto, fields) -> None:
+        """Использовать файлы и данные другого фото"""
+        for field in fields:
+            value = getattr(card_photo, field)
+            setattr(self._card_photo, field, value.name if field in CardPhoto.FILE_FIELDS else value)
 
 
 class CardRequestService:
@@ -178,6 +376,14 @@ class CardRequestService:
     def __init__(self, card_request: CardRequest):
         self._card_request = card_request
 
+    @staticmethod
+    def prefetch_representation(queryset: QuerySet[CardRequest]) -> QuerySet[CardRequest]:
+        """Загрузить пользователей и карточки заявок для их представления запросами на все заявки сразу"""
+        return queryset.prefetch_related(
+            Prefetch('user', queryset=ReviewService.annotate_average_points(User.objects.all())),
+            Prefetch('card', queryset=CardService.prefetch_representation(Card.objects.all())),
+        )
+
     @staticmethod
     @transaction.atomic
     def create(**card_request_data) -> CardRequest:
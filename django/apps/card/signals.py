@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import tasks
+from .cache import card_cache, card_feed_cache, card_tag_cache
+from .models import Card, CardPhoto, CardRequest, CardTag
+from ..city.models import City
+from ..review.models import Review
+from ..sync.models import Change
+from ..sync.services import ChangeLogService
+from ..user.models import User
+
+
+@receiver(post_delete, sender=CardPhoto)
+def delete_card_photo_files(sender, instance: CardPhoto, **kwargs):
+    """Удалить файлы удаленного фото карточки, если на них больше никто не ссылается.
+    Удаление откладывается, чтобы не задеть файл, который в это время переиспользует новая загрузка
+    """
+    file_names = [getattr(instance, field).name for field in CardPhoto.FILE_FIELDS if getattr(instance, field)]
+    if file_names:
+        transaction.on_commit(lambda: tasks.delete_unused_card_photo_files.apply_async(
+            args=(file_names,), countdown=settings.CARD_PHOTO_FILES_DELETE_DELAY))
+
+
+@receiver([post_save, post_delete], sender=Card)
+def invalidate_card_cache(sender, instance: Card, signal, **kwargs):
+    card_cache.invalidate(instance.pk)
+    card_feed_cache.invalidate_all()
+    ChangeLogService.record(Change.Types.CARD, [instance.pk], is_deleted=signal is post_delete)
+
+
+def touch_cards(*card_ids: int) -> None:
+    """Изменились данные, которые входят в представление карточек: обновить время изменения карточек
+    (по нему вычисляется ETag) и удалить их из кэша
+    """
+    if card_ids:
+        Card.objects.filter(id__in=card_ids).update(updated_at=timezone.now())
+        card_cache.invalidate(*card_ids)
+        ChangeLogService.record(Change.Types.CARD, card_ids)
+
+
+@receiver([post_save, post_delete], sender=CardPhoto)
+@receiver([post_save, post_delete], sender=CardRequest)
+def invalidate_card_cache_by_related(sender, instance: CardPhoto | CardRequest, **kwargs):
+    """Фото и одобренные заявки (количество свободных мест) входят в представление карточки"""
+    touch_cards(instance.card_id)
+
+
+@receiver([post_save, post_delete], sender=CardRequest)
+def record_card_request_change(sender, instance: CardRequest, signal, **kwargs):
+    """Заявку видят ее автор и владелец карточки"""
+    owner_id = Card.objects.filter(id=instance.card_id).values_list('owner_id', flat=True).first()
+    ChangeLogService.record(Change.Types.CARD_REQUEST, [instance.pk], user_ids=[instance.user_id, owner_id],
+                            is_deleted=signal is post_delete)
+
+
+@receiver(m2m_changed, sender=Card.tags.through)
+def invalidate_card_cache_by_tags(sender, instance: Card | CardTag, action: str, reverse: bool, pk_set, **kwargs):
+    # Теги карточки - фильтр ленты
+    if action.startswith('post_'):
+        card_feed_cache.invalidate_all()
+    if not reverse:
+        if action.startswith('post_'):
+            touch_cards(instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        touch_cards(*pk_set)
+    elif action == 'pre_clear':
+        touch_cards(*instance.cards.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=CardTag)
+@receiver(pre_delete, sender=CardTag)
+def invalidate_card_tag_cache(sender, instance: CardTag, **kwargs):
+    card_tag_cache.invalidate('all', 'version')
+    touch_cards(*instance.cards.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=City)
+@receiver(pre_delete, sender=City)
+def invalidate_card_cache_by_city(sender, instance: City, **kwargs):
+    touch_cards(*instance.cards.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=User)
+def invalidate_card_cache_by_owner(sender, instance: User, created: bool, update_fields, **kwargs):
+    # Время последнего входа не входит в представление карточки
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    # Время изменения владельца входит в ETag карточки отдельно
+    card_ids = list(instance.cards.values_list('id', flat=True))
+    card_cache.invalidate(*card_ids)
+    ChangeLogService.record(Change.Types.CARD, card_ids)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_card_cache_by_review(sender, instance: Review, **kwargs):
+    """Средняя оценка владельца входит в представление карточки"""
+    touch_cards(*Card.objects.filter(owner_id=instance.target_user_id).values_list('id', flat=True))
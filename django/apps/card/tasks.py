@@ -1,6 +1,6 @@
 from celery import shared_task
 
-from .models import Card
+from .models import Card, CardPhoto
 
 
 @shared_task
@@ -10,3 +10,21 @@ def change_card_status(card_id: int, status: str) -> None:
     if card:
         card.status = status
         card.save()
+
+
+@shared_task
+def process_card_photo(card_photo_id: int) -> None:
+    """Создать уменьшенные копии фото карточки"""
+    from .services import CardPhotoService
+
+    card_photo = CardPhoto.objects.filter(id=card_photo_id).first()
+    if card_photo:
+        CardPhotoService(card_photo).create_variants()
+
+
+@shared_task
+def delete_unused_card_photo_files(file_names: list[str]) -> None:
+    """Удалить файлы удаленных фото карточек, если они больше не используются"""
+    from .services import CardPhotoService
+
+    CardPhotoService.delete_unused_files(file_names)
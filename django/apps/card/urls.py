@@ -1,9 +1,9 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
 
+from utils.routers import AsyncReadRouter
 from .views import CardViewSet
 
-router = DefaultRouter()
+router = AsyncReadRouter()
 router.register('', CardViewSet, basename='cards')
 urlpatterns = [
     path('cards/', include(router.urls)),
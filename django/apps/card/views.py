@@ -1,3 +1,7 @@
+from datetime import date
+from urllib.parse import urlencode
+
+from django.db.models import Count, Max
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import viewsets, status
@@ -6,13 +10,17 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 
+from utils.cache import CachedRetrieveMixin, ConditionalGetMixin
+from utils.db.replicas import ReplicaReadMixin
+from .cache import card_cache, card_feed_cache, card_tag_cache
 from .exceptions import CardActionError
 from .models import Card, CardTag
 from .permissions import IsCardOwner
 from .serializers import CreateCardSerializer, CardTagSerializer, ShortCardSerializer, FullCardSerializer, \
     CreateCardRequestSerializer, ShortCardRequestWithDetailUserSerializer, FullCardRequestSerializer, \
-    ShortCardRequestWithDetailCardSerializer, HandleCardRequestSerializer
-from .services import CardService, CardRequestService
+    ShortCardRequestWithDetailCardSerializer, HandleCardRequestSerializer, CreateCardPhotoUploadSerializer, \
+    CardPhotoUploadSerializer
+from .services import CardService, CardRequestService, CardPhotoService
 from ..user.permissions import IsFullRegistered
 
 
@@ -39,6 +47,13 @@ from ..user.permissions import IsFullRegistered
         request=CreateCardSerializer,
         responses={200: FullCardSerializer}
     ),
+    photo_upload=extend_schema(
+        summary='Получить ссылку для загрузки фото карточки напрямую в хранилище',
+        description='Файл загружается POST-запросом (multipart/form-data) на url со всеми полями из fields '
+                    'и полем file последним. Затем key передается в photos при создании или редактировании карточки.',
+        request=CreateCardPhotoUploadSerializer,
+        responses={201: CardPhotoUploadSerializer}
+    ),
     tags=extend_schema(
         summary='Список доступных тегов',
         responses={200: CardTagSerializer}
@@ -72,12 +87,26 @@ from ..user.permissions import IsFullRegistered
         responses={200: ShortCardRequestWithDetailUserSerializer}
     ),
 )
-class CardViewSet(viewsets.GenericViewSet):
+class CardViewSet(ConditionalGetMixin, ReplicaReadMixin, CachedRetrieveMixin, viewsets.GenericViewSet):
     """ViewSet для карточек"""
     queryset = Card.objects.all().order_by('-created_at')
+    async_read_actions = ('list', 'tags')
+    replica_read_actions = ('list', 'retrieve')
+    conditional_actions = ('retrieve', 'tags')
+    retrieve_cache = card_cache
+    # Списки отдаются целиком
+    pagination_class = None
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['city', 'tags']
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        match self.action:
+            case 'list' | 'by_owner' | 'retrieve':
+                return CardService.prefetch_representation(queryset)
+            case _:
+                return queryset
+
     def get_serializer_class(self):
         match self.action:
             case 'list':
@@ -90,6 +119,8 @@ class CardViewSet(viewsets.GenericViewSet):
                 return FullCardSerializer
             case 'update':
                 return CreateCardSerializer
+            case 'photo_upload':
+                return CreateCardPhotoUploadSerializer
             case 'tags':
                 return CardTagSerializer
             case 'get_requests':
@@ -111,12 +142,45 @@ class CardViewSet(viewsets.GenericViewSet):
                 self.permission_classes = (IsAuthenticated, IsFullRegistered)
         return [permission() for permission in self.permission_classes]
 
+    def get_version(self):
+        match self.action:
+            case 'retrieve':
+                version = Card.objects.filter(pk=self.kwargs[self.lookup_url_kwarg or self.lookup_field]).values_list(
+                    'updated_at', 'owner__updated_at', 'owner_id').first()
+                if version is None:
+                    return None
+                card_updated_at, owner_updated_at, owner_id = version
+                # Поля владельца видит только он сам, возраст владельца меняется со временем
+                return max(card_updated_at, owner_updated_at), owner_id == self.request.user.id, date.today()
+            case 'tags':
+                # Количество меняется при удалении тега
+                version = card_tag_cache.get_or_set('version', lambda: CardTag.objects.aggregate(
+                    last_modified=Max('updated_at'), count=Count('id')))
+                return version['last_modified'], version['count']
+
     def list(self, request):
         """Список карточек"""
-        base_queryset = self.filter_queryset(self.get_queryset())
-        queryset = CardService.get_cards_for_user_feed(user=request.user, base_queryset=base_queryset)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        filters = urlencode(sorted((field, request.query_params.getlist(field)) for field in self.filterset_fields),
+                            doseq=True)
+        cards = card_feed_cache.get_or_set(filters, self.get_feed_cards)
+        card_ids = CardService.get_card_ids_for_user_feed(user=request.user, cards=cards)
+        cached_cards = card_cache.get_or_set_many(card_ids, self.get_cached_cards)
+        # Карточка могла быть удалена после вычисления списка
+        feed = [ShortCardSerializer.from_full(cached_cards[card_id]) for card_id in card_ids if card_id in cached_cards]
+        return Response([ShortCardSerializer.hide_owner_only_fields(card, request.user) for card in feed],
+                        status=status.HTTP_200_OK)
+
+    def get_feed_cards(self):
+        """id и владельцы активных карточек для ленты с учетом фильтров запроса"""
+        queryset = self.filter_queryset(super().get_queryset()).filter(status=Card.Statuses.ACTIVE)
+        return list(queryset.values_list('id', 'owner_id'))
+
+    def get_cached_cards(self, card_ids) -> dict:
+        """Представления карточек для card_cache (как в retrieve)"""
+        queryset = CardService.prefetch_representation(Card.objects.filter(id__in=card_ids))
+        serializer = FullCardSerializer(queryset, many=True, context={**self.get_serializer_context(),
+                                                                      'with_owner_only_fields': True})
+        return {card['id']: card for card in serializer.data}
 
     def create(self, request):
         """Создать карточку"""
@@ -143,10 +207,13 @@ class CardViewSet(viewsets.GenericViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    def retrieve(self, request, pk):
-        obj = self.get_object()
-        serializer = self.get_serializer(obj)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def get_cached_data(self, instance: Card) -> dict:
+        serializer = self.get_serializer(instance, context={**self.get_serializer_context(),
+                                                            'with_owner_only_fields': True})
+        return serializer.data
+
+    def get_response_data(self, data: dict) -> dict:
+        return FullCardSerializer.hide_owner_only_fields(data, self.request.user)
 
     def update(self, request, pk):
         serializer = self.get_serializer(data=request.data)
@@ -161,16 +228,27 @@ class CardViewSet(viewsets.GenericViewSet):
             return Response(FullCardSerializer(updated_card, context=self.get_serializer_context()).data,
                             status=status.HTTP_200_OK)
 
+    @action(methods=['POST'], detail=False, url_path='photo-upload', url_name='photo_upload')
+    def photo_upload(self, request):
+        """Получить ссылку для загрузки фото карточки напрямую в хранилище"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = CardPhotoService.create_upload(user=request.user, file_name=serializer.validated_data['file_name'])
+        except CardActionError as exc:
+            raise ValidationError(str(exc))
+        return Response(CardPhotoUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
     @action(methods=['GET'], detail=False, url_path='tags', url_name='tags')
     def tags(self, request):
-        queryset = CardTag.objects.all()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        data = card_tag_cache.get_or_set('all', lambda: self.get_serializer(CardTag.objects.all(), many=True).data)
+        return Response(data, status=status.HTTP_200_OK)
 
     @action(methods=['GET'], detail=True, url_path='get-requests', url_name='get_requests')
     def get_requests(self, request, pk):
         card = self.get_object()
-        queryset = CardRequestService.get_card_requests_sorted_by_status(card.requests.all())
+        queryset = CardRequestService.get_card_requests_sorted_by_status(
+            CardRequestService.prefetch_representation(card.requests.all()))
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -209,7 +287,8 @@ class CardViewSet(viewsets.GenericViewSet):
 
     @action(methods=['GET'], detail=False, url_path='my-requests', url_name='my_requests')
     def my_requests(self, request):
-        queryset = CardRequestService.get_card_requests_sorted_by_status(request.user.requests.all())
+        queryset = CardRequestService.get_card_requests_sorted_by_status(
+            CardRequestService.prefetch_representation(request.user.requests.all()))
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
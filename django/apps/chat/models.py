@@ -25,7 +25,7 @@ class ChatMessage(models.Model):
     @property
     def is_system(self) -> bool:
         """Является ли сообщение системным"""
-        return not bool(self.sender)
+        return self.sender_id is None
 
     @property
     def short_content(self) -> str:
@@ -1,8 +1,10 @@
 from django.db import transaction
-from django.db.models import QuerySet, Q, Max
+from django.db.models import Prefetch, QuerySet, Q, Max
 
 from .exceptions import ChatMessageException
 from .models import ChatMessage
+from ..card.models import Card
+from ..review.services import ReviewService
 from ..user.models import User
 
 
@@ -31,6 +33,20 @@ class ChatMessageService:
 
         return chat_message
 
+    @staticmethod
+    def prefetch_representation(queryset: QuerySet[ChatMessage]) -> QuerySet[ChatMessage]:
+        """Загрузить отправителей, получателей и карточки сообщений для их представления запросами на все
+        сообщения сразу
+        """
+        from apps.card.services import CardService
+
+        users = ReviewService.annotate_average_points(User.objects.all())
+        return queryset.prefetch_related(
+            Prefetch('sender', queryset=users),
+            Prefetch('receiver', queryset=users),
+            Prefetch('card', queryset=CardService.prefetch_representation(Card.objects.all())),
+        )
+
     @staticmethod
     def get_chats_last_messages(user: User) -> QuerySet[ChatMessage]:
         """Получить последние сообщения из чатов юзера"""
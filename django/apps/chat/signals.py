@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ChatMessage
+from ..sync.models import Change
+from ..sync.services import ChangeLogService
+
+
+@receiver([post_save, post_delete], sender=ChatMessage)
+def record_chat_message_change(sender, instance: ChatMessage, signal, **kwargs):
+    """Сообщение видят отправитель и получатель (у системных сообщений - только получатель)"""
+    user_ids = [user_id for user_id in (instance.sender_id, instance.receiver_id) if user_id is not None]
+    ChangeLogService.record(Change.Types.CHAT_MESSAGE, [instance.pk], user_ids=user_ids,
+                            is_deleted=signal is post_delete)
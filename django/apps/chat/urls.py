@@ -1,9 +1,9 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
 
+from utils.routers import AsyncReadRouter
 from .views import ChatMessageViewSet
 
-router = DefaultRouter()
+router = AsyncReadRouter()
 router.register('', ChatMessageViewSet, basename='chat_messages')
 urlpatterns = [
     path('chat-messages/', include(router.urls)),
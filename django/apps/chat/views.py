@@ -5,6 +5,7 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from utils.db.replicas import ReplicaReadMixin
 from .exceptions import ChatMessageException
 from .models import ChatMessage
 from .permissions import IsChatMessageSender, IsChatMessageSenderOrReceiver
@@ -32,9 +33,11 @@ from ..user.permissions import IsFullRegistered
         responses={200: MessageInChatSerializer}
     )
 )
-class ChatMessageViewSet(viewsets.GenericViewSet, mixins.DestroyModelMixin):
+class ChatMessageViewSet(ReplicaReadMixin, viewsets.GenericViewSet, mixins.DestroyModelMixin):
     """ViewSet для карточек"""
     queryset = ChatMessage.objects.all().order_by('-created_at')
+    async_read_actions = ('my_chats', 'retrieve')
+    replica_read_actions = ('my_chats', 'retrieve')
 
     def get_serializer_class(self):
         match self.action:
@@ -70,11 +73,12 @@ class ChatMessageViewSet(viewsets.GenericViewSet, mixins.DestroyModelMixin):
     def my_chats(self, request):
         """Список собственных чатов (последних сообщений)"""
         queryset = ChatMessageService.get_chats_last_messages(user=request.user)
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = self.get_serializer(ChatMessageService.prefetch_representation(queryset), many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def retrieve(self, request, pk):
         """Детальный просмотр чата со всеми сообщениями"""
         chat_message_service = ChatMessageService(chat_message=self.get_object())
-        serializer = self.get_serializer(chat_message_service.get_chat(), many=True)
+        serializer = self.get_serializer(ChatMessageService.prefetch_representation(chat_message_service.get_chat()),
+                                         many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
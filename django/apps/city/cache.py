@@ -0,0 +1,4 @@
+from utils.cache import ModelCache
+
+# Список всех городов
+city_cache = ModelCache('city', backend='local')
@@ -5,6 +5,7 @@ class City(models.Model):
     """Город"""
     name = models.CharField(max_length=255, verbose_name='Название')
     order = models.PositiveIntegerField(default=0, verbose_name='Сортировка')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Время изменения')
 
     class Meta:
         verbose_name = 'Город'
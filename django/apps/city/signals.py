@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import city_cache
+from .models import City
+
+
+@receiver([post_save, post_delete], sender=City)
+def invalidate_city_cache(sender, instance: City, **kwargs):
+    city_cache.invalidate('all', 'version')
@@ -1,9 +1,9 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
 
+from utils.routers import AsyncReadRouter
 from .views import CityViewSet
 
-router = DefaultRouter()
+router = AsyncReadRouter()
 router.register('', CityViewSet, basename='cities')
 urlpatterns = [
     path('cities/', include(router.urls)),
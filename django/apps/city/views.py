@@ -1,8 +1,12 @@
+from django.db.models import Count, Max
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import viewsets
+from rest_framework.response import Response
 
+from apps.city.cache import city_cache
 from apps.city.models import City
 from apps.city.serializers import CitySerializer
+from utils.cache import ConditionalGetMixin
 
 
 @extend_schema_view(
@@ -13,6 +17,27 @@ from apps.city.serializers import CitySerializer
         summary='Детальный просмотр города',
     )
 )
-class CityViewSet(viewsets.ReadOnlyModelViewSet):
+class CityViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = City.objects.all().order_by('-order')
     serializer_class = CitySerializer
+    async_read_actions = ('list', 'retrieve')
+    conditional_actions = ('list', 'retrieve')
+
+    def get_version(self):
+        match self.action:
+            case 'list':
+                # Количество меняется при удалении города
+                version = city_cache.get_or_set('version', lambda: City.objects.aggregate(
+                    last_modified=Max('updated_at'), count=Count('id')))
+                return version['last_modified'], version['count']
+            case 'retrieve':
+                return City.objects.filter(pk=self.kwargs[self.lookup_url_kwarg or self.lookup_field]).values_list(
+                    'updated_at').first()
+
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        """Список городов из кэша, постранично"""
+        data = city_cache.get_or_set('all', lambda: self.get_serializer(self.get_queryset(), many=True).data)
+        page = self.paginate_queryset(data)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(data)
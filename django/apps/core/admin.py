@@ -0,0 +1,80 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import RequestProfile, SlowQuery
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Админ-панель профилей запросов"""
+    list_display = ('created_at', 'method', 'path', 'view', 'status_code', 'duration', 'queries', 'user')
+    list_filter = ('view',)
+    search_fields = ('path', 'view')
+    fields = ('created_at', 'user', 'method', 'path', 'view', 'status_code', 'duration', 'queries', 'stats_file',
+              'summary_text')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<int:profile_id>/stats/', self.admin_site.admin_view(self.download_stats),
+                 name='core_requestprofile_stats'),
+            *super().get_urls(),
+        ]
+
+    def download_stats(self, request, profile_id: int):
+        """Дамп pstats для просмотра, например, в snakeviz или python -m pstats"""
+        profile = get_object_or_404(RequestProfile, id=profile_id)
+        response = HttpResponse(bytes(profile.stats), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.id}.prof"'
+        return response
+
+    @admin.display(description='Дамп pstats')
+    def stats_file(self, obj: RequestProfile):
+        url = reverse('admin:core_requestprofile_stats', args=(obj.id,))
+        return format_html('<a href="{}">profile-{}.prof</a>', url, obj.id)
+
+    @admin.display(description='Самые затратные функции')
+    def summary_text(self, obj: RequestProfile):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.summary)
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Админ-панель медленных запросов"""
+    list_display = ('short_sql', 'caller', 'source', 'count', 'duration_avg_ms', 'duration_max', 'last_seen_at')
+    list_filter = ('source', 'database')
+    search_fields = ('sql', 'caller', 'source')
+    fields = ('sql_text', 'database', 'source', 'caller', 'count', 'duration_avg_ms', 'duration_max',
+              'duration_total', 'plan_text', 'plan_captured_at', 'first_seen_at', 'last_seen_at')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj: SlowQuery):
+        return obj.sql[:150]
+
+    @admin.display(description='SQL')
+    def sql_text(self, obj: SlowQuery):
+        return format_html('<pre style="white-space: pre-wrap">{}</pre>', obj.sql)
+
+    @admin.display(description='План запроса')
+    def plan_text(self, obj: SlowQuery):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.plan)
+
+    @admin.display(description='Среднее время, мс', ordering='duration_total')
+    def duration_avg_ms(self, obj: SlowQuery):
+        return round(obj.duration_avg, 2)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+    verbose_name = 'Общее'
+
+    def ready(self):
+        # Учет запросов к БД (в том числе медленных) и в процессах без QueryStatsMiddleware, например в Celery
+        from utils.db import query_stats  # noqa: F401
@@ -0,0 +1,269 @@
+import io
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.card.models import Card, CardPhoto, CardRequest, CardTag
+from apps.chat.models import ChatMessage
+from apps.city.models import City
+from apps.review.models import Review
+from apps.user.models import User
+from utils.db.slow_queries import slow_queries_disabled
+
+FIRST_NAMES = ('Александр', 'Дмитрий', 'Максим', 'Иван', 'Артем', 'Анна', 'Мария', 'Елена', 'Ольга', 'Дарья')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов', 'Новиков')
+HEADERS = ('Ищу соседа в двушку', 'Сдаю комнату', 'Ищу соседку', 'Ищу компанию снять квартиру', 'Комната у метро')
+MESSAGES = ('Здравствуйте!', 'Комната еще свободна?', 'Да, свободна', 'Когда можно посмотреть?', 'Завтра вечером',
+            'Сколько стоит коммуналка?', 'Договорились', 'Спасибо!', 'Есть ли животные?', 'Нет, животных нет')
+
+
+def parse_weights(value: str) -> dict[str, float]:
+    """Веса вида 'pending=6,approved=1,rejected=3'"""
+    try:
+        weights = {name.strip(): float(weight) for name, weight in (item.split('=') for item in value.split(','))}
+    except ValueError:
+        raise CommandError(f'Некорректные веса: {value}')
+    return weights
+
+
+class TableWriter:
+    """Строки одной таблицы, которые пишутся пачками: в Postgres - через COPY, в остальных СУБД - через executemany.
+
+    id назначаются подряд после максимального в таблице, поэтому на строки можно ссылаться до записи
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.fields = model._meta.concrete_fields
+        # Сама обертка соединения, а не прокси django.db.connection: обращение к прокси заметно медленнее
+        self.connection = connections[DEFAULT_DB_ALIAS]
+        self.auto_now_fields = {field.attname for field in self.fields
+                                if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)}
+        self.next_id = (model.objects.aggregate(max_id=Max(model._meta.pk.attname))['max_id'] or 0) + 1
+        self.first_id = self.next_id
+        self.rows = []
+        self.count = 0
+
+    def add(self, **values) -> int:
+        """Добавить строку (значения по attname, остальные - по умолчанию), вернуть ее id"""
+        row_id = values[self.model._meta.pk.attname] = self.next_id
+        self.next_id += 1
+        row = []
+        for field in self.fields:
+            value = values[field.attname] if field.attname in values else field.get_default()
+            if value is None and field.attname in self.auto_now_fields:
+                value = timezone.now() if isinstance(field, models.DateTimeField) else date.today()
+            # Строки и числа пишутся как есть (номера телефонов уже в E.164), подготовка значений полями
+            # занимает большую часть времени
+            if isinstance(value, str | int) and not isinstance(value, bool):
+                row.append(value)
+            else:
+                row.append(field.get_db_prep_save(value, self.connection))
+        self.rows.append(row)
+        return row_id
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        table = self.connection.ops.quote_name(self.model._meta.db_table)
+        columns = ', '.join(self.connection.ops.quote_name(field.column) for field in self.fields)
+        with transaction.atomic(), self.connection.cursor() as cursor:
+            if self.connection.vendor == 'postgresql':
+                data = io.StringIO(''.join('\t'.join(map(self._copy_value, row)) + '\n' for row in self.rows))
+                cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN', data)
+            else:
+                placeholders = ', '.join(['%s'] * len(self.fields))
+                cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', self.rows)  # noqa: S608
+        self.count += len(self.rows)
+        self.rows = []
+
+    @staticmethod
+    def _copy_value(value) -> str:
+        """Значение в текстовом формате COPY"""
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+class Command(BaseCommand):
+    help = ('Сгенерировать синтетические данные: пользователей, карточки с тегами, фото и сроками, заявки, '
+            'пропуски, отзывы и сообщения в чатах. Одинаковые параметры и seed дают одинаковые данные')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='Количество пользователей')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Строк в одной пачке записи')
+        parser.add_argument('--card-owners', type=float, default=0.3, help='Доля пользователей с карточками')
+        parser.add_argument('--cards-per-owner', type=float, default=1.5, help='Среднее количество карточек владельца')
+        parser.add_argument('--card-statuses', type=parse_weights, default='active=8,draft=1,completed=1',
+                            help='Веса статусов карточек')
+        parser.add_argument('--tags-per-card', type=int, default=3, help='Максимум тегов карточки')
+        parser.add_argument('--photos-per-card', type=int, default=4, help='Максимум фото карточки')
+        parser.add_argument('--requests-per-card', type=float, default=4, help='Среднее количество заявок на карточку')
+        parser.add_argument('--request-statuses', type=parse_weights, default='pending=6,approved=1,rejected=3',
+                            help='Веса статусов заявок (одобренных не больше, чем мест в карточке)')
+        parser.add_argument('--chat-probability', type=float, default=0.3, help='Доля заявок с чатом')
+        parser.add_argument('--chat-length-alpha', type=float, default=1.2,
+                            help='Параметр распределения Парето длины чата (меньше - чаще длинные чаты)')
+        parser.add_argument('--max-chat-length', type=int, default=1000)
+        parser.add_argument('--skips-per-user', type=float, default=10, help='Среднее количество пропусков карточек')
+        parser.add_argument('--reviews-per-user', type=float, default=1,
+                            help='Среднее количество отзывов о пользователе')
+
+    def handle(self, *args, **options):
+        for name, statuses in (('card-statuses', Card.Statuses), ('request-statuses', CardRequest.Statuses)):
+            weights = options[name.replace('-', '_')]
+            if set(weights) - set(statuses.values):
+                raise CommandError(f'--{name}: неизвестные статусы {", ".join(set(weights) - set(statuses.values))}')
+        if options['users'] < 2:
+            raise CommandError('Нужно хотя бы 2 пользователя.')
+
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        started_at = time.monotonic()
+        # Пачки пишутся от родительских таблиц к дочерним, чтобы внешние ключи ссылались на записанные строки
+        self.writers = {model: TableWriter(model) for model in (
+            User, Card, Card.tags.through, CardPhoto, CardRequest, ChatMessage, Card.user_skips.through, Review,
+        )}
+        with slow_queries_disabled():
+            city_ids, tag_ids = self._get_dictionaries()
+            self._stage('Пользователи', self._create_users)
+            self._stage('Карточки, заявки и чаты', lambda: self._create_cards(city_ids, tag_ids))
+            self._stage('Пропуски и отзывы', self._create_skips_and_reviews)
+            self._reset_sequences()
+
+        for model, writer in self.writers.items():
+            self.stdout.write(f'{model._meta.db_table}: {writer.count}')
+        self.stdout.write(self.style.SUCCESS(f'Готово за {time.monotonic() - started_at:.0f} с'))
+
+    def _stage(self, name: str, create) -> None:
+        started_at = time.monotonic()
+        create()
+        self._flush()
+        self.stdout.write(f'{name}: {time.monotonic() - started_at:.0f} с')
+
+    def _add(self, model, **values) -> int:
+        writer = self.writers[model]
+        row_id = writer.add(**values)
+        if len(writer.rows) >= self.options['chunk_size']:
+            self._flush()
+        return row_id
+
+    def _flush(self) -> None:
+        for writer in self.writers.values():
+            writer.flush()
+
+    def _count(self, mean: float) -> int:
+        """Случайное количество с экспоненциальным распределением и средним mean"""
+        return round(self.rng.expovariate(1 / mean)) if mean > 0 else 0
+
+    def _choice(self, weights: dict[str, float]) -> str:
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _random_datetime(self, days: int) -> datetime:
+        return self.now - timedelta(seconds=self.rng.randint(0, days * 24 * 60 * 60))
+
+    def _get_dictionaries(self) -> tuple[list[int], list[int]]:
+        """id городов и тегов, при пустых справочниках - созданных"""
+        if not City.objects.exists():
+            City.objects.bulk_create([City(name=f'Город {index}', order=index) for index in range(20)])
+        if not CardTag.objects.exists():
+            CardTag.objects.bulk_create([CardTag(name=f'Тег {index}', order=index) for index in range(20)])
+        return list(City.objects.values_list('id', flat=True)), list(CardTag.objects.values_list('id', flat=True))
+
+    def _create_users(self) -> None:
+        rng = self.rng
+        self.user_ids = range(self.writers[User].next_id, self.writers[User].next_id + self.options['users'])
+        for user_id in self.user_ids:
+            date_joined = self._random_datetime(days=3 * 365)
+            self._add(
+                User, phone_number=f'+7955{user_id:07d}', password=UNUSABLE_PASSWORD_PREFIX,
+                first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                gender=rng.choice(User.Genders.values), dob=date(rng.randint(1970, 2006), rng.randint(1, 12), 1),
+                about_me='Не курю, работаю удаленно. ' * rng.randint(0, 5), date_joined=date_joined,
+                # Часть пользователей не закончила регистрацию
+                datetime_consent_to_processing_of_personal_data=date_joined if rng.random() < 0.9 else None,
+            )
+
+    def _create_cards(self, city_ids: list[int], tag_ids: list[int]) -> None:
+        rng, options = self.rng, self.options
+        for owner_id in self.user_ids:
+            if rng.random() >= options['card_owners']:
+                continue
+            for _ in range(max(1, self._count(options['cards_per_owner']))):
+                limit = rng.randint(1, 5)
+                card_id = self._add(
+                    Card, owner_id=owner_id, header=rng.choice(HEADERS), city_id=rng.choice(city_ids), limit=limit,
+                    description='Светлая комната, рядом метро и парк. ' * rng.randint(1, 20),
+                    created_at=self._random_datetime(days=365).date(),
+                    deadline=self.now.date() + timedelta(days=rng.randint(-30, 120)) if rng.random() < 0.7 else None,
+                    status=self._choice(options['card_statuses']),
+                )
+                for tag_id in rng.sample(tag_ids, min(rng.randint(0, options['tags_per_card']), len(tag_ids))):
+                    self._add(Card.tags.through, card_id=card_id, cardtag_id=tag_id)
+                for index in range(rng.randint(0, options['photos_per_card'])):
+                    content_hash = f'{rng.getrandbits(256):064x}'
+                    self._add(CardPhoto, card_id=card_id, width=1280, height=960, content_hash=content_hash,
+                              photo=f'cards/photos/{content_hash[:2]}/{card_id}-{index}.jpg')
+                self._create_requests(card_id, owner_id, limit)
+
+    def _create_requests(self, card_id: int, owner_id: int, limit: int) -> None:
+        rng, options = self.rng, self.options
+        count = min(self._count(options['requests_per_card']), len(self.user_ids) - 1)
+        free_places = limit
+        applicant_ids = [user_id for user_id in rng.sample(self.user_ids, count + 1) if user_id != owner_id]
+        for user_id in applicant_ids[:count]:
+            status = self._choice(options['request_statuses'])
+            if status == CardRequest.Statuses.APPROVED:
+                if free_places:
+                    free_places -= 1
+                else:
+                    status = CardRequest.Statuses.REJECTED
+            self._add(CardRequest, user_id=user_id, card_id=card_id, status=status,
+                      covering_letter='Здравствуйте! Хочу снять комнату. ' * rng.randint(0, 3))
+            if rng.random() < options['chat_probability']:
+                self._create_chat(card_id, owner_id, user_id)
+
+    def _create_chat(self, card_id: int, owner_id: int, user_id: int) -> None:
+        """Чат автора заявки с владельцем карточки. Длина - по распределению Парето: в основном короткие чаты
+        и редкие очень длинные
+        """
+        rng = self.rng
+        length = min(int(rng.paretovariate(self.options['chat_length_alpha'])), self.options['max_chat_length'])
+        created_at = self._random_datetime(days=180)
+        sender_id, receiver_id = user_id, owner_id
+        for _ in range(length):
+            self._add(ChatMessage, sender_id=sender_id, receiver_id=receiver_id, card_id=card_id,
+                      content=rng.choice(MESSAGES), created_at=created_at)
+            created_at += timedelta(seconds=rng.randint(5, 6 * 60 * 60))
+            if rng.random() < 0.7:
+                sender_id, receiver_id = receiver_id, sender_id
+
+    def _create_skips_and_reviews(self) -> None:
+        rng, options = self.rng, self.options
+        card_ids = range(self.writers[Card].first_id, self.writers[Card].next_id)
+        for user_id in self.user_ids:
+            for card_id in rng.sample(card_ids, min(self._count(options['skips_per_user']), len(card_ids))):
+                self._add(Card.user_skips.through, card_id=card_id, user_id=user_id)
+            for _ in range(self._count(options['reviews_per_user'])):
+                author_id = rng.choice(self.user_ids)
+                if author_id != user_id:
+                    self._add(Review, author_id=author_id, target_user_id=user_id, points=rng.randint(1, 5),
+                              text='Аккуратный и спокойный сосед. ' * rng.randint(1, 4),
+                              created_at=self._random_datetime(days=365).date())
+
+    def _reset_sequences(self) -> None:
+        """Сдвинуть последовательности id после вставки с явными id"""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), list(self.writers)):
+                cursor.execute(sql)
@@ -0,0 +1,99 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Модули, которые должны загружаться только при первом использовании, а не при запуске воркера.
+# Воркер Celery при запуске выполняет проверки Django, а проверка ImageField импортирует Pillow
+LAZY_MODULES = {
+    'web': ('matplotlib', 'numpy', 'PIL', 'boto3', 'debug_toolbar'),
+    'celery': ('matplotlib', 'numpy', 'boto3', 'debug_toolbar'),
+}
+
+# Выполняется в отдельном процессе: загружает то же, что воркер gunicorn или Celery при запуске
+STARTUP_SCRIPT = '''
+import json
+import resource
+import sys
+
+import django
+
+django.setup()
+
+if sys.argv[1] == 'web':
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+else:
+    from project.celery import app
+    app.loader.import_default_modules()
+
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+try:
+    with open('/proc/self/status') as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+except OSError:
+    pass
+print(json.dumps({'rss_kb': rss_kb, 'modules': sorted(sys.modules)}))
+'''
+
+IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+class Command(BaseCommand):
+    help = 'Показать время импорта модулей и потребление памяти (RSS) нового воркера после запуска'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--worker', choices=LAZY_MODULES, default='web', help='Тип воркера')
+        parser.add_argument('--limit', type=int, default=20, help='Сколько самых долгих импортов показать')
+        parser.add_argument('--max-rss', type=int, help='Завершиться с ошибкой, если RSS больше (МБ)')
+        parser.add_argument('--max-time', type=int, help='Завершиться с ошибкой, если запуск дольше (мс)')
+        parser.add_argument('--allow', nargs='*', default=[],
+                            help='Разрешить загрузку при запуске модулей, которые должны загружаться лениво')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        started_at = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT, options['worker']],
+                                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        if result.returncode:
+            raise CommandError(f'Не удалось запустить воркер:\n{result.stderr[-2000:]}')
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+
+        top_level, by_self_time = [], []
+        for line in result.stderr.splitlines():
+            match = IMPORT_TIME_RE.match(line)
+            if not match:
+                continue
+            self_us, cumulative_us, indent, module = int(match[1]), int(match[2]), match[3], match[4]
+            by_self_time.append((self_us, module))
+            if len(indent) == 1:
+                top_level.append((cumulative_us, module))
+
+        self.stdout.write('Импорты верхнего уровня (с вложенными), мс:')
+        for cumulative_us, module in sorted(top_level, reverse=True)[:options['limit']]:
+            self.stdout.write(f'{cumulative_us / 1000:10.1f}  {module}')
+        self.stdout.write('\nСобственное время импорта модуля, мс:')
+        for self_us, module in sorted(by_self_time, reverse=True)[:options['limit']]:
+            self.stdout.write(f'{self_us / 1000:10.1f}  {module}')
+
+        rss_mb = report['rss_kb'] / 1024
+        self.stdout.write(f'\nЗапуск: {elapsed_ms:.0f} мс, модулей: {len(report["modules"])}, RSS: {rss_mb:.1f} МБ')
+
+        errors = []
+        loaded_lazy_modules = [m for m in LAZY_MODULES[options['worker']]
+                               if m in report['modules'] and m not in options['allow']]
+        if loaded_lazy_modules:
+            errors.append(f'При запуске загружены модули: {", ".join(loaded_lazy_modules)}')
+        if options['max_rss'] and rss_mb > options['max_rss']:
+            errors.append(f'RSS {rss_mb:.1f} МБ больше {options["max_rss"]} МБ')
+        if options['max_time'] and elapsed_ms > options['max_time']:
+            errors.append(f'Запуск {elapsed_ms:.0f} мс дольше {options["max_time"]} мс')
+        if errors:
+            raise CommandError('\n'.join(errors))
+        self.stdout.write(self.style.SUCCESS('Ок'))
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.23 on 2026-10-19 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=32, unique=True, verbose_name='Отпечаток SQL')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('params', models.JSONField(blank=True, null=True, verbose_name='Параметры последнего примера')),
+                ('database', models.CharField(max_length=100, verbose_name='БД')),
+                ('source', models.CharField(blank=True, max_length=255, verbose_name='Представление или задача')),
+                ('caller', models.CharField(blank=True, max_length=500, verbose_name='Место вызова')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+                ('duration_total', models.FloatField(default=0, verbose_name='Общее время, мс')),
+                ('duration_max', models.FloatField(default=0, verbose_name='Максимальное время, мс')),
+                ('plan', models.TextField(blank=True, verbose_name='План запроса')),
+                ('plan_captured_at', models.DateTimeField(blank=True, null=True, verbose_name='Время снятия плана')),
+                ('first_seen_at', models.DateTimeField(auto_now_add=True, verbose_name='Впервые')),
+                ('last_seen_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='Последний раз')),
+            ],
+            options={
+                'verbose_name': 'Медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ('-last_seen_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.23 on 2026-10-19 16:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_slowquery'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='slowquery',
+            name='params',
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import models
+
+from apps.user.models import User
+
+
+class RequestProfile(models.Model):
+    """Профиль выполнения запроса (cProfile), снятый по запросу сотрудника (utils.profiling)"""
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+',
+                             verbose_name='Пользователь')
+    method = models.CharField(max_length=10, verbose_name='Метод')
+    path = models.TextField(verbose_name='Адрес')
+    view = models.CharField(max_length=255, verbose_name='Представление')
+    status_code = models.PositiveSmallIntegerField(verbose_name='Код ответа')
+    duration = models.FloatField(verbose_name='Время, мс')
+    queries = models.PositiveIntegerField(null=True, blank=True, verbose_name='Запросов к БД')
+    summary = models.TextField(verbose_name='Самые затратные функции')
+    stats = models.BinaryField(verbose_name='Дамп pstats')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Время создания')
+
+    class Meta:
+        verbose_name = 'Профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+        ordering = ('-created_at',)
+
+    def __str__(self):
+        return f'{self.method} {self.path} {self.duration:.0f} мс'
+
+
+class SlowQuery(models.Model):
+    """Медленный запрос к БД (utils.db.slow_queries). Одинаковые запросы с разными параметрами
+    объединяются по отпечатку SQL, план (EXPLAIN без ANALYZE) снимается для последнего примера.
+    Хранится только SQL с плейсхолдерами: параметры могут содержать персональные данные
+    """
+    fingerprint = models.CharField(max_length=32, unique=True, verbose_name='Отпечаток SQL')
+    sql = models.TextField(verbose_name='SQL')
+    database = models.CharField(max_length=100, verbose_name='БД')
+    source = models.CharField(max_length=255, blank=True, verbose_name='Представление или задача')
+    caller = models.CharField(max_length=500, blank=True, verbose_name='Место вызова')
+    count = models.PositiveIntegerField(default=0, verbose_name='Количество')
+    duration_total = models.FloatField(default=0, verbose_name='Общее время, мс')
+    duration_max = models.FloatField(default=0, verbose_name='Максимальное время, мс')
+    plan = models.TextField(blank=True, verbose_name='План запроса')
+    plan_captured_at = models.DateTimeField(null=True, blank=True, verbose_name='Время снятия плана')
+    first_seen_at = models.DateTimeField(auto_now_add=True, verbose_name='Впервые')
+    last_seen_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Последний раз')
+
+    class Meta:
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+        ordering = ('-last_seen_at',)
+
+    def __str__(self):
+        return f'{self.caller or self.source} {self.duration_max:.0f} мс'
+
+    @property
+    def duration_avg(self) -> float:
+        return self.duration_total / self.count if self.count else 0
@@ -0,0 +1,61 @@
+import hashlib
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+
+class SlowQueryService:
+    """Сервис для журнала медленных запросов"""
+
+    @staticmethod
+    def get_fingerprint(sql: str) -> str:
+        """Отпечаток SQL: списки параметров любой длины (IN (%s, %s, ...)) считаются одинаковыми"""
+        normalized = re.sub(r'%s(?:\s*,\s*%s)+', '%s', ' '.join(sql.split()))
+        return hashlib.md5(normalized.encode(), usedforsecurity=False).hexdigest()
+
+    @classmethod
+    def record(cls, database: str, sql: str, params, duration: float, source: str, caller: str) -> SlowQuery:
+        """Учесть медленный запрос (duration - в миллисекундах) и снять план, если его еще нет или он устарел.
+        Параметры нужны только для плана и не сохраняются
+        """
+        fingerprint = cls.get_fingerprint(sql)
+        slow_query, created = SlowQuery.objects.get_or_create(fingerprint=fingerprint, defaults={
+            'sql': sql, 'database': database, 'source': source, 'caller': caller,
+            'count': 1, 'duration_total': duration, 'duration_max': duration,
+        })
+        if not created:
+            SlowQuery.objects.filter(id=slow_query.id).update(
+                sql=sql, database=database, source=source, caller=caller,
+                count=F('count') + 1, duration_total=F('duration_total') + duration,
+                duration_max=Greatest('duration_max', duration), last_seen_at=timezone.now(),
+            )
+            slow_query.refresh_from_db()
+
+        plan_expires_at = timezone.now() - timedelta(seconds=settings.SLOW_QUERY_PLAN_TIMEOUT)
+        is_plan_expired = slow_query.plan_captured_at is None or slow_query.plan_captured_at < plan_expires_at
+        if params is not None and is_plan_expired:
+            cls.capture_plan(slow_query, params)
+        return slow_query
+
+    @staticmethod
+    def capture_plan(slow_query: SlowQuery, params) -> None:
+        """Снять план запроса с параметрами последнего примера (без выполнения, только SELECT)"""
+        if not slow_query.sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return
+        connection = connections[slow_query.database]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'{connection.ops.explain_query_prefix()} {slow_query.sql}', params)
+                plan = '\n'.join(' '.join(map(str, row)) for row in cursor.fetchall())
+        except DatabaseError as error:
+            plan = f'Не удалось снять план: {error}'
+        slow_query.plan = plan
+        slow_query.plan_captured_at = timezone.now()
+        slow_query.save(update_fields=['plan', 'plan_captured_at'])
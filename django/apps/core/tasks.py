@@ -0,0 +1,12 @@
+from celery import shared_task
+
+from utils.db.slow_queries import slow_queries_disabled
+
+
+@shared_task
+def record_slow_query(database: str, sql: str, params, duration: float, source: str, caller: str) -> None:
+    """Записать медленный запрос в журнал и снять его план"""
+    from .services import SlowQueryService
+
+    with slow_queries_disabled():
+        SlowQueryService.record(database, sql, params, duration, source, caller)
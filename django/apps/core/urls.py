@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import CacheStatsView, DatabasePoolStatsView, QueryStatsView
+
+urlpatterns = [
+    path('health/db-pool/', DatabasePoolStatsView.as_view(), name='db_pool_stats'),
+    path('health/cache/', CacheStatsView.as_view(), name='cache_stats'),
+    path('health/db-queries/', QueryStatsView.as_view(), name='db_query_stats'),
+]
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.views import View
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from prometheus_client import CONTENT_TYPE_LATEST
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from utils.cache import ModelCache
+from utils.db.pool import get_pools_stats
+from utils.db.query_stats import action_query_stats
+from utils.metrics import get_metrics
+
+
+class DatabasePoolStatsView(APIView):
+    """Статистика соединений с БД процесса, который обработал запрос"""
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(summary='Статистика соединений с БД', responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        return Response(get_pools_stats())
+
+
+class CacheStatsView(APIView):
+    """Попадания в кэш моделей и в уровни двухуровневого кэша в процессе, который обработал запрос"""
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(summary='Статистика кэша', responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        return Response({
+            'models': {name: model_cache.get_stats() for name, model_cache in ModelCache.registry.items()},
+            'tiers': {alias: caches[alias].get_stats() for alias in settings.CACHES
+                      if hasattr(caches[alias], 'get_stats')},
+        })
+
+
+class QueryStatsView(APIView):
+    """Запросы к БД по действиям представлений в процессе, который обработал запрос"""
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(summary='Статистика запросов к БД', responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        return Response(action_query_stats.get_stats())
+
+
+class MetricsView(View):
+    """Метрики Prometheus всех воркеров. Снаружи закрыт в nginx, Prometheus обращается к Django напрямую"""
+
+    def get(self, request):
+        return HttpResponse(get_metrics(), content_type=CONTENT_TYPE_LATEST)
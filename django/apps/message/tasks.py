@@ -1,15 +1,11 @@
-import time
-
 import requests
 from celery import shared_task
 
 
-@shared_task()
-def send_message(url: str, headers: dict = None, json_data: dict = None):
-    retries = 5
-    for _ in range(retries):
-        response = requests.post(url, headers=headers, json=json_data)
-        if response.status_code != 500:
-            return response.status_code
-        time.sleep(2)
-    return 500
+@shared_task(bind=True, max_retries=4, default_retry_delay=2)
+def send_message(self, url: str, headers: dict = None, json_data: dict = None):
+    # Повтор через Celery, а не в цикле: воркер не занят ожиданием, а повторы видны в метриках
+    response = requests.post(url, headers=headers, json=json_data)
+    if response.status_code == 500:
+        raise self.retry()
+    return response.status_code
@@ -1,8 +1,9 @@
 from _decimal import Decimal
 from django.db import transaction
-from django.db.models import Q, QuerySet, Avg
+from django.db.models import Prefetch, Q, QuerySet, Avg
 
 from apps.card.models import Card, CardRequest
+from apps.user.models import User
 from .exceptions import ReviewActionError
 from .models import Review
 
@@ -26,9 +27,23 @@ class ReviewService:
         review = Review.objects.create(**review_data)
         return review
 
+    @staticmethod
+    def prefetch_representation(queryset: QuerySet[Review]) -> QuerySet[Review]:
+        """Загрузить авторов и пользователей отзывов для их представления запросами на все отзывы сразу"""
+        users = ReviewService.annotate_average_points(User.objects.all())
+        return queryset.prefetch_related(Prefetch('author', queryset=users), Prefetch('target_user', queryset=users))
+
     @staticmethod
     def get_average_points(queryset: QuerySet[Review]) -> Decimal | None:
         """Получить среднюю оценку пользователя"""
-        value = queryset.aggregate(average_points=Avg('points'))['average_points']
+        return ReviewService.round_average_points(queryset.aggregate(average_points=Avg('points'))['average_points'])
+
+    @staticmethod
+    def round_average_points(value: float | None) -> Decimal | None:
         if value:
             return Decimal(value).quantize(Decimal('0.01'))
+
+    @staticmethod
+    def annotate_average_points(queryset: QuerySet[User]) -> QuerySet[User]:
+        """Посчитать среднюю оценку пользователей (average_points) в том же запросе, а не запросом на каждого"""
+        return queryset.annotate(average_points=Avg('onme_reviews__points'))
@@ -5,6 +5,7 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from utils.db.replicas import ReplicaReadMixin
 from .exceptions import ReviewActionError
 from .models import Review
 from .serializers import CreateReviewSerializer, DetailReviewSerializer, UserListReviewSerializer
@@ -23,11 +24,20 @@ from ..user.permissions import IsFullRegistered
         responses={201: DetailReviewSerializer}
     ),
 )
-class ReviewViewSet(viewsets.GenericViewSet):
+class ReviewViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
     """ViewSet для отзывов"""
     queryset = Review.objects.all().order_by('-created_at')
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['target_user']
+    replica_read_actions = ('list',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        match self.action:
+            case 'list':
+                return ReviewService.prefetch_representation(queryset)
+            case _:
+                return queryset
 
     def get_serializer_class(self):
         match self.action:
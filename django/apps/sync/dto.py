@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ChangesDTO:
+    """Измененные и удаленные объекты одного типа"""
+    updated: list = field(default_factory=list)
+    deleted: list[int] = field(default_factory=list)
+
+
+@dataclass
+class SyncDTO:
+    """Изменения с курсора синхронизации
+
+    reset - курсор устарел (журнал за это время уже очищен) или не передан: данные нужно загрузить заново
+    через списки, а потом синхронизироваться с нового курсора
+    """
+    cursor: int
+    has_more: bool
+    reset: bool
+    cards: ChangesDTO = field(default_factory=ChangesDTO)
+    card_requests: ChangesDTO = field(default_factory=ChangesDTO)
+    chat_messages: ChangesDTO = field(default_factory=ChangesDTO)
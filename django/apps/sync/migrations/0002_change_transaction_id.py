@@ -0,0 +1,31 @@
+# Generated by Django 3.2.23 on 2026-10-19 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='change',
+            name='sync_change_user_id_55f3b4_idx',
+        ),
+        migrations.AddField(
+            model_name='change',
+            name='transaction_id',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Номер транзакции'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['user', 'transaction_id'], name='sync_change_user_id_9c2b5e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['transaction_id'], name='sync_change_transac_f8d01c_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import models
+from django.utils import timezone
+
+from apps.user.models import User
+
+
+class Change(models.Model):
+    """Изменение объекта в журнале изменений для синхронизации клиентов.
+    Курсор синхронизации - номер транзакции, которая внесла изменение (см. ChangeLogService)
+    """
+
+    class Types(models.TextChoices):
+        """Тип объекта"""
+        CARD = 'card', 'Карточка'
+        CARD_REQUEST = 'card_request', 'Заявка на карточку'
+        CHAT_MESSAGE = 'chat_message', 'Сообщение в чате'
+
+    type = models.CharField(max_length=20, verbose_name='Тип объекта', choices=Types.choices)
+    object_id = models.PositiveBigIntegerField(verbose_name='ID объекта')
+    is_deleted = models.BooleanField(default=False, verbose_name='Объект удален')
+    transaction_id = models.BigIntegerField(editable=False, verbose_name='Номер транзакции')
+    # Без внешнего ключа в БД: изменения пишутся и при каскадном удалении самого пользователя.
+    # Отдельный индекс не нужен, есть составной (user, transaction_id)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True,
+                             related_name='+', verbose_name='Пользователь (если None, то изменение видят все)')
+    created_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name='Время изменения')
+
+    class Meta:
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Журнал изменений'
+        indexes = [models.Index(fields=['user', 'transaction_id']), models.Index(fields=['transaction_id'])]
+
+    def __str__(self):
+        return f'{self.id} {self.type} {self.object_id}{" (удален)" if self.is_deleted else ""}'
@@ -0,0 +1,59 @@
+from rest_framework import serializers
+
+from ..card.models import CardRequest
+from ..card.serializers import ShortCardSerializer
+from ..chat.models import ChatMessage
+from ..user.serializers import ShortUserSerializer
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    """Параметры синхронизации"""
+    cursor = serializers.IntegerField(min_value=0, required=False,
+                                      help_text='Курсор из предыдущего ответа (без курсора - начать синхронизацию)')
+
+
+class SyncCardRequestSerializer(serializers.ModelSerializer):
+    """Заявка на карточку для синхронизации"""
+    user = ShortUserSerializer()
+
+    class Meta:
+        model = CardRequest
+        fields = ('id', 'user', 'card', 'status', 'roommates_number', 'covering_letter')
+
+
+class SyncChatMessageSerializer(serializers.ModelSerializer):
+    """Сообщение в чате для синхронизации"""
+    is_system = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChatMessage
+        fields = ('id', 'sender', 'receiver', 'card', 'content', 'created_at', 'is_system')
+
+    def get_is_system(self, instance: ChatMessage) -> bool:
+        return instance.is_system
+
+
+class CardChangesSerializer(serializers.Serializer):
+    updated = ShortCardSerializer(many=True)
+    deleted = serializers.ListField(child=serializers.IntegerField())
+
+
+class CardRequestChangesSerializer(serializers.Serializer):
+    updated = SyncCardRequestSerializer(many=True)
+    deleted = serializers.ListField(child=serializers.IntegerField())
+
+
+class ChatMessageChangesSerializer(serializers.Serializer):
+    updated = SyncChatMessageSerializer(many=True)
+    deleted = serializers.ListField(child=serializers.IntegerField())
+
+
+class SyncSerializer(serializers.Serializer):
+    """Изменения с курсора синхронизации"""
+    cursor = serializers.IntegerField(help_text='Курсор для следующей синхронизации')
+    has_more = serializers.BooleanField(help_text='Есть еще изменения: синхронизироваться сразу с нового курсора')
+    reset = serializers.BooleanField(help_text='Курсор устарел или не передан: загрузить данные заново через '
+                                               'списки и синхронизироваться с нового курсора')
+    cards = CardChangesSerializer()
+    card_requests = CardRequestChangesSerializer()
+    chat_messages = ChatMessageChangesSerializer()
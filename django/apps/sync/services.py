@@ -0,0 +1,150 @@
+from collections.abc import Iterable
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BigIntegerField, Func, Max, Min, Prefetch, Q
+from django.utils import timezone
+
+from .dto import ChangesDTO, SyncDTO
+from .models import Change
+from ..card.models import Card, CardRequest
+from ..card.services import CardService
+from ..chat.models import ChatMessage
+from ..review.services import ReviewService
+from ..user.models import User
+
+
+class CurrentTransactionId(Func):
+    """Номер текущей транзакции: в Postgres - ее xid. В остальных СУБД (SQLite) запись идет под блокировкой
+    всей БД до коммита, поэтому номер - следующий после максимального в журнале
+    """
+    output_field = BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        table = connection.ops.quote_name(Change._meta.db_table)
+        return f'(SELECT COALESCE(MAX(transaction_id), 0) + 1 FROM {table})', []  # noqa: S608
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return 'pg_current_xact_id()::text::bigint', []
+
+
+class ChangeLogService:
+    """Сервис для журнала изменений
+
+    Изменения пишутся в той же транзакции, что и сами объекты, с номером этой транзакции. Номера выдаются
+    при начале записи, а видны изменения после коммита, поэтому читаются только транзакции с номерами меньше
+    границы, до которой все транзакции уже завершены (xmin снимка в Postgres). Курсор - номер, с которого
+    начинаются еще не полученные транзакции
+    """
+
+    @staticmethod
+    def record(change_type: Change.Types, object_ids: Iterable[int], user_ids: Iterable[int | None] = (None,),
+               is_deleted: bool = False) -> None:
+        """Записать изменения объектов, которые видят пользователи user_ids (None - все пользователи)"""
+        now = timezone.now()
+        Change.objects.bulk_create([
+            Change(type=change_type, object_id=object_id, user_id=user_id, is_deleted=is_deleted, created_at=now,
+                   transaction_id=CurrentTransactionId())
+            for object_id in object_ids for user_id in set(user_ids)
+        ])
+
+    @staticmethod
+    def get_completed_boundary() -> int | None:
+        """Номер, меньше которого все транзакции завершены: изменения с меньшими номерами уже не появятся.
+        None - граница не нужна (SQLite: транзакции пишут по очереди)
+        """
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+            return cursor.fetchone()[0]
+
+    @classmethod
+    def get_latest_cursor(cls) -> int:
+        boundary = cls.get_completed_boundary()
+        if boundary is not None:
+            return boundary
+        return (Change.objects.aggregate(latest=Max('transaction_id'))['latest'] or 0) + 1
+
+    @classmethod
+    def get_changes(cls, user: User, cursor: int | None) -> SyncDTO:
+        """Получить изменения, которые видит пользователь, после курсора"""
+        # Изменения старше самой ранней оставшейся транзакции удалены (см. delete_old_changes)
+        oldest = Change.objects.aggregate(oldest=Min('transaction_id'))['oldest']
+        if cursor is None or (oldest is not None and cursor < oldest):
+            return SyncDTO(cursor=cls.get_latest_cursor(), has_more=False, reset=True)
+
+        # Граница снимается до чтения изменений: все транзакции до нее будут видны и этому запросу
+        boundary = cls.get_completed_boundary()
+        queryset = Change.objects.filter(Q(user__isnull=True) | Q(user=user), transaction_id__gte=cursor)
+        if boundary is not None:
+            queryset = queryset.filter(transaction_id__lt=boundary)
+        queryset = queryset.order_by('transaction_id', 'id').values_list('transaction_id', 'type', 'object_id',
+                                                                         'is_deleted')
+        changes = list(queryset[:settings.SYNC_PAGE_SIZE + 1])
+        has_more = len(changes) > settings.SYNC_PAGE_SIZE
+        if has_more:
+            # Курсор сдвигается только на границу транзакций: транзакция, которая не поместилась, - на следующей
+            # странице, а если она одна больше страницы - отдается целиком
+            last_transaction_id = changes[settings.SYNC_PAGE_SIZE][0]
+            changes = [change for change in changes if change[0] != last_transaction_id] or list(
+                queryset.filter(transaction_id=last_transaction_id))
+            next_cursor = changes[-1][0] + 1
+        elif boundary is not None:
+            next_cursor = max(cursor, boundary)
+        else:
+            next_cursor = changes[-1][0] + 1 if changes else cursor
+
+        # Последнее состояние каждого объекта
+        is_deleted_by_object: dict[tuple[str, int], bool] = {}
+        for _, change_type, object_id, is_deleted in changes:
+            is_deleted_by_object[change_type, object_id] = is_deleted
+
+        def get_ids(change_type: Change.Types, is_deleted: bool) -> list[int]:
+            return [object_id for (object_type, object_id), deleted in is_deleted_by_object.items()
+                    if object_type == change_type and deleted == is_deleted]
+
+        return SyncDTO(
+            cursor=next_cursor,
+            has_more=has_more,
+            reset=False,
+            cards=cls._get_objects_changes(
+                CardService.prefetch_representation(Card.objects.all()),
+                get_ids(Change.Types.CARD, False), get_ids(Change.Types.CARD, True),
+                # Чужие неактивные карточки пропадают из ленты
+                is_visible=lambda card: card.status == Card.Statuses.ACTIVE or card.owner_id == user.id,
+            ),
+            card_requests=cls._get_objects_changes(
+                CardRequest.objects.prefetch_related(
+                    Prefetch('user', queryset=ReviewService.annotate_average_points(User.objects.all()))),
+                get_ids(Change.Types.CARD_REQUEST, False), get_ids(Change.Types.CARD_REQUEST, True),
+            ),
+            chat_messages=cls._get_objects_changes(
+                ChatMessage.objects.all(),
+                get_ids(Change.Types.CHAT_MESSAGE, False), get_ids(Change.Types.CHAT_MESSAGE, True),
+            ),
+        )
+
+    @staticmethod
+    def _get_objects_changes(queryset, updated_ids: list[int], deleted_ids: list[int],
+                             is_visible=lambda instance: True) -> ChangesDTO:
+        objects = queryset.filter(id__in=updated_ids).order_by('id') if updated_ids else []
+        updated = [instance for instance in objects if is_visible(instance)]
+        visible_ids = {instance.id for instance in updated}
+        # Объекты, удаленные после записи изменения, и недоступные пользователю - тоже удаленные для него
+        deleted = deleted_ids + [object_id for object_id in updated_ids if object_id not in visible_ids]
+        return ChangesDTO(updated=updated, deleted=deleted)
+
+    @staticmethod
+    def delete_old_changes() -> int:
+        """Удалить изменения старше SYNC_CHANGES_RETENTION дней.
+        Изменения последней из старых транзакций остаются, чтобы по ним определять устаревшие курсоры
+        """
+        threshold = timezone.now() - timedelta(days=settings.SYNC_CHANGES_RETENTION)
+        old_changes = Change.objects.filter(created_at__lt=threshold)
+        latest = old_changes.aggregate(latest=Max('transaction_id'))['latest']
+        if latest is None:
+            return 0
+        deleted, _ = old_changes.filter(transaction_id__lt=latest).delete()
+        return deleted
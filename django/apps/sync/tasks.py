@@ -0,0 +1,9 @@
+from celery import shared_task
+
+
+@shared_task
+def delete_old_changes() -> None:
+    """Удалить старые записи журнала изменений"""
+    from .services import ChangeLogService
+
+    ChangeLogService.delete_old_changes()
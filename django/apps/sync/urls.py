@@ -0,0 +1,11 @@
+from django.urls import include, path
+
+from utils.routers import AsyncReadRouter
+
+from .views import SyncViewSet
+
+router = AsyncReadRouter()
+router.register('', SyncViewSet, basename='sync')
+urlpatterns = [
+    path('sync/', include(router.urls)),
+]
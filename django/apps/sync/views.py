@@ -0,0 +1,31 @@
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from rest_framework import status, viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .serializers import SyncQuerySerializer, SyncSerializer
+from .services import ChangeLogService
+from ..user.permissions import IsFullRegistered
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary='Изменения карточек, заявок и сообщений с курсора синхронизации',
+        parameters=[SyncQuerySerializer],
+        responses={200: SyncSerializer}
+    ),
+)
+class SyncViewSet(viewsets.GenericViewSet):
+    """ViewSet для синхронизации клиентов. Журнал читается из основной БД: реплика может отставать от курсора"""
+    async_read_actions = ('list',)
+    permission_classes = (IsAuthenticated, IsFullRegistered)
+    serializer_class = SyncSerializer
+    pagination_class = None
+
+    def list(self, request):  # noqa: A003
+        """Карточки, заявки и сообщения, созданные, измененные или удаленные после курсора"""
+        query_serializer = SyncQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        changes = ChangeLogService.get_changes(user=request.user, cursor=query_serializer.validated_data.get('cursor'))
+        serializer = self.get_serializer(changes)
+        return Response(serializer.data, status=status.HTTP_200_OK)
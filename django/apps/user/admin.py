@@ -1,9 +1,15 @@
 from django.contrib import admin
 
 from .models import User
+from .services import UserService
 
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     """Админ-панель пользователей"""
-    pass
+    actions = ['revoke_tokens']
+
+    @admin.action(description='Отозвать токены')
+    def revoke_tokens(self, request, queryset):
+        for user in queryset:
+            UserService(user).revoke_tokens()
@@ -5,3 +5,13 @@ class UserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.user'
     verbose_name = 'Пользователь'
+
+    def ready(self):
+        from utils.media import register_media_owner
+
+        from . import signals  # noqa: F401
+        from .models import User
+
+        # Оригинал аватарки не отдается: в нем может быть EXIF
+        register_media_owner(User, ('avatar_preview', 'avatar_thumbnail', 'avatar_feed', 'avatar_full'),
+                             lambda queryset: queryset.filter(is_active=True))
@@ -0,0 +1,48 @@
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import UserAuthCache
+from .models import User
+from .tokens import TOKEN_VERSION_CLAIM
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация, получающая пользователя из кэша вместо запроса в БД"""
+
+    def get_user(self, validated_token: Token) -> User:
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        # В токенах, выданных до появления версии, ее нет
+        token_version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+        user = UserAuthCache.get(user_id, token_version)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            UserAuthCache.set(user)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if user.token_version != token_version:
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+
+        if api_settings.CHECK_REVOKE_TOKEN and \
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Описание CachedJWTAuthentication в схеме API (как у JWTAuthentication)"""
+    target_class = CachedJWTAuthentication
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from utils.cache import ModelCache
+
+from .models import User
+
+# Профиль пользователя для других пользователей (RetrieveUserSerializer)
+user_profile_cache = ModelCache('user_profile')
+
+
+class UserAuthCache:
+    """Кэш пользователей для JWT-аутентификации
+
+    Двухуровневый (кэш процесса + Redis, см. utils.cache_backends.TwoTierCache). Ключ - id пользователя
+    и версия его токенов (User.token_version), поэтому после отзыва токенов запись прежней версии не читается.
+    Записи удаляются по сигналам модели (signals.py) и версионируются через USER_AUTH_CACHE_VERSION,
+    чтобы после изменения модели пользователя не читать старые объекты.
+    """
+
+    @staticmethod
+    def _get_key(user_id: int, token_version: int) -> str:
+        return f'user:auth:{user_id}:{token_version}'
+
+    @classmethod
+    def get(cls, user_id: int, token_version: int) -> User | None:
+        """Получить пользователя из кэша"""
+        return caches['local'].get(cls._get_key(user_id, token_version), version=settings.USER_AUTH_CACHE_VERSION)
+
+    @classmethod
+    def set(cls, user: User) -> None:  # noqa: A003
+        """Положить пользователя в кэш"""
+        caches['local'].set(cls._get_key(user.id, user.token_version), user, timeout=settings.USER_AUTH_CACHE_TIMEOUT,
+                            version=settings.USER_AUTH_CACHE_VERSION)
+
+    @classmethod
+    def invalidate(cls, user_id: int, *token_versions: int) -> None:
+        """Удалить записи пользователя с указанными версиями токенов из кэша"""
+        caches['local'].delete_many([cls._get_key(user_id, token_version) for token_version in token_versions],
+                                    version=settings.USER_AUTH_CACHE_VERSION)
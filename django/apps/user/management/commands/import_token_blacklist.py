@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from ...tokens import TokenBlacklist
+
+
+class Command(BaseCommand):
+    help = 'Перенести непросроченные токены из черного списка в БД (token_blacklist) в Redis'
+
+    outstanding_table = 'token_blacklist_outstandingtoken'
+    blacklisted_table = 'token_blacklist_blacklistedtoken'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true',
+                            help='Очистить таблицы token_blacklist после переноса')
+
+    def handle(self, *args, **options):
+        existing_tables = connection.introspection.table_names()
+        if self.outstanding_table not in existing_tables or self.blacklisted_table not in existing_tables:
+            raise CommandError('Таблицы token_blacklist не найдены.')
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT o.jti, o.expires_at FROM {self.blacklisted_table} b '  # noqa: S608
+                f'JOIN {self.outstanding_table} o ON o.id = b.token_id '
+                f'WHERE o.expires_at > %s',
+                [timezone.now()]
+            )
+            rows = cursor.fetchall()
+
+        for jti, expires_at in rows:
+            TokenBlacklist.add(jti, int(expires_at.timestamp()))
+        self.stdout.write(self.style.SUCCESS(f'Перенесено токенов: {len(rows)}'))
+
+        if options['clear']:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {self.blacklisted_table}')  # noqa: S608
+                cursor.execute(f'DELETE FROM {self.outstanding_table}')  # noqa: S608
+            self.stdout.write(self.style.SUCCESS('Таблицы token_blacklist очищены.'))
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.23 on 2026-10-19 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0012_alter_usersociallink_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_height',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Высота аватарки'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_width',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Ширина аватарки'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.23 on 2026-10-19 16:06
+
+import apps.user.models
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0015_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to=apps.user.models.User.upload_avatar, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'heic'])], verbose_name='Аватарка'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='avatar_preview',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to=apps.user.models.User.upload_avatar, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'heic'])], verbose_name='Аватарка-превью'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.23 on 2026-10-19 16:31
+
+import apps.user.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0016_media_file_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_feed',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to=apps.user.models.User.upload_avatar, verbose_name='Аватарка для ленты'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_full',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to=apps.user.models.User.upload_avatar, verbose_name='Аватарка в полном размере'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_thumbnail',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to=apps.user.models.User.upload_avatar, verbose_name='Аватарка-миниатюра'),
+        ),
+    ]
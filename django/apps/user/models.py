@@ -53,10 +53,20 @@ class User(AbstractBaseUser, PermissionsMixin):
     status = models.CharField(max_length=100, verbose_name='Статус', choices=Statuses.choices,
                               default=Statuses.LOOKING_FOR)
     about_me = models.CharField(max_length=2048, verbose_name='Обо мне', blank=True)
-    avatar = models.ImageField(upload_to=upload_avatar, verbose_name='Аватарка', blank=True, null=True,
+    avatar = models.ImageField(upload_to=upload_avatar, verbose_name='Аватарка', blank=True, null=True, db_index=True,
                                validators=[FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'heic'])])
     avatar_preview = models.ImageField(upload_to=upload_avatar, verbose_name='Аватарка-превью', blank=True, null=True,
+                                       db_index=True,
                                        validators=[FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'heic'])])
+    # Уменьшенные копии без EXIF. Оригинал аватарки клиентам не отдается
+    avatar_thumbnail = models.ImageField(upload_to=upload_avatar, verbose_name='Аватарка-миниатюра', blank=True,
+                                         null=True, db_index=True)
+    avatar_feed = models.ImageField(upload_to=upload_avatar, verbose_name='Аватарка для ленты', blank=True, null=True,
+                                    db_index=True)
+    avatar_full = models.ImageField(upload_to=upload_avatar, verbose_name='Аватарка в полном размере', blank=True,
+                                    null=True, db_index=True)
+    avatar_width = models.PositiveIntegerField(null=True, blank=True, verbose_name='Ширина аватарки')
+    avatar_height = models.PositiveIntegerField(null=True, blank=True, verbose_name='Высота аватарки')
     datetime_consent_to_processing_of_personal_data = models.DateTimeField(default=None, null=True,
                                                                            verbose_name='Дата и время согласия пользователя на обработку персональных данных')
 
@@ -65,6 +75,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(verbose_name='Активный', default=True,
                                     help_text='Указывает, следует ли считать этого пользователя активным')
     date_joined = models.DateTimeField('Дата создания', default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Время изменения')
+    # Версия выданных токенов: увеличивается при отзыве, токены с прежней версией перестают приниматься
+    token_version = models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия токенов')
 
     USERNAME_FIELD = 'phone_number'
     EMAIL_FIELD = 'email'
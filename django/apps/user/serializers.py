@@ -1,10 +1,13 @@
 from datetime import date
 
 from _decimal import Decimal
+from django.conf import settings
 from django.utils import timezone
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
 
 from .models import AuthorizationCode, User, UserSocialLink
+from .tokens import RefreshToken
 from ..review.services import ReviewService
 
 
@@ -15,6 +18,16 @@ class JWTTokenSerializer(serializers.Serializer):
     is_registered = serializers.BooleanField()
 
 
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """Сериализатор для обновления JWT Токена (черный список в Redis)"""
+    token_class = RefreshToken
+
+
+class TokenBlacklistSerializer(jwt_serializers.TokenBlacklistSerializer):
+    """Сериализатор для выхода из системы - добавления refresh-токена в черный список"""
+    token_class = RefreshToken
+
+
 class CreateOTPSerializer(serializers.ModelSerializer):
     """Сериализатор для генерации кода авторизации"""
 
@@ -51,6 +64,8 @@ class RegistrationSerializer(serializers.ModelSerializer):
                   'social_links', 'consent_to_processing_of_personal_data')
         extra_kwargs = {f: {'required': True} for f in fields
                         if f not in ('patronymic', 'avatar', 'social_links')}
+        # Оригинал может содержать EXIF (в том числе геопозицию), отдаются только уменьшенные копии
+        extra_kwargs['avatar'] = {'write_only': True}
 
     def validate(self, attrs):
         if not attrs['consent_to_processing_of_personal_data']:
@@ -67,11 +82,12 @@ class RegistrationSerializer(serializers.ModelSerializer):
         return value
 
     def validate_avatar(self, value):
-        # Максимальный допустимый размер файла в байтах (10 МБ)
-        max_size = 10 * 1024 * 1024
+        # Основная проверка размера выполняется при загрузке (utils.uploads.LimitedMultiPartParser)
+        max_size = settings.IMAGE_UPLOAD_MAX_SIZES['avatar']
 
         if value and value.size > max_size:
-            raise serializers.ValidationError("Размер файла превышает максимальный размер (10 МБ).")
+            raise serializers.ValidationError(
+                f'Размер файла превышает максимальный размер ({max_size // (1024 * 1024)} МБ).')
 
         return value
 
@@ -83,17 +99,22 @@ class MyUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'phone_number', 'first_name', 'last_name', 'patronymic', 'email', 'dob', 'gender', 'status',
-                  'about_me', 'avatar', 'social_links',)
+                  'about_me', 'avatar', 'avatar_preview', 'avatar_thumbnail', 'avatar_feed', 'avatar_full',
+                  'avatar_width', 'avatar_height', 'social_links',)
         extra_kwargs = {f: {'required': True} for f in fields
                         if f not in ('patronymic', 'avatar', 'social_links')}
-        read_only_fields = ('phone_number',)
+        # Оригинал может содержать EXIF (в том числе геопозицию), отдаются только уменьшенные копии
+        extra_kwargs['avatar'] = {'write_only': True}
+        read_only_fields = ('phone_number', 'avatar_preview', 'avatar_thumbnail', 'avatar_feed', 'avatar_full',
+                            'avatar_width', 'avatar_height')
 
     def validate_avatar(self, value):
-        # Максимальный допустимый размер файла в байтах (10 МБ)
-        max_size = 10 * 1024 * 1024
+        # Основная проверка размера выполняется при загрузке (utils.uploads.LimitedMultiPartParser)
+        max_size = settings.IMAGE_UPLOAD_MAX_SIZES['avatar']
 
         if value and value.size > max_size:
-            raise serializers.ValidationError("Размер файла превышает максимальный размер (10 МБ).")
+            raise serializers.ValidationError(
+                f'Размер файла превышает максимальный размер ({max_size // (1024 * 1024)} МБ).')
 
         return value
 
@@ -105,7 +126,8 @@ class RetrieveUserSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
-        fields = ('id', 'first_name', 'last_name', 'age', 'gender', 'status', 'about_me', 'avatar', 'social_links',)
+        fields = ('id', 'first_name', 'last_name', 'age', 'gender', 'status', 'about_me', 'avatar_preview',
+                  'avatar_thumbnail', 'avatar_feed', 'avatar_full', 'avatar_width', 'avatar_height', 'social_links',)
 
     def get_age(self, instance: User) -> int:
         return instance.age
@@ -128,4 +150,7 @@ class ShortUserSerializer(serializers.ModelSerializer):
         return instance.age
 
     def get_average_points(self, instance: User) -> Decimal:
+        if hasattr(instance, 'average_points'):
+            # Посчитана в запросе (ReviewService.annotate_average_points)
+            return ReviewService.round_average_points(instance.average_points)
         return ReviewService.get_average_points(instance.onme_reviews.all())
@@ -1,22 +1,25 @@
+import os
 import random
 import re
 import string
 from datetime import timedelta, datetime
 
 import phonenumbers
-from PIL import Image
 from constance import config
-from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.conf import settings
+from django.core.files.base import ContentFile
 from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 from phonenumbers import NumberParseException
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from utils.images import create_round_thumbnail
+from . import tasks
+from .cache import UserAuthCache
 from .dto import UserAuthorizationAttemptDTO, JWTTokenDTO
 from .enums import UserIdentifierType
 from .exceptions import AuthorizationError, RegistrationError
 from .models import AuthorizationCode, User, CodeAbstract, UserSocialLink
+from .tokens import RefreshToken
 from ..message.dto import MessageDTO, MessageResultDTO
 from ..message.enums import MessageType, MessageSendingStatus
 from ..message.service import MessageSender, get_message_sender
@@ -64,6 +67,7 @@ class UserService:
     @transaction.atomic
     def update_user(self, **new_user_data) -> User:
         """Обновить данные пользователя"""
+        is_avatar_uploaded = False
         for field, value in new_user_data.items():
             match field:
                 case 'social_links':
@@ -73,28 +77,64 @@ class UserService:
                                                                 type=item['type'],
                                                                 defaults={'url': item['url']})
                 case 'avatar':
+                    self._user.avatar_preview = None
+                    for variant in settings.AVATAR_VARIANTS:
+                        setattr(self._user, f'avatar_{variant}', None)
+                    self._user.avatar_width = None
+                    self._user.avatar_height = None
                     if value is None:
                         self._user.avatar = None
-                        self._user.avatar_preview = None
                         continue
+                    # Превью и уменьшенные копии создаются в фоновой задаче после сохранения оригинала
                     self._user.avatar.save(value.name, value, save=False)
-
-                    avatar = Image.open(value)
-                    avatar_preview_size = 100
-                    thumb_io = create_round_thumbnail(avatar, size=avatar_preview_size)
-
-                    avatar_preview_name = f'{value.name.split(".")[0]}_mini.png'
-                    self._user.avatar_preview.save(avatar_preview_name,
-                                                   InMemoryUploadedFile(thumb_io,
-                                                                        None, avatar_preview_name,
-                                                                        f'image/png', thumb_io.tell, None),
-                                                   save=False)
+                    is_avatar_uploaded = True
                 case _:
                     setattr(self._user, field, value)
         self._user.save()
 
+        user_id = self._user.id
+        if is_avatar_uploaded:
+            transaction.on_commit(lambda: tasks.process_user_avatar.delay(user_id))
+
         return self._user
 
+    def create_avatar_variants(self) -> None:
+        """Создать круглое превью и уменьшенные копии аватарки без EXIF и сохранить ее размеры"""
+        # Pillow и NumPy нужны только в фоновой задаче, поэтому не загружаются вместе с сервисом
+        from PIL import UnidentifiedImageError
+
+        from utils.images import create_image_variant, create_round_thumbnail, open_image
+
+        try:
+            with self._user.avatar.open('rb') as f:
+                avatar = open_image(f)
+        except UnidentifiedImageError:
+            return
+
+        self._user.avatar_width, self._user.avatar_height = avatar.size
+        name = os.path.splitext(os.path.basename(self._user.avatar.name))[0]
+        extension = settings.IMAGE_VARIANTS_FORMAT.lower()
+        for variant, max_size in settings.AVATAR_VARIANTS.items():
+            variant_io = create_image_variant(avatar, max_size, image_format=settings.IMAGE_VARIANTS_FORMAT,
+                                              quality=settings.IMAGE_VARIANTS_QUALITY)
+            getattr(self._user, f'avatar_{variant}').save(f'{name}_{variant}.{extension}',
+                                                          ContentFile(variant_io.getvalue()), save=False)
+        # Превью последним: create_round_thumbnail может уменьшить еще не загруженное изображение
+        thumb_io = create_round_thumbnail(avatar, size=settings.AVATAR_PREVIEW_SIZE)
+        self._user.avatar_preview.save(f'{name}_mini.png', ContentFile(thumb_io.getvalue()), save=False)
+        self._user.save(update_fields=['avatar_preview', *(f'avatar_{variant}' for variant in settings.AVATAR_VARIANTS),
+                                       'avatar_width', 'avatar_height', 'updated_at'])
+
+    @transaction.atomic
+    def revoke_tokens(self) -> None:
+        """Отозвать все выданные пользователю токены"""
+        user_id, token_version = self._user.id, self._user.token_version
+        User.objects.filter(id=user_id).update(token_version=F('token_version') + 1)
+        self._user.refresh_from_db(fields=['token_version'])
+        # Запись новой версии удалит сигнал сохранения, а прежней - только здесь
+        transaction.on_commit(lambda: UserAuthCache.invalidate(user_id, token_version))
+        self._user.save(update_fields=['updated_at'])
+
 
 class UserAuthorizationService:
     """Сервис для авторизации пользователя"""
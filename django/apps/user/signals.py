@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import UserAuthCache, user_profile_cache
+from .models import User, UserSocialLink
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_profile_cache(sender, instance: User, **kwargs):
+    user_profile_cache.invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_auth_cache(sender, instance: User, **kwargs):
+    """Любое изменение пользователя (в том числе в админке) сразу действует на аутентификацию"""
+    user_id, token_version = instance.pk, instance.token_version
+    transaction.on_commit(lambda: UserAuthCache.invalidate(user_id, token_version))
+
+
+@receiver([post_save, post_delete], sender=UserSocialLink)
+def invalidate_user_social_links_cache(sender, instance: UserSocialLink, **kwargs):
+    """Ссылки входят в профиль: обновить время изменения пользователя (по нему вычисляется ETag профиля)"""
+    User.objects.filter(id=instance.user_id).update(updated_at=timezone.now())
+    user_profile_cache.invalidate(instance.user_id)
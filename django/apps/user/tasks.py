@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from .models import User
+
+
+@shared_task
+def process_user_avatar(user_id: int) -> None:
+    """Создать превью и уменьшенные копии аватарки пользователя"""
+    from .services import UserService
+
+    user = User.objects.filter(id=user_id).first()
+    if user and user.avatar:
+        UserService(user).create_avatar_variants()
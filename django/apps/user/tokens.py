@@ -0,0 +1,59 @@
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+# Версия токенов пользователя (User.token_version) в токене
+TOKEN_VERSION_CLAIM = 'token_version'  # noqa: S105
+
+
+class TokenBlacklist:
+    """Черный список токенов в Redis
+
+    Хранится в отдельном кэше token_blacklist (своя база Redis без вытеснения), а не в общем кэше,
+    чтобы записи не пропадали при его очистке или нехватке памяти. Каждый токен хранится под отдельным ключом
+    с TTL, равным оставшемуся сроку жизни токена, поэтому просроченные записи удаляются самим Redis.
+    """
+
+    @staticmethod
+    def _get_key(jti: str) -> str:
+        return f'jwt:blacklist:{jti}'
+
+    @staticmethod
+    def add(jti: str, exp: int) -> None:
+        """Добавить токен в черный список до момента его истечения (exp - unix timestamp)"""
+        timeout = exp - int(timezone.now().timestamp())
+        if timeout > 0:
+            caches['token_blacklist'].set(TokenBlacklist._get_key(jti), 1, timeout=timeout)
+
+    @staticmethod
+    def contains(jti: str) -> bool:
+        """Находится ли токен в черном списке"""
+        return caches['token_blacklist'].has_key(TokenBlacklist._get_key(jti))
+
+
+class RefreshToken(tokens.RefreshToken):
+    """Refresh-токен, черный список которого хранится в Redis, а не в БД.
+    Содержит версию токенов пользователя, которая копируется в access-токены
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+    def verify(self, *args, **kwargs) -> None:
+        self.check_blacklist()
+        super().verify(*args, **kwargs)
+
+    def check_blacklist(self) -> None:
+        """Проверить, что токен не находится в черном списке"""
+        if TokenBlacklist.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self) -> None:
+        """Добавить токен в черный список"""
+        TokenBlacklist.add(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
@@ -1,12 +1,16 @@
 import os
+from datetime import date
 
 from drf_spectacular.utils import extend_schema, extend_schema_view
-from rest_framework import viewsets, status, mixins
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from utils.cache import CachedRetrieveMixin, ConditionalGetMixin
+from utils.db.replicas import ReplicaReadMixin
+from .cache import user_profile_cache
 from .dto import UserAuthorizationAttemptDTO
 from .exceptions import AuthorizationError, RegistrationError
 from .models import User
@@ -47,9 +51,12 @@ from ..chat.services import ChatMessageService
         responses={200: RetrieveUserSerializer}
     ),
 )
-class UserViewSet(viewsets.GenericViewSet, mixins.RetrieveModelMixin):
+class UserViewSet(ConditionalGetMixin, ReplicaReadMixin, CachedRetrieveMixin, viewsets.GenericViewSet):
     """ViewSet для пользователей"""
     queryset = User.objects.all()
+    replica_read_actions = ('retrieve',)
+    conditional_actions = ('retrieve',)
+    retrieve_cache = user_profile_cache
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -84,6 +91,14 @@ class UserViewSet(viewsets.GenericViewSet, mixins.RetrieveModelMixin):
                 self.permission_classes = (IsAuthenticated, IsFullRegistered)
         return [permission() for permission in self.permission_classes]
 
+    def get_version(self):
+        match self.action:
+            case 'retrieve':
+                lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+                updated_at = User.objects.filter(pk=lookup).values_list('updated_at', flat=True).first()
+                # Возраст меняется со временем
+                return (updated_at, date.today()) if updated_at else None
+
     @action(methods=['POST'], detail=False, url_path='create-otp', url_name='create_otp')
     def create_otp(self, request):
         """Создать одноразовый код (OTP)"""
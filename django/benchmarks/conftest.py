@@ -0,0 +1,173 @@
+"""Бенчмарки эндпоинтов: задержка и количество запросов к БД в сравнении с базовой линией (baseline.json).
+
+Запуск из каталога django (по умолчанию - SQLite, с DB_HOST и остальными переменными БД - Postgres):
+    python -m pytest benchmarks [--bench-scales small medium large] [--bench-iterations 10] [--bench-latency]
+Обновить базовую линию для текущей СУБД и выбранных масштабов:
+    python -m pytest benchmarks --bench-update-baseline
+
+Тест падает, если запросов к БД стало больше, чем в базовой линии. Задержка сравнивается только
+с --bench-latency: тест падает, если медиана выросла больше, чем на --bench-threshold (доля)
+и MIN_LATENCY_DELTA_MS. Базовая линия задержек зависит от машины, поэтому сравнивать их стоит
+на той же машине, на которой обновлялась базовая линия
+"""
+import json
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+
+from apps.user.models import User
+from apps.user.tokens import RefreshToken
+from utils.testing import assert_query_budget
+from utils.views import get_view_name
+
+from .data import SCALES, create_dataset
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+# Разница медиан, которая не считается регрессией при любом пороге (шум на быстрых эндпоинтах)
+MIN_LATENCY_DELTA_MS = 5
+
+
+@dataclass
+class BenchResult:
+    """Результат бенчмарка: запросы к БД (максимум по итерациям) и задержка в миллисекундах"""
+    queries: int
+    median_ms: float
+    p95_ms: float
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmarks')
+    group.addoption('--bench-scales', nargs='+', default=['small'], choices=list(SCALES),
+                    help='Масштабы данных (benchmarks/data.py)')
+    group.addoption('--bench-iterations', type=int, default=10, help='Количество замеров каждого эндпоинта')
+    group.addoption('--bench-latency', action='store_true',
+                    help='Сравнивать медиану задержки с базовой линией (по умолчанию - только количество запросов)')
+    group.addoption('--bench-threshold', type=float, default=0.5,
+                    help='Допустимый рост медианы задержки относительно базовой линии (доля)')
+    group.addoption('--bench-update-baseline', action='store_true',
+                    help='Записать результаты в базовую линию вместо сравнения')
+
+
+def pytest_configure(config):
+    config.bench_results = {}
+
+
+def pytest_generate_tests(metafunc):
+    if 'dataset' in metafunc.fixturenames:
+        scales = metafunc.config.getoption('--bench-scales')
+        metafunc.parametrize('dataset', scales, indirect=True, scope='session')
+
+
+@pytest.fixture(scope='session')
+def dataset(request, django_db_setup, django_db_blocker):
+    """Данные масштаба из параметра теста. Создаются один раз на масштаб и удаляются после его тестов"""
+    with django_db_blocker.unblock():
+        yield create_dataset(request.param)
+        call_command('flush', interactive=False, verbosity=0)
+
+
+def _load_baseline() -> dict:
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    return statistics.quantiles(values, n=100)[percent - 1] if len(values) > 1 else values[0]
+
+
+@pytest.fixture
+def bench(request, dataset, db):
+    """Замерить эндпоинт: bench(name, send, user=None, setup=None, status=200).
+
+    send(client) отправляет запрос клиентом, авторизованным как user. Каждая итерация - с пустыми кэшами
+    и в своей транзакции, которая откатывается, поэтому изменяющие запросы повторяются на одних и тех же данных.
+    setup() выполняется в той же транзакции перед запросом и в замер не входит
+    """
+    config = request.config
+    iterations = config.getoption('--bench-iterations')
+
+    def run(name: str, send: Callable[[APIClient], object], user: User | None = None,
+            setup: Callable[[], None] | None = None, status: int = 200) -> BenchResult:
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        durations, queries = [], 0
+        # Первая итерация - прогрев, в результат не входит
+        for iteration in range(iterations + 1):
+            for cache in caches.all():
+                cache.clear()
+            with transaction.atomic():
+                if setup is not None:
+                    setup()
+                started_at = time.perf_counter()
+                response = send(client)
+                duration = time.perf_counter() - started_at
+                transaction.set_rollback(True)
+            assert response.status_code == status, f'{name}: {response.status_code} {response.content[:500]!r}'
+            if not iteration:
+                continue
+            durations.append(duration * 1000)
+            queries = max(queries, response.wsgi_request.query_stats.count)
+            if get_view_name(response.wsgi_request) in settings.QUERY_BUDGETS:
+                assert_query_budget(response)
+
+        result = BenchResult(queries=queries, median_ms=round(statistics.median(durations), 2),
+                             p95_ms=round(_percentile(durations, 95), 2))
+        key = f'{name}[{dataset.scale}]'
+        config.bench_results.setdefault(connection.vendor, {})[key] = result
+        if config.getoption('--bench-update-baseline'):
+            return result
+
+        baseline = _load_baseline().get(connection.vendor, {}).get(key)
+        if baseline is None:
+            return result
+        assert result.queries <= baseline['queries'], (
+            f'{key}: {result.queries} запросов к БД, в базовой линии - {baseline["queries"]}')
+        if not config.getoption('--bench-latency'):
+            return result
+        allowed_ms = max(baseline['median_ms'] * (1 + config.getoption('--bench-threshold')),
+                         baseline['median_ms'] + MIN_LATENCY_DELTA_MS)
+        assert result.median_ms <= allowed_ms, (
+            f'{key}: медиана {result.median_ms} ms, в базовой линии - {baseline["median_ms"]} ms '
+            f'(допустимо до {allowed_ms:.2f} ms)')
+        return result
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not getattr(config, 'bench_results', None):
+        return
+    terminalreporter.section('benchmarks')
+    baseline = _load_baseline()
+    for vendor, results in config.bench_results.items():
+        for key, result in sorted(results.items()):
+            line = f'{vendor:10} {key:40} {result.queries:4} queries  median {result.median_ms:8.2f} ms  ' \
+                   f'p95 {result.p95_ms:8.2f} ms'
+            previous = baseline.get(vendor, {}).get(key)
+            if previous:
+                line += f'  (baseline: {previous["queries"]} queries, median {previous["median_ms"]:.2f} ms)'
+            terminalreporter.write_line(line)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if not config.getoption('--bench-update-baseline') or not getattr(config, 'bench_results', None):
+        return
+    baseline = _load_baseline()
+    for vendor, results in config.bench_results.items():
+        baseline.setdefault(vendor, {}).update({key: asdict(result) for key, result in results.items()})
+    BASELINE_PATH.write_text(json.dumps(
+        {vendor: dict(sorted(results.items())) for vendor, results in sorted(baseline.items())},
+        indent=2, ensure_ascii=False) + '\n')
@@ -0,0 +1,158 @@
+"""Данные для бенчмарков эндпоинтов (benchmarks/test_endpoints.py) в нескольких масштабах.
+
+Фоновые пользователи, карточки, заявки, чаты и отзывы создаются через bulk_create с фиксированным seed,
+поверх них - пользователи и объекты, с которыми работают сами бенчмарки (Dataset)
+"""
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.card.models import Card, CardPhoto, CardRequest, CardTag
+from apps.chat.models import ChatMessage
+from apps.city.models import City
+from apps.review.models import Review
+from apps.user.models import User
+
+
+@dataclass(frozen=True)
+class Scale:
+    """Масштаб данных"""
+    users: int
+    cards_per_user: int
+    requests_per_card: int
+    messages_per_chat: int
+    reviews_per_user: int
+
+
+SCALES = {
+    'small': Scale(users=50, cards_per_user=2, requests_per_card=2, messages_per_chat=5, reviews_per_user=2),
+    'medium': Scale(users=300, cards_per_user=2, requests_per_card=4, messages_per_chat=10, reviews_per_user=4),
+    'large': Scale(users=1000, cards_per_user=3, requests_per_card=6, messages_per_chat=20, reviews_per_user=8),
+}
+
+
+@dataclass
+class Dataset:
+    """Объекты, с которыми работают бенчмарки"""
+    scale: str
+    # Пользователь, который листает ленту и подает заявку на target_card
+    reader: User
+    target_card: Card
+    # Владелец карточек с заявками и чатами от фоновых пользователей и от applicant
+    owner: User
+    owner_card: Card
+    applicant: User
+    chat_message: ChatMessage
+    # Логин без пользователя для create-otp
+    new_login: str
+
+
+def bulk_create(model, objects: list) -> list:
+    """bulk_create, который возвращает объекты с id и на SQLite (Django 3.2 получает id созданных строк
+    только в Postgres): созданные строки перечитываются по возрастанию id
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objects, batch_size=1000)
+    last_id = model.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+    model.objects.bulk_create(objects, batch_size=1000)
+    return list(model.objects.filter(id__gt=last_id).order_by('id'))
+
+
+def _phone_number(number: int) -> str:
+    return f'+7900{number:07d}'
+
+
+def _create_users(count: int, start: int) -> list[User]:
+    today = date.today()
+    users = [
+        User(phone_number=_phone_number(start + index), first_name='Иван', last_name='Иванов',
+             dob=today - timedelta(days=365 * 20 + index % 3650), gender=User.Genders.MALE,
+             password=UNUSABLE_PASSWORD_PREFIX, datetime_consent_to_processing_of_personal_data=timezone.now())
+        for index in range(count)
+    ]
+    return bulk_create(User, users)
+
+
+def _create_cards(owners: list[User], cards_per_user: int, cities: list[City], tags: list[CardTag],
+                  rng: random.Random) -> list[Card]:
+    cards = bulk_create(Card, [
+        Card(owner=owner, header=f'Ищу соседа {index}', description='Квартира рядом с метро. ' * 10,
+             city=rng.choice(cities), limit=rng.randint(2, 5),
+             deadline=date.today() + timedelta(days=rng.randint(1, 60)),
+             status=Card.Statuses.ACTIVE if rng.random() < 0.8 else rng.choice(Card.Statuses.values))
+        for owner in owners for index in range(cards_per_user)
+    ])
+    Card.tags.through.objects.bulk_create([
+        Card.tags.through(card_id=card.id, cardtag_id=tag.id) for card in cards for tag in rng.sample(tags, 3)
+    ])
+    CardPhoto.objects.bulk_create([
+        CardPhoto(card=card, photo=f'cards/photos/00/{card.id}-{index}.jpg', width=1280, height=960)
+        for card in cards for index in range(2)
+    ])
+    return cards
+
+
+def _create_chats(requests: list[CardRequest], messages_per_chat: int) -> list[ChatMessage]:
+    """Чаты владельцев карточек с авторами заявок"""
+    owner_ids = dict(Card.objects.filter(id__in={card_request.card_id for card_request in requests})
+                     .values_list('id', 'owner_id'))
+    return bulk_create(ChatMessage, [
+        ChatMessage(sender_id=card_request.user_id if index % 2 else owner_ids[card_request.card_id],
+                    receiver_id=owner_ids[card_request.card_id] if index % 2 else card_request.user_id,
+                    card_id=card_request.card_id, content=f'Сообщение {index}')
+        for card_request in requests for index in range(messages_per_chat)
+    ])
+
+
+def create_dataset(scale_name: str, seed: int = 0) -> Dataset:
+    """Создать данные масштаба scale_name"""
+    scale = SCALES[scale_name]
+    rng = random.Random(seed)
+
+    cities = bulk_create(City, [City(name=f'Город {index}', order=index) for index in range(10)])
+    tags = bulk_create(CardTag, [CardTag(name=f'Тег {index}', order=index) for index in range(15)])
+
+    # Фоновые данные: заявки только от фоновых пользователей на чужие карточки
+    users = _create_users(scale.users, start=0)
+    cards = _create_cards(users, scale.cards_per_user, cities, tags, rng)
+    requests = bulk_create(CardRequest, [
+        CardRequest(user=user, card=card, covering_letter='Здравствуйте! ' * 5,
+                    status=rng.choices(CardRequest.Statuses.values, weights=(6, 1, 3))[0])
+        for card in cards
+        for user in rng.sample(users, scale.requests_per_card) if user.id != card.owner_id
+    ])
+    _create_chats([card_request for card_request in requests if rng.random() < 0.3], scale.messages_per_chat)
+    Review.objects.bulk_create([
+        Review(author=author, target_user=user, text='Хороший сосед', points=rng.randint(1, 5))
+        for user in users for author in rng.sample(users, scale.reviews_per_user) if author.id != user.id
+    ])
+
+    reader, owner, applicant = _create_users(3, start=scale.users)
+    reader.card_skips.add(*rng.sample(cards, len(cards) // 10))
+    target_card = rng.choice([card for card in cards if card.status == Card.Statuses.ACTIVE])
+    CardRequest.objects.filter(card=target_card, status=CardRequest.Statuses.APPROVED).update(
+        status=CardRequest.Statuses.PENDING)
+
+    owner_cards = _create_cards([owner], scale.cards_per_user, cities, tags, rng)
+    owner_card = owner_cards[0]
+    Card.objects.filter(id=owner_card.id).update(status=Card.Statuses.ACTIVE, limit=5)
+    owner_requests = bulk_create(CardRequest, [
+        CardRequest(user=user, card=card, status=CardRequest.Statuses.PENDING, covering_letter='Здравствуйте!')
+        for card in owner_cards for user in rng.sample(users, scale.requests_per_card)
+    ])
+    applicant_request = CardRequest.objects.create(user=applicant, card=owner_card, covering_letter='Здравствуйте!')
+    _create_chats(owner_requests, scale.messages_per_chat)
+    chat_message = _create_chats([applicant_request], scale.messages_per_chat)[-1]
+    Review.objects.bulk_create([
+        Review(author=author, target_user=owner, text='Хороший сосед', points=rng.randint(1, 5))
+        for author in rng.sample(users, scale.reviews_per_user)
+    ])
+
+    return Dataset(scale=scale_name, reader=reader, target_card=target_card, owner=owner,
+                   owner_card=Card.objects.get(id=owner_card.id), applicant=applicant, chat_message=chat_message,
+                   new_login=_phone_number(scale.users + 100))
@@ -0,0 +1,265 @@
+"""Нагрузочный тест с реалистичными сессиями пользователей (в духе Locust, без интерфейса).
+
+Каждый виртуальный пользователь входит по одноразовому коду (create-otp и authorization) под одним
+из пользователей generate_fake_data и выполняет случайные действия с паузами: листает ленту и пропускает
+карточки, подает заявки, обрабатывает заявки на свои карточки и переписывается в чатах. После сессии
+начинает новую под другим пользователем. В конце выводятся пропускная способность, задержки и доля ошибок
+по действиям.
+
+Сервер должен возвращать код в ответе create-otp (APP_DEBUG=1, коды отправляет заглушка TestSender):
+
+    docker compose -f docker-compose.yaml -f docker-compose.override.yaml -f docker-compose.load.yaml up -d
+    docker compose exec django python manage.py generate_fake_data --users 100000
+
+Запуск из каталога django:
+    python -m benchmarks.load_scenarios --url http://127.0.0.1:8000 [--users 50] [--spawn-rate 5] [--duration 300]
+        [--user-ids 1 100000] [--max-error-rate 0.01]
+
+Ошибки - ответы 5xx и сбои соединения. Ответы 4xx (например, повторная заявка на ту же карточку)
+в сценариях ожидаемы и выводятся отдельно
+"""
+import argparse
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import requests
+
+from .read_endpoints import percentile
+
+
+@dataclass
+class ActionStats:
+    """Результаты одного действия"""
+    timings: list[float] = field(default_factory=list)
+    rejected: int = 0
+    errors: int = 0
+
+
+class Stats:
+    """Результаты всех виртуальных пользователей по действиям"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._actions: dict[str, ActionStats] = defaultdict(ActionStats)
+
+    def record(self, action: str, duration: float, status_code: int | None) -> None:
+        with self._lock:
+            stats = self._actions[action]
+            stats.timings.append(duration * 1000)
+            if status_code is None or status_code >= 500:
+                stats.errors += 1
+            elif status_code >= 400:
+                stats.rejected += 1
+
+    def totals(self) -> tuple[int, int]:
+        """Количество запросов и ошибок"""
+        with self._lock:
+            return (sum(len(stats.timings) for stats in self._actions.values()),
+                    sum(stats.errors for stats in self._actions.values()))
+
+    def report(self, elapsed: float) -> None:
+        with self._lock:
+            actions = sorted(self._actions.items())
+        print(f'{"action":<16} {"requests":>8} {"rps":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"max ms":>8} '
+              f'{"4xx %":>6} {"errors %":>8}')
+        for action, stats in actions + [('total', self._merge(stats for _, stats in actions))]:
+            count = len(stats.timings)
+            if not count:
+                continue
+            print(f'{action:<16} {count:8} {count / elapsed:8.1f} {percentile(stats.timings, 50):8.1f} '
+                  f'{percentile(stats.timings, 95):8.1f} {percentile(stats.timings, 99):8.1f} '
+                  f'{max(stats.timings):8.1f} {stats.rejected / count * 100:6.1f} {stats.errors / count * 100:8.2f}')
+
+    @staticmethod
+    def _merge(items) -> ActionStats:
+        merged = ActionStats()
+        for stats in items:
+            merged.timings += stats.timings
+            merged.rejected += stats.rejected
+            merged.errors += stats.errors
+        return merged
+
+
+class LoginError(Exception):
+    """Не удалось войти"""
+
+
+class ServerConfigurationError(Exception):
+    """Сервер не подходит для теста"""
+
+
+class UserSession:
+    """Сессия виртуального пользователя"""
+
+    def __init__(self, base_url: str, login: str, stats: Stats, rng: random.Random):
+        self.base_url = base_url
+        self.login = login
+        self.stats = stats
+        self.rng = rng
+        self.session = requests.Session()
+        self.user_id: int | None = None
+        # Карточки из ленты: id и id владельца
+        self.seen_cards: list[tuple[int, int]] = []
+
+    def request(self, action: str, method: str, path: str, **kwargs):
+        """Отправить запрос и записать результат. Возвращает тело ответа 2xx, иначе None"""
+        started_at = time.perf_counter()
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', timeout=30, **kwargs)
+        except requests.RequestException:
+            self.stats.record(action, time.perf_counter() - started_at, None)
+            return None
+        self.stats.record(action, time.perf_counter() - started_at, response.status_code)
+        if not response.ok:
+            return None
+        return response.json() if response.content else {}
+
+    def sign_in(self) -> None:
+        """Вход по одноразовому коду"""
+        otp = self.request('create_otp', 'POST', '/api/users/create-otp/', json={'login': self.login})
+        if otp is None:
+            raise LoginError(f'{self.login}: не удалось запросить код')
+        if 'code' not in otp:
+            raise ServerConfigurationError('Сервер не вернул код в ответе create-otp: нужен APP_DEBUG=1 '
+                                           '(TestSender)')
+        tokens = self.request('authorization', 'POST', '/api/users/authorization/',
+                              json={'login': self.login, 'code': otp['code']})
+        if tokens is None:
+            raise LoginError(f'{self.login}: не удалось войти')
+        self.session.headers['Authorization'] = f'Bearer {tokens["access"]}'
+        me = self.request('show_me', 'GET', '/api/users/show-me/')
+        if me is None:
+            raise LoginError(f'{self.login}: не удалось получить профиль')
+        self.user_id = me['id']
+
+    def scroll_feed(self) -> None:
+        """Загрузить ленту (приходит целиком) и пролистать часть карточек, некоторые из них пропустить"""
+        feed = self.request('feed', 'GET', '/api/cards/')
+        if not feed:
+            return
+        for card in feed[:self.rng.randint(5, 30)]:
+            self.seen_cards.append((card['id'], card['owner']['id']))
+            if self.rng.random() < 0.3:
+                self.request('skip', 'POST', f'/api/cards/{card["id"]}/skip/')
+
+    def apply(self) -> None:
+        """Открыть карточку из ленты и подать заявку"""
+        cards = [card_id for card_id, owner_id in self.seen_cards if owner_id != self.user_id]
+        if not cards:
+            self.scroll_feed()
+            return
+        card_id = self.rng.choice(cards)
+        if self.request('card', 'GET', f'/api/cards/{card_id}/') is not None:
+            self.request('create_request', 'POST', f'/api/cards/{card_id}/create-request/',
+                         json={'roommates_number': 1, 'covering_letter': 'Здравствуйте! Хочу к вам заселиться.'})
+
+    def handle_requests(self) -> None:
+        """Просмотреть заявки на свою карточку и обработать одну из ожидающих"""
+        cards = self.request('my_cards', 'GET', f'/api/cards/by-owner/{self.user_id}/')
+        if not cards:
+            return
+        cards = cards['results'] if isinstance(cards, dict) else cards
+        card_id = self.rng.choice(cards)['id']
+        card_requests = self.request('get_requests', 'GET', f'/api/cards/{card_id}/get-requests/') or []
+        pending = [card_request for card_request in card_requests if card_request['status'] == 'pending']
+        if pending:
+            card_request = self.rng.choice(pending)
+            self.request('handle_request', 'POST', f'/api/cards/{card_id}/handle-request/',
+                         json={'user': card_request['user']['id'],
+                               'status': self.rng.choices(('approved', 'rejected'), weights=(1, 2))[0]})
+
+    def chat(self) -> None:
+        """Открыть один из чатов и ответить собеседнику"""
+        chats = self.request('my_chats', 'GET', '/api/chat-messages/my-chats/')
+        if not chats:
+            return
+        last_message = self.rng.choice(chats)
+        if self.request('chat', 'GET', f'/api/chat-messages/{last_message["id"]}/') is None:
+            return
+        # Отправитель системных сообщений - None
+        receivers = [user['id'] for user in (last_message['sender'], last_message['receiver'])
+                     if user and user['id'] != self.user_id]
+        if receivers:
+            self.request('send_message', 'POST', '/api/chat-messages/',
+                         json={'receiver': receivers[0], 'content': 'Добрый день! Когда можно посмотреть?'})
+
+    # Действия сессии и их веса
+    TASKS = ((scroll_feed, 6), (apply, 2), (handle_requests, 1), (chat, 3))
+
+    def run(self, actions: int, think_time: tuple[float, float], stop: threading.Event) -> None:
+        self.sign_in()
+        tasks, weights = zip(*self.TASKS)
+        for _ in range(actions):
+            if stop.wait(self.rng.uniform(*think_time)):
+                return
+            self.rng.choices(tasks, weights=weights)[0](self)
+
+
+def virtual_user(number: int, args, stats: Stats, stop: threading.Event) -> None:
+    """Виртуальный пользователь: сессии под случайными пользователями до остановки теста"""
+    rng = random.Random(args.seed * 100003 + number)
+    first_id, last_id = args.user_ids
+    while not stop.is_set():
+        login = f'{args.phone_prefix}{rng.randint(first_id, last_id):07d}'
+        session = UserSession(args.url.rstrip('/'), login, stats, rng)
+        try:
+            session.run(rng.randint(*args.session_actions), args.think_time, stop)
+        except LoginError:
+            # Например, код этому пользователю недавно уже отправлялся
+            stop.wait(1)
+        except ServerConfigurationError as exc:
+            print(exc)
+            stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', required=True, help='Адрес сервера, например http://127.0.0.1:8000')
+    parser.add_argument('--users', type=int, default=50, help='Количество виртуальных пользователей')
+    parser.add_argument('--spawn-rate', type=float, default=5,
+                        help='Сколько виртуальных пользователей запускать в секунду')
+    parser.add_argument('--duration', type=int, default=300, help='Длительность теста (с)')
+    parser.add_argument('--think-time', type=float, nargs=2, default=(0.5, 3), help='Пауза между действиями (с)')
+    parser.add_argument('--session-actions', type=int, nargs=2, default=(5, 30), help='Действий в одной сессии')
+    parser.add_argument('--user-ids', type=int, nargs=2, default=(1, 1000),
+                        help='id пользователей generate_fake_data, под которыми входят виртуальные пользователи')
+    parser.add_argument('--phone-prefix', default='+7955', help='Префикс номеров телефонов generate_fake_data')
+    parser.add_argument('--report-interval', type=int, default=10, help='Как часто выводить промежуточные итоги (с)')
+    parser.add_argument('--max-error-rate', type=float, help='Завершиться с ошибкой, если доля ошибок больше')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    stats, stop = Stats(), threading.Event()
+    threads = []
+    started_at = time.perf_counter()
+    try:
+        for number in range(args.users):
+            thread = threading.Thread(target=virtual_user, args=(number, args, stats, stop), daemon=True)
+            thread.start()
+            threads.append(thread)
+            if stop.wait(1 / args.spawn_rate):
+                break
+        while not stop.is_set() and (elapsed := time.perf_counter() - started_at) < args.duration:
+            if stop.wait(min(args.report_interval, args.duration - elapsed)):
+                break
+            total, errors = stats.totals()
+            print(f'{time.perf_counter() - started_at:6.0f} s  {total} requests  {errors} errors')
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    elapsed = time.perf_counter() - started_at
+    print()
+    stats.report(elapsed)
+    total, errors = stats.totals()
+    if args.max_error_rate is not None and total and errors / total > args.max_error_rate:
+        raise SystemExit(f'Доля ошибок {errors / total:.2%} больше {args.max_error_rate:.2%}')
+
+
+if __name__ == '__main__':
+    main()
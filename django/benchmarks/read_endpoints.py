@@ -0,0 +1,74 @@
+"""Нагрузочное сравнение эндпоинтов чтения под WSGI и ASGI.
+
+Скрипт отправляет запросы в несколько потоков на уже запущенный сервер и выводит RPS и задержки.
+Для сравнения один и тот же набор запускается на сервере с одним воркером в каждом режиме:
+
+    # WSGI, один синхронный воркер
+    gunicorn project.wsgi:application -w 1 --bind 127.0.0.1:8001
+    # ASGI, синхронные представления (все выполняются в одном потоке)
+    gunicorn project.asgi:application -w 1 -k uvicorn.workers.UvicornWorker --bind 127.0.0.1:8002
+    # ASGI с асинхронными представлениями для чтения
+    ASYNC_READ_VIEWS=True gunicorn project.asgi:application -w 1 -k uvicorn.workers.UvicornWorker --bind 127.0.0.1:8003
+
+Запуск из каталога django:
+    python -m benchmarks.read_endpoints --url http://127.0.0.1:8003 --token <access> [--concurrency 16] [--requests 500]
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+import requests
+
+ENDPOINTS = (
+    '/api/cards/',
+    '/api/cards/tags/',
+    '/api/cities/',
+    '/api/chat-messages/my-chats/',
+)
+
+_local = threading.local()
+
+
+def get(url: str, token: str) -> tuple[float, int]:
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+        session.headers['Authorization'] = f'Bearer {token}'
+    started_at = time.perf_counter()
+    response = session.get(url)
+    return time.perf_counter() - started_at, response.status_code
+
+
+def percentile(values: list[float], percent: int) -> float:
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1] if len(values) > 1 else values[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', required=True, help='Адрес сервера, например http://127.0.0.1:8000')
+    parser.add_argument('--token', required=True, help='Access-токен пользователя')
+    parser.add_argument('--endpoints', nargs='*', default=ENDPOINTS)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500, help='Количество запросов на эндпоинт')
+    args = parser.parse_args()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for endpoint in args.endpoints:
+            url = f'{args.url.rstrip("/")}{endpoint}'
+            list(executor.map(get, repeat(url, args.concurrency), repeat(args.token)))  # прогрев
+
+            started_at = time.perf_counter()
+            results = list(executor.map(get, repeat(url, args.requests), repeat(args.token)))
+            elapsed = time.perf_counter() - started_at
+
+            timings = [t * 1000 for t, _ in results]
+            errors = sum(1 for _, status in results if status >= 400)
+            print(f'{endpoint:<32} {args.requests / elapsed:8.1f} rps  p50 {percentile(timings, 50):7.1f} ms  '
+                  f'p95 {percentile(timings, 95):7.1f} ms  p99 {percentile(timings, 99):7.1f} ms  errors {errors}')
+
+
+if __name__ == '__main__':
+    main()
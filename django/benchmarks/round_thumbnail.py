@@ -0,0 +1,90 @@
+"""Сравнение скорости создания круглых миниатюр: Pillow/NumPy против прежней реализации на matplotlib.
+
+Запуск из каталога django: python -m benchmarks.round_thumbnail [--repeat 20] [--size 100]
+matplotlib ставится только с dev-зависимостями
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from utils.images import create_round_thumbnail
+
+
+def legacy_create_round_thumbnail(input_image, size=70):
+    """Прежняя реализация на matplotlib"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    mask = Image.new('L', input_image.size, 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, input_image.width, input_image.height), fill=255)
+    avatar_circular = Image.new('RGBA', input_image.size, 0)
+    avatar_circular.paste(input_image, mask=mask)
+
+    fig, ax = plt.subplots(figsize=(size / 100, size / 100), dpi=100)
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.imshow(np.array(avatar_circular), extent=(0, 1, 0, 1), transform=ax.transAxes)
+    ax.axis('off')
+    thumb_io = BytesIO()
+    plt.savefig(thumb_io, format='png', bbox_inches='tight', pad_inches=0, transparent=True)
+    plt.close()
+    return thumb_io
+
+
+def make_source_image(width: int, height: int) -> bytes:
+    """JPEG-фото, похожее на загруженную пользователем аватарку: плавные градиенты с небольшим шумом"""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)[np.newaxis, :]
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, np.newaxis]
+    gradient = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    noise = rng.normal(0, 8, size=(height, width, 3))
+    pixels = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+    image_io = BytesIO()
+    Image.fromarray(pixels, mode='RGB').save(image_io, format='JPEG', quality=90)
+    return image_io.getvalue()
+
+
+def measure(func, source: bytes, size: int, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func(Image.open(BytesIO(source)), size=size)
+        timings.append(time.perf_counter() - started_at)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--size', type=int, default=100)
+    parser.add_argument('--width', type=int, default=3000)
+    parser.add_argument('--height', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    source = make_source_image(args.width, args.height)
+    results = {}
+    for name, func in (('matplotlib', legacy_create_round_thumbnail), ('pillow', create_round_thumbnail)):
+        timings = measure(func, source, args.size, args.repeat)
+        results[name] = statistics.median(timings)
+        print(f'{name:>10}: median {results[name] * 1000:8.2f} ms, '
+              f'min {min(timings) * 1000:8.2f} ms, max {max(timings) * 1000:8.2f} ms')
+    print(f'{"speedup":>10}: x{results["matplotlib"] / results["pillow"]:.1f}')
+
+    # Новая реализация не использует глобальное состояние и может вызываться из нескольких потоков
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(lambda _: create_round_thumbnail(Image.open(BytesIO(source)), size=args.size),
+                          range(args.repeat * args.threads)))
+    elapsed = time.perf_counter() - started_at
+    print(f'{"threads":>10}: {args.repeat * args.threads} миниатюр в {args.threads} потоках за {elapsed * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
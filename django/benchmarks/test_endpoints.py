@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.card.models import CardRequest
+from apps.user.models import AuthorizationCode
+
+
+def test_card_list(bench, dataset):
+    bench('card_list', lambda client: client.get('/api/cards/'), user=dataset.reader)
+
+
+def test_card_by_owner(bench, dataset):
+    bench('card_by_owner', lambda client: client.get(f'/api/cards/by-owner/{dataset.owner.id}/'), user=dataset.reader)
+
+
+def test_card_retrieve(bench, dataset):
+    bench('card_retrieve', lambda client: client.get(f'/api/cards/{dataset.target_card.id}/'), user=dataset.reader)
+
+
+def test_card_create_request(bench, dataset):
+    bench('card_create_request',
+          lambda client: client.post(f'/api/cards/{dataset.target_card.id}/create-request/',
+                                     {'roommates_number': 1, 'covering_letter': 'Здравствуйте!'}),
+          user=dataset.reader, status=201)
+
+
+def test_card_handle_request(bench, dataset):
+    bench('card_handle_request',
+          lambda client: client.post(f'/api/cards/{dataset.owner_card.id}/handle-request/',
+                                     {'user': dataset.applicant.id, 'status': CardRequest.Statuses.APPROVED}),
+          user=dataset.owner)
+
+
+def test_chat_message_create(bench, dataset):
+    bench('chat_message_create',
+          lambda client: client.post('/api/chat-messages/', {'receiver': dataset.owner.id, 'content': 'Привет!'}),
+          user=dataset.applicant, status=201)
+
+
+def test_chat_message_my_chats(bench, dataset):
+    bench('chat_message_my_chats', lambda client: client.get('/api/chat-messages/my-chats/'), user=dataset.owner)
+
+
+def test_chat_message_retrieve(bench, dataset):
+    bench('chat_message_retrieve', lambda client: client.get(f'/api/chat-messages/{dataset.chat_message.id}/'),
+          user=dataset.owner)
+
+
+def test_review_list(bench, dataset):
+    bench('review_list', lambda client: client.get('/api/reviews/', {'target_user': dataset.owner.id}),
+          user=dataset.reader)
+
+
+def test_user_create_otp(bench, dataset):
+    bench('user_create_otp', lambda client: client.post('/api/users/create-otp/', {'login': dataset.new_login}),
+          status=201)
+
+
+def test_user_authorization(bench, dataset):
+    def create_code():
+        AuthorizationCode.objects.create(login=dataset.new_login, code='123456',
+                                         expiration_date=timezone.now() + timedelta(minutes=5))
+
+    bench('user_authorization',
+          lambda client: client.post('/api/users/authorization/', {'login': dataset.new_login, 'code': '123456'}),
+          setup=create_code)
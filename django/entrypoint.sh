@@ -1,6 +1,13 @@
 #!/bin/sh
 set -e
 
+# Файлы метрик прошлого запуска (см. utils/metrics.py). Каталог готовится до первого manage.py:
+# процессы, которые импортируют метрики, пишут в него свои файлы
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 python manage.py collectstatic --noinput
 python manage.py migrate
 
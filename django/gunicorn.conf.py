@@ -0,0 +1,8 @@
+import os
+
+
+def child_exit(server, worker):
+    # Метрики Prometheus завершившегося воркера (см. utils/metrics.py)
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
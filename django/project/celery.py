@@ -7,3 +7,6 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings.base')
 app = Celery('project')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
+
+# Метрики задач (обработчики сигналов Celery)
+import utils.celery_metrics  # noqa: E402,F401
@@ -1,11 +1,13 @@
 import mimetypes
 import os
 from datetime import timedelta
-from distutils.util import strtobool
 from pathlib import Path
 
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
+from utils.env import strtobool
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -18,7 +20,6 @@ ALLOWED_HOSTS = ['*']
 CORS_ORIGIN_ALLOW_ALL = True
 
 INSTALLED_APPS = [
-    'debug_toolbar',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -28,7 +29,6 @@ INSTALLED_APPS = [
 
     'corsheaders',
     'rest_framework',
-    'rest_framework_simplejwt.token_blacklist',
     'celery',
     'django_celery_beat',
     'drf_spectacular',
@@ -37,27 +37,38 @@ INSTALLED_APPS = [
     'constance',
     'django_filters',
 
+    'apps.core',
     'apps.user',
     'apps.city',
     'apps.message',
     'apps.card',
     'apps.chat',
     'apps.review',
+    'apps.sync',
 ]
 
 MIDDLEWARE = [
+    'utils.metrics.MetricsMiddleware',
+    'utils.db.query_stats.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'utils.db.replicas.ReplicaStickinessMiddleware',
+    'utils.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# debug_toolbar подключается только для отладки, чтобы не загружать его в каждом воркере
+if DEBUG:
+    INSTALLED_APPS.insert(0, 'debug_toolbar')
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.contrib.sessions.middleware.SessionMiddleware') + 1,
+                      'debug_toolbar.middleware.DebugToolbarMiddleware')
+
 AUTH_USER_MODEL = 'user.User'
 
 ROOT_URLCONF = 'project.urls'
@@ -80,6 +91,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'project.wsgi.application'
+# Под ASGI отдавать частые запросы на чтение через асинхронные представления (utils.routers.AsyncReadRouter)
+ASYNC_READ_VIEWS = bool(strtobool(os.getenv('ASYNC_READ_VIEWS', default='False')))
 
 CACHE_CONTROL_MAX_AGE = 3600
 X_FRAME_OPTIONS = 'SAMEORIGIN'
@@ -87,15 +100,67 @@ SECURE_REFERRER_POLICY = 'same-origin'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'utils.db.postgresql',
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT', default=5432)
+        'PORT': os.getenv('DB_PORT', default=5432),
+        # Постоянные соединения: переиспользуются между запросами потока в течение CONN_MAX_AGE секунд
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'CONN_HEALTH_CHECKS': True,
+        # Максимум соединений в процессе, чтобы воркеры не превысили max_connections Postgres
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+            'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', default=10)),
+        },
+        'OPTIONS': {
+            # Postgres закрывает соединения, простаивающие дольше DB_IDLE_TIMEOUT секунд
+            'options': f'-c idle_session_timeout={int(os.getenv("DB_IDLE_TIMEOUT", default=600)) * 1000}',
+        },
     }
 }
 
+# Реплики для чтения (utils.db.replicas): DB_REPLICA_HOSTS="replica-1 replica-2", остальные параметры как у default
+DATABASE_REPLICAS = []
+for index, host in enumerate(os.getenv('DB_REPLICA_HOSTS', default='').split(), start=1):
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{index}')
+DATABASE_ROUTERS = ['utils.db.replicas.ReplicaRouter']
+# Сколько секунд после изменения данных пользователь читает из основной БД (должно быть больше задержки реплик)
+DATABASE_REPLICA_STICKINESS = int(os.getenv('DB_REPLICA_STICKINESS', default=10))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE', default='redis://redis:6379/2'),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        }
+    },
+    # Кэш процесса перед Redis для данных, которые читаются почти в каждом запросе
+    # (пользователи для аутентификации, справочники, constance), с инвалидацией через Redis pub/sub
+    'local': {
+        'BACKEND': 'utils.cache_backends.TwoTierCache',
+        'LOCATION': 'default',
+        'TIMEOUT': 600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'LOCAL_TIMEOUT': 60,
+        }
+    },
+    # Черный список JWT: отдельная база Redis, которую не очищают и не вытесняют вместе с кэшем
+    # (сервер Redis должен работать с maxmemory-policy noeviction)
+    'token_blacklist': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('REDIS_TOKEN_BLACKLIST', default='redis://redis:6379/3'),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        }
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -123,7 +188,68 @@ STATICFILES_DIRS = [
 ]
 
 MEDIA_URL = '/media/'
+# Адрес сервера для ссылок на медиафайлы в ответах API (без / в конце). Пустой - ссылки строятся от адреса запроса,
+# это подходит только если API доступен по одному адресу: представления с ссылками кэшируются
+MEDIA_BASE_URL = os.getenv('MEDIA_BASE_URL', default='').rstrip('/')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+DEFAULT_FILE_STORAGE = 'utils.storages.MediaStorage'
+# Ссылки на медиафайлы подписаны и меняются раз в MEDIA_URL_EXPIRES секунд (должно быть больше времени
+# хранения представлений в кэше - MODEL_CACHE_TIMEOUT и MODEL_CACHE_STALE_TIMEOUT)
+MEDIA_URL_EXPIRES = 24 * 60 * 60
+# Медиафайлы после проверки ссылки отдает nginx из internal location (utils.media.ProtectedMediaView)
+MEDIA_ACCEL_REDIRECT = bool(strtobool(os.getenv('MEDIA_ACCEL_REDIRECT', default=str(not DEBUG))))
+MEDIA_ACCEL_REDIRECT_LOCATION = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60
+MEDIA_IMMUTABLE_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+# S3-совместимое хранилище медиафайлов (AWS S3, MinIO и т.д.), используется если задан бакет
+AWS_STORAGE_BUCKET_NAME = os.getenv('AWS_STORAGE_BUCKET_NAME')
+if AWS_STORAGE_BUCKET_NAME:
+    DEFAULT_FILE_STORAGE = 'utils.s3.S3MediaStorage'
+    AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
+    AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
+    AWS_S3_REGION_NAME = os.getenv('AWS_S3_REGION_NAME', default='us-east-1')
+    AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL')
+    # Адрес хранилища, доступный клиентам (для ссылок на загрузку и скачивание), если отличается от AWS_S3_ENDPOINT_URL
+    AWS_S3_PUBLIC_ENDPOINT_URL = os.getenv('AWS_S3_PUBLIC_ENDPOINT_URL', default=AWS_S3_ENDPOINT_URL)
+    AWS_S3_ADDRESSING_STYLE = os.getenv('AWS_S3_ADDRESSING_STYLE', default='path')
+    AWS_S3_SIGNATURE_VERSION = 's3v4'
+    AWS_S3_FILE_OVERWRITE = False
+    # Бакет закрыт: файлы отдаются по временным ссылкам после проверки в utils.media.ProtectedMediaView
+    AWS_DEFAULT_ACL = None
+    MEDIA_REDIRECT_URL_EXPIRES = 5 * 60
+
+# Загрузки пишутся во временный файл частями. В API размер ограничивается до того, как файл будет получен
+# целиком (utils.uploads.LimitedMultiPartParser)
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+# Максимальный размер загружаемых изображений по имени поля (в байтах)
+IMAGE_UPLOAD_MAX_SIZES = {
+    'avatar': 10 * 1024 * 1024,
+    'photo': 10 * 1024 * 1024,
+}
+UPLOAD_MAX_REQUEST_SIZE = 100 * 1024 * 1024
+# Сколько секунд действительна ссылка для загрузки фото карточки напрямую в хранилище
+CARD_PHOTO_UPLOAD_URL_EXPIRES = 600
+
+# Уменьшенные копии загруженных изображений (максимальная сторона в пикселях)
+CARD_PHOTO_VARIANTS = {
+    'thumbnail': 320,
+    'feed': 1080,
+    'full': 2048,
+}
+# Уменьшенные копии аватарок: ключи - суффиксы полей пользователя (avatar_thumbnail и т.д.)
+AVATAR_VARIANTS = {
+    'thumbnail': 320,
+    'feed': 1080,
+    'full': 2048,
+}
+AVATAR_PREVIEW_SIZE = 100
+# Через сколько секунд после удаления фото карточки удалять его файлы, если они больше не используются
+CARD_PHOTO_FILES_DELETE_DELAY = 600
+IMAGE_VARIANTS_FORMAT = os.getenv('IMAGE_VARIANTS_FORMAT', default='WEBP')
+IMAGE_VARIANTS_QUALITY = 80
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -132,8 +258,13 @@ USE_DJANGO_JQUERY = True
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'utils.uploads.LimitedMultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.user.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
@@ -147,6 +278,14 @@ CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TASK_IGNORE_RESULT = True
+# Порт, на котором воркер Celery отдает метрики Prometheus (utils.celery_metrics), 0 - не отдавать
+WORKER_METRICS_PORT = int(os.getenv('WORKER_METRICS_PORT', default=0))
+CELERY_BEAT_SCHEDULE = {
+    'delete-old-sync-changes': {
+        'task': 'apps.sync.tasks.delete_old_changes',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
 
 SPECTACULAR_SETTINGS = {
     'DEFAULT_GENERATOR_CLASS': 'drf_spectacular.generators.SchemaGenerator',
@@ -174,9 +313,82 @@ SIMPLE_JWT = {
     "USER_ID_CLAIM": "user_id",
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
+    "TOKEN_REFRESH_SERIALIZER": "apps.user.serializers.TokenRefreshSerializer",
+    "TOKEN_BLACKLIST_SERIALIZER": "apps.user.serializers.TokenBlacklistSerializer",
+}
+
+# Кэш пользователей для JWT-аутентификации (в секундах)
+USER_AUTH_CACHE_TIMEOUT = 300
+USER_AUTH_CACHE_VERSION = 1
+
+# Кэш сериализованных объектов моделей (utils.cache.ModelCache, в секундах)
+MODEL_CACHE_TIMEOUT = 600
+MODEL_CACHE_VERSION = 3
+# Сколько после истечения можно отдавать устаревшее значение, пока другой запрос его пересчитывает
+MODEL_CACHE_STALE_TIMEOUT = 60
+# Блокировка на время пересчета значения и сколько ждать пересчета другим запросом
+MODEL_CACHE_LOCK_TIMEOUT = 10
+MODEL_CACHE_WAIT_TIMEOUT = 2
+# Чем больше, тем раньше до истечения пересчитываются значения (0 - только после истечения)
+MODEL_CACHE_EARLY_REFRESH_BETA = 1.0
+# Лента карточек не инвалидируется при изменении карточек, поэтому хранится недолго
+CARD_FEED_CACHE_TIMEOUT = 60
+# Входит в ETag: менять при изменении формата ответов, чтобы клиенты не получали 304 на старые данные
+CONDITIONAL_GET_VERSION = 1
+
+# Статистика запросов к БД по действиям представлений (utils.db.query_stats)
+# Отдавать количество, время и самые медленные запросы в заголовках ответа (не на проде)
+QUERY_STATS_HEADERS = bool(strtobool(os.getenv('QUERY_STATS_HEADERS', default=str(DEBUG))))
+QUERY_STATS_SLOWEST = 3
+# Максимум запросов к БД на действие с холодным кэшем (не должен зависеть от количества объектов)
+QUERY_BUDGETS = {
+    'CardViewSet.list': 8,
+    'CardViewSet.by_owner': 6,
+    'CardViewSet.retrieve': 7,
+    'CardViewSet.tags': 4,
+    'CardViewSet.my_requests': 7,
+    'CardViewSet.get_requests': 6,
+    'ChatMessageViewSet.my_chats': 10,
+    'ChatMessageViewSet.retrieve': 13,
+    'UserViewSet.retrieve': 5,
+    'UserViewSet.show_me': 3,
+    'CityViewSet.list': 4,
+    'ReviewViewSet.list': 6,
+    'SyncViewSet.list': 12,
 }
+# Запросы дольше стольких миллисекунд записываются в журнал медленных запросов (0 - не записывать)
+# с планом, который снимается не чаще раза в SLOW_QUERY_PLAN_TIMEOUT секунд
+SLOW_QUERY_THRESHOLD = int(os.getenv('SLOW_QUERY_THRESHOLD', default=200))
+SLOW_QUERY_PLAN_TIMEOUT = 60 * 60
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'utils.db.query_stats': {
+            'handlers': ['console'],
+            'level': os.getenv('QUERY_STATS_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Профилирование запросов сотрудников (utils.profiling): заголовок или параметр запроса, который его включает,
+# и сколько самых затратных функций показывать в админке
+PROFILING_HEADER = 'X-Profile'
+PROFILING_QUERY_PARAM = 'profile'
+PROFILING_SUMMARY_SIZE = 50
+
+# Журнал изменений для синхронизации клиентов (apps.sync)
+SYNC_PAGE_SIZE = 500
+# Сколько дней хранится журнал (клиенты с более старым курсором загружают данные заново)
+SYNC_CHANGES_RETENTION = 30
 
 CONSTANCE_BACKEND = 'constance.backends.database.DatabaseBackend'
+CONSTANCE_DATABASE_CACHE_BACKEND = 'local'
 CONSTANCE_CONFIG = {
     'AUTHORIZATION_CODE_EXPIRES_IN': (3, 'Срок действия одноразового кода авторизации (в минутах)'),
     'AUTHORIZATION_CODE_COUNTDOWN': (1, 'Время, по истечении которого можно повторно запросить код для авторизации (в минутах)'),
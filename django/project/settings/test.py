@@ -0,0 +1,37 @@
+import os
+
+from .base import *
+
+# Тесты и бенчмарки (pytest). Без DB_HOST - на SQLite, с DB_HOST - на Postgres из переменных окружения
+SECRET_KEY = SECRET_KEY or 'test'
+
+if not os.getenv('DB_HOST'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+DATABASE_REPLICAS = []
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'local': {
+        'BACKEND': 'utils.cache_backends.TwoTierCache',
+        'LOCATION': 'default',
+    },
+    'token_blacklist': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'token_blacklist',
+    },
+}
+
+CELERY_TASK_ALWAYS_EAGER = True
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media', 'test')
+SLOW_QUERY_THRESHOLD = 0
+
+# Коды авторизации отправляются через TestSender и возвращаются в ответе create-otp
+os.environ.setdefault('APP_DEBUG', '1')
@@ -1,25 +1,30 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from apps.core.views import MetricsView
+from utils.media import ProtectedMediaView
+
 api_patterns = [
+    path('', include('apps.core.urls')),
     path('', include('apps.user.urls')),
     path('', include('apps.city.urls')),
     path('', include('apps.card.urls')),
     path('', include('apps.chat.urls')),
     path('', include('apps.review.urls')),
+    path('', include('apps.sync.urls')),
 ]
 
 urlpatterns = [
     path('api/', include(api_patterns)),
     path('admin/', admin.site.urls),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$', ProtectedMediaView.as_view(), name='media'),
 ]
 
-if settings.DEBUG:
+if 'debug_toolbar' in settings.INSTALLED_APPS:
     import debug_toolbar
     urlpatterns += [path('__debug__/', include(debug_toolbar.urls))]
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
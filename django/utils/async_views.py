@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, wraps
+
+from asgiref.sync import SyncToAsync, sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class DatabaseSyncToAsync(SyncToAsync):
+    """sync_to_async для кода, работающего с БД, в общем пуле потоков (thread_sensitive=False).
+
+    У каждого потока свое соединение с БД, поэтому до и после вызова устаревшие соединения закрываются,
+    как это делает обработчик запроса для основного потока
+    """
+
+    def thread_handler(self, loop, *args, **kwargs):
+        close_old_connections()
+        try:
+            return super().thread_handler(loop, *args, **kwargs)
+        finally:
+            close_old_connections()
+
+
+@cache
+def get_database_executor() -> ThreadPoolExecutor:
+    """Пул потоков для работы с БД.
+    Каждый поток держит свое соединение, поэтому потоков не больше, чем соединений в POOL['MAX_SIZE']
+    за вычетом одного для основного потока
+    """
+    max_size = settings.DATABASES['default'].get('POOL', {}).get('MAX_SIZE')
+    return ThreadPoolExecutor(max_workers=max(max_size - 1, 1) if max_size else None,
+                              thread_name_prefix='database_sync_to_async')
+
+
+def database_sync_to_async(func):
+    return DatabaseSyncToAsync(func, thread_sensitive=False, executor=get_database_executor())
+
+
+def async_read_view(view):
+    """Асинхронная обертка над синхронным представлением DRF.
+
+    В Django 3.2 под ASGI все синхронные представления выполняются в одном потоке, поэтому воркер
+    обрабатывает запросы по одному. Чтение (GET, HEAD, OPTIONS) выполняется целиком - аутентификация,
+    запросы к БД, сериализация и рендеринг - в пуле потоков, и один воркер ждет ответов БД для нескольких
+    запросов одновременно. Остальные методы выполняются как обычно, в основном потоке
+    """
+
+    def render_view(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    read_view = database_sync_to_async(render_view)
+    write_view = sync_to_async(render_view, thread_sensitive=True)
+
+    @wraps(view)
+    async def wrapped_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await read_view(request, *args, **kwargs)
+        return await write_view(request, *args, **kwargs)
+
+    return wrapped_view
@@ -0,0 +1,306 @@
+import hashlib
+import math
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .db.replicas import read_from_primary
+from .metrics import MODEL_CACHE_REQUESTS
+from .storages import get_media_urls_changed_at
+
+
+@dataclass
+class CachedValue:
+    """Значение в кэше с временем логического истечения и временем вычисления (в секундах)"""
+    value: Any
+    expires_at: float
+    build_time: float
+
+    def should_refresh(self, beta: float) -> bool:
+        """Пора ли пересчитать значение: после истечения или заранее с вероятностью, которая растет
+        по мере приближения к истечению и тем выше, чем дольше вычисляется значение (XFetch)
+        """
+        return time.time() - self.build_time * beta * math.log(1 - random.random()) >= self.expires_at  # noqa: S311
+
+
+class ModelCache:
+    """Кэш сериализованных представлений объектов модели в Redis
+
+    Записи сбрасываются после коммита транзакции по сигналам моделей (см. signals.py приложений): invalidate
+    увеличивает версию объекта, которая входит в ключ записи. Запрос, который начал пересчет до изменения,
+    запишет результат под прежней версией, и его уже никто не прочитает.
+    Ключи версионируются: MODEL_CACHE_VERSION меняется при изменении формата всех записей,
+    version - при изменении сериализатора одного кэша. Представления не должны зависеть от адреса запроса:
+    ссылки на файлы строятся от MEDIA_BASE_URL (utils.storages.SignedMediaUrlMixin).
+    Справочники, которые читаются почти в каждом запросе, кэшируются еще и в процессе (backend='local').
+
+    Промахи объединяются (single-flight): значение пересчитывает один запрос под короткой блокировкой в Redis,
+    остальные отдают устаревшее значение (оно хранится еще MODEL_CACHE_STALE_TIMEOUT секунд после истечения)
+    или ждут пересчета до MODEL_CACHE_WAIT_TIMEOUT секунд. Часто читаемые значения пересчитываются заранее,
+    до истечения (см. CachedValue.should_refresh)
+    """
+    registry: dict[str, 'ModelCache'] = {}
+    WAIT_INTERVAL = 0.05
+
+    def __init__(self, name: str, version: int = 1, timeout: int | None = None, backend: str = 'default'):
+        self.name = name
+        self.version = version
+        self.timeout = timeout
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        ModelCache.registry[name] = self
+
+    @property
+    def _cache(self):
+        return caches[self.backend]
+
+    def _get_key(self, key) -> str:
+        return f'model:{self.name}:{self.version}:{key}'
+
+    def _get_version_key(self, key) -> str:
+        return f'{self._get_key(key)}:version'
+
+    def _get_current_keys(self, keys: list) -> dict:
+        """Ключи записей с текущими версиями объектов"""
+        version_keys = {key: self._get_version_key(key) for key in keys}
+        versions = self._cache.get_many(list(version_keys.values()), version=settings.MODEL_CACHE_VERSION)
+        return {key: f'{self._get_key(key)}:{versions.get(version_key, 0)}'
+                for key, version_key in version_keys.items()}
+
+    def _get_current_key(self, key) -> str:
+        return self._get_current_keys([key])[key]
+
+    def _record(self, event: str, count: int = 1) -> None:
+        with self._lock:
+            self._stats[event] += count
+        MODEL_CACHE_REQUESTS.labels(self.name, event).inc(count)
+
+    def _get_cached(self, cache_key: str) -> CachedValue | None:
+        return self._cache.get(cache_key, version=settings.MODEL_CACHE_VERSION)
+
+    def _set(self, cache_key: str, value, build_time: float = 0) -> None:
+        timeout = self.timeout or settings.MODEL_CACHE_TIMEOUT
+        self._cache.set(cache_key, CachedValue(value=value, expires_at=time.time() + timeout, build_time=build_time),
+                        timeout=timeout + settings.MODEL_CACHE_STALE_TIMEOUT, version=settings.MODEL_CACHE_VERSION)
+
+    def get(self, key) -> Any | None:
+        """Получить неустаревшее представление из кэша"""
+        cached = self._get_cached(self._get_current_key(key))
+        if cached is None or cached.expires_at <= time.time():
+            return None
+        return cached.value
+
+    def set(self, key, value, build_time: float = 0) -> None:  # noqa: A003
+        """Положить представление в кэш под текущей версией объекта"""
+        self._set(self._get_current_key(key), value, build_time=build_time)
+
+    def get_or_set(self, key, default: Callable[[], Any]) -> Any:
+        """Получить представление из кэша, при промахе - вычислить и положить в кэш.
+        Представление вычисляется по основной БД, чтобы не закэшировать отстающие данные реплики
+        """
+        # Версия читается до вычисления: значение, вычисленное до изменения, не попадет в новую версию
+        cache_key = self._get_current_key(key)
+        cached = self._get_cached(cache_key)
+        if cached is not None and not cached.should_refresh(settings.MODEL_CACHE_EARLY_REFRESH_BETA):
+            self._record('hits')
+            return cached.value
+
+        lock_key = f'{cache_key}:lock'
+        if self._cache.add(lock_key, True, timeout=settings.MODEL_CACHE_LOCK_TIMEOUT,
+                           version=settings.MODEL_CACHE_VERSION):
+            try:
+                if cached is None:
+                    self._record('misses')
+                elif cached.expires_at > time.time():
+                    self._record('early_refreshes')
+                else:
+                    self._record('refreshes')
+                return self._build(cache_key, default)
+            finally:
+                self._cache.delete(lock_key, version=settings.MODEL_CACHE_VERSION)
+
+        # Значение уже пересчитывает другой запрос
+        if cached is not None:
+            self._record('stale_hits')
+            return cached.value
+        deadline = time.monotonic() + settings.MODEL_CACHE_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(self.WAIT_INTERVAL)
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                self._record('coalesced')
+                return cached.value
+        self._record('wait_timeouts')
+        return self._build(cache_key, default)
+
+    def get_or_set_many(self, keys: list, default: Callable[[list], dict]) -> dict:
+        """Получить представления нескольких объектов одним запросом в кэш. Промахи вычисляются одним вызовом
+        default(ключи промахов), который возвращает словарь ключ - представление (без объединения промахов
+        разных запросов). Отсутствующих в результате default объектов нет и в ответе
+        """
+        cache_keys = self._get_current_keys(keys)
+        entries = self._cache.get_many(list(cache_keys.values()), version=settings.MODEL_CACHE_VERSION)
+        now = time.time()
+        values, missing = {}, []
+        for key, cache_key in cache_keys.items():
+            cached = entries.get(cache_key)
+            if cached is not None and cached.expires_at > now:
+                values[key] = cached.value
+            else:
+                missing.append(key)
+        self._record('hits', len(values))
+        if not missing:
+            return values
+
+        self._record('misses', len(missing))
+        started_at = time.monotonic()
+        with read_from_primary():
+            built = default(missing)
+        timeout = self.timeout or settings.MODEL_CACHE_TIMEOUT
+        build_time = (time.monotonic() - started_at) / len(missing)
+        self._cache.set_many({cache_keys[key]: CachedValue(value=value, expires_at=time.time() + timeout,
+                                                               build_time=build_time)
+                              for key, value in built.items()},
+                             timeout=timeout + settings.MODEL_CACHE_STALE_TIMEOUT, version=settings.MODEL_CACHE_VERSION)
+        return {**values, **built}
+
+    def _build(self, cache_key: str, default: Callable[[], Any]) -> Any:
+        started_at = time.monotonic()
+        with read_from_primary():
+            value = default()
+        self._set(cache_key, value, build_time=time.monotonic() - started_at)
+        return value
+
+    def invalidate(self, *keys) -> None:
+        """Сбросить записи после коммита текущей транзакции: увеличить версии объектов"""
+        version_keys = [self._get_version_key(key) for key in keys]
+        if version_keys:
+            transaction.on_commit(lambda: self._increment(*version_keys))
+
+    def _increment(self, *version_keys: str) -> None:
+        for version_key in version_keys:
+            try:
+                self._cache.incr(version_key, version=settings.MODEL_CACHE_VERSION)
+            except ValueError:
+                self._cache.add(version_key, 1, timeout=None, version=settings.MODEL_CACHE_VERSION)
+
+    def get_stats(self) -> dict:
+        """Статистика кэша в текущем процессе: попадания (в том числе устаревшие значения и ожидание
+        пересчета другим запросом), промахи и пересчеты
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        served = stats.get('hits', 0) + stats.get('stale_hits', 0) + stats.get('coalesced', 0)
+        total = sum(stats.values())
+        return {**stats, 'hit_ratio': round(served / total, 4) if total else None}
+
+
+class ModelListCache(ModelCache):
+    """Кэш списков объектов модели (например, id карточек ленты по фильтрам запроса).
+
+    Изменение любого объекта может изменить любой из списков, поэтому вместо версий отдельных записей
+    у всех ключей одно поколение: invalidate_all увеличивает его после коммита транзакции
+    """
+
+    def _get_generation_key(self) -> str:
+        return f'model:{self.name}:{self.version}:generation'
+
+    def _get_current_keys(self, keys: list) -> dict:
+        generation = self._cache.get(self._get_generation_key(), 0, version=settings.MODEL_CACHE_VERSION)
+        return {key: f'{self._get_key(key)}:{generation}' for key in keys}
+
+    def invalidate_all(self) -> None:
+        """Сбросить все списки после коммита текущей транзакции"""
+        transaction.on_commit(lambda: self._increment(self._get_generation_key()))
+
+
+class CachedRetrieveMixin:
+    """Примесь к ViewSet: retrieve отдает представление объекта из кэша retrieve_cache без запросов в БД.
+
+    Подходит только для представлений без проверки прав на объект: при попадании get_object не вызывается
+    """
+    retrieve_cache: ModelCache
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        data = self.retrieve_cache.get_or_set(lookup, lambda: self.get_cached_data(self.get_object()))
+        return Response(self.get_response_data(data), status=status.HTTP_200_OK)
+
+    def get_cached_data(self, instance) -> dict:
+        """Представление объекта, которое кладется в кэш (не должно зависеть от пользователя)"""
+        return self.get_serializer(instance).data
+
+    def get_response_data(self, data: dict) -> dict:
+        """Ответ для текущего пользователя из закэшированного представления"""
+        return data
+
+
+class NotModified(Exception):
+    """Ресурс не изменился с версии клиента, ответ - 304 Not Modified"""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """Примесь к ViewSet: GET действий из conditional_actions отвечает 304 Not Modified без сериализации,
+    если ресурс не изменился с версии клиента (If-None-Match/If-Modified-Since).
+
+    Подкласс определяет get_version() - версию ресурса по столбцам updated_at, а не по телу ответа:
+    время последнего изменения и, если ответ зависит еще от чего-то (например, от текущего пользователя),
+    остальные части ETag. None - ресурс не найден, запрос выполняется как обычно.
+    Last-Modified отправляется только для версий без остальных частей: по одному времени изменения
+    клиент с If-Modified-Since получил бы 304 и на ответ, который изменился из-за них
+    """
+    conditional_actions: tuple[str, ...] = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._conditional_headers = None
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+        version = self.get_version()
+        if version is None or version[0] is None:
+            return
+        last_modified, *parts = version
+        # Подписанные ссылки на файлы в ответе меняются с началом нового срока их действия
+        last_modified = max(last_modified, get_media_urls_changed_at())
+        # Время изменения описывает ответ целиком, только если других частей версии нет
+        timestamp = None if parts else int(last_modified.timestamp())
+        # Адрес запроса и формат ответов
+        parts += [self.action, request.get_full_path(), settings.CONDITIONAL_GET_VERSION]
+        etag = quote_etag(hashlib.md5(  # noqa: S324
+            ':'.join(map(str, (last_modified.isoformat(), *parts))).encode()).hexdigest())
+        self._conditional_headers = {'ETag': etag}
+        if timestamp is not None:
+            self._conditional_headers['Last-Modified'] = http_date(timestamp)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, '_conditional_headers', None) and response.status_code in (status.HTTP_200_OK,
+                                                                                     status.HTTP_304_NOT_MODIFIED):
+            for header, value in self._conditional_headers.items():
+                response[header] = value
+            response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -0,0 +1,305 @@
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .metrics import CACHE_TIER_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def _get_hit_stats(hits: int, misses: int) -> dict:
+    return {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None}
+
+
+class LocalTier:
+    """Ограниченный LRU-кэш процесса с временем жизни записей.
+    Хранит сериализованные значения, чтобы потоки не делили один объект
+    """
+
+    def __init__(self, max_size: int, timeout: float):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return pickle.loads(entry[1])  # noqa: S301
+
+    def set(self, key: str, value, timeout: float | None) -> None:  # noqa: A003
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        if timeout <= 0:
+            self.delete([key])
+            return
+        entry = (time.monotonic() + timeout, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, keys) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def reset(self) -> None:
+        """Очистить кэш в новом процессе после fork (блокировку мог держать другой поток родителя)"""
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {'size': len(self._data), 'max_size': self.max_size, **_get_hit_stats(self.hits, self.misses)}
+
+
+class RemoteStats:
+    """Попадания в кэш LOCATION при промахах кэша процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, is_hit: bool) -> None:
+        with self._lock:
+            if is_hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return _get_hit_stats(self.hits, self.misses)
+
+
+class Invalidator:
+    """Рассылка и прием сообщений об изменении ключей через Redis pub/sub.
+
+    Каждый процесс слушает канал в фоновом потоке и удаляет измененные ключи из своего LocalTier.
+    После переподключения к Redis LocalTier очищается целиком: сообщения за время разрыва потеряны
+    """
+    RECONNECT_DELAY = 1
+
+    def __init__(self, redis_alias: str, channel: str, local: LocalTier):
+        self.redis_alias = redis_alias
+        self.channel = channel
+        self.local = local
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        # После fork поток-слушатель остается только в родителе
+        self.process_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _get_connection(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection(self.redis_alias)
+
+    def start(self) -> None:
+        """Запустить поток-слушатель, если он еще не запущен в этом процессе"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name=f'cache-invalidator-{self.channel}',
+                                                daemon=True)
+                self._thread.start()
+
+    def publish(self, keys: list[str] | None) -> None:
+        """Сообщить остальным процессам об изменении ключей (None - очистить кэш целиком)"""
+        message = json.dumps({'sender': self.process_id, 'keys': keys})
+        try:
+            self._get_connection().publish(self.channel, message)
+        except Exception:
+            logger.exception('Не удалось отправить сообщение об инвалидации кэша')
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._get_connection().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self.local.clear()
+                for message in pubsub.listen():
+                    self._handle(message['data'])
+            except Exception:
+                logger.exception('Потеряно соединение с каналом инвалидации кэша')
+                self.local.clear()
+                time.sleep(self.RECONNECT_DELAY)
+
+    def _handle(self, data: bytes) -> None:
+        message = json.loads(data)
+        if message['sender'] == self.process_id:
+            return
+        if message['keys'] is None:
+            self.local.clear()
+        else:
+            self.local.delete(message['keys'])
+
+
+# Кэш процесса общий для всех потоков (Django создает экземпляры бэкенда кэша для каждого потока отдельно)
+_tiers: dict[str, tuple[LocalTier, RemoteStats, Invalidator | None]] = {}
+_tiers_lock = threading.Lock()
+
+
+def _reset_tiers_after_fork() -> None:
+    for local, remote_stats, _ in _tiers.values():
+        local.reset()
+        remote_stats.reset()
+
+
+os.register_at_fork(after_in_child=_reset_tiers_after_fork)
+
+
+class TwoTierCache(BaseCache):
+    """Бэкенд кэша: LRU-кэш процесса перед кэшем LOCATION (Redis).
+
+    Запись и удаление идут в оба уровня: сначала в Redis, затем остальные процессы (воркеры gunicorn и Celery)
+    узнают об изменении через Redis pub/sub и удаляют ключ из своего кэша, поэтому они не могут снова прочитать
+    из Redis старое значение. Если сообщение потеряно, устаревшее значение живет в процессе не дольше
+    OPTIONS['LOCAL_TIMEOUT'] секунд.
+
+    Ключи в LOCATION хранятся с префиксом KEY_PREFIX (по умолчанию - tiered), и clear удаляет только их,
+    а не всю базу Redis, которую используют и другие кэши.
+
+    OPTIONS:
+    - MAX_ENTRIES - максимум записей в кэше процесса;
+    - LOCAL_TIMEOUT - время жизни записи в кэше процесса (секунды).
+    Без django-redis в LOCATION (например, LocMemCache в тестах) сообщения не рассылаются.
+    """
+
+    def __init__(self, location: str, params: dict):
+        super().__init__(params)
+        self._remote_alias = location or 'default'
+        self.key_prefix = self.key_prefix or 'tiered'
+        options = params.get('OPTIONS', {})
+        with _tiers_lock:
+            if self._remote_alias not in _tiers:
+                local = LocalTier(max_size=self._max_entries, timeout=options.get('LOCAL_TIMEOUT', 60))
+                invalidator = None
+                if caches.settings[self._remote_alias]['BACKEND'].startswith('django_redis.'):
+                    invalidator = Invalidator(self._remote_alias, f'cache:invalidate:{self._remote_alias}', local)
+                _tiers[self._remote_alias] = (local, RemoteStats(), invalidator)
+        self._local, self._remote_stats, self._invalidator = _tiers[self._remote_alias]
+
+    @property
+    def _remote(self) -> BaseCache:
+        return caches[self._remote_alias]
+
+    def _get_local_timeout(self, timeout) -> float | None:
+        timeout = self.get_backend_timeout(timeout)
+        return None if timeout is None else timeout - time.time()
+
+    def _invalidate(self, keys: list[str] | None) -> None:
+        if keys is None:
+            self._local.clear()
+        else:
+            self._local.delete(keys)
+        if self._invalidator is not None:
+            self._invalidator.publish(keys)
+
+    def get(self, key, default=None, version=None):
+        if self._invalidator is not None:
+            self._invalidator.start()
+        local_key = self.make_key(key, version)
+        value = self._local.get(local_key)
+        if value is not None:
+            CACHE_TIER_REQUESTS.labels(self._remote_alias, 'local', 'hits').inc()
+            return value
+        CACHE_TIER_REQUESTS.labels(self._remote_alias, 'local', 'misses').inc()
+
+        value = self._remote.get(local_key)
+        self._remote_stats.record(value is not None)
+        CACHE_TIER_REQUESTS.labels(self._remote_alias, 'remote', 'misses' if value is None else 'hits').inc()
+        if value is None:
+            return default
+        self._local.set(local_key, value, self.default_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        return {key: value for key in keys if (value := self.get(key, version=version)) is not None}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):  # noqa: A003
+        local_key = self.make_key(key, version)
+        self._remote.set(local_key, value, timeout=self._get_remote_timeout(timeout))
+        self._invalidate([local_key])
+        self._local.set(local_key, value, self._get_local_timeout(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_key(key, version)
+        is_added = self._remote.add(local_key, value, timeout=self._get_remote_timeout(timeout))
+        if is_added:
+            self._invalidate([local_key])
+        return is_added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        data = {self.make_key(key, version): value for key, value in data.items()}
+        self._remote.set_many(data, timeout=self._get_remote_timeout(timeout))
+        self._invalidate(list(data))
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_key(key, version)
+        is_touched = self._remote.touch(local_key, timeout=self._get_remote_timeout(timeout))
+        # Время жизни в кэше процесса тоже меняется: значение будет заново прочитано из Redis
+        self._invalidate([local_key])
+        return is_touched
+
+    def delete(self, key, version=None):
+        local_key = self.make_key(key, version)
+        is_deleted = self._remote.delete(local_key)
+        self._invalidate([local_key])
+        return is_deleted
+
+    def delete_many(self, keys, version=None):
+        local_keys = [self.make_key(key, version) for key in keys]
+        self._remote.delete_many(local_keys)
+        self._invalidate(local_keys)
+
+    def incr(self, key, delta=1, version=None):
+        local_key = self.make_key(key, version)
+        value = self._remote.incr(local_key, delta)
+        self._invalidate([local_key])
+        return value
+
+    def clear(self):
+        if hasattr(self._remote, 'delete_pattern'):
+            self._remote.delete_pattern(f'{self.key_prefix}:*')
+        else:
+            # Кэш без удаления по шаблону (LocMemCache в тестах) очищается целиком
+            self._remote.clear()
+        self._invalidate(None)
+
+    def _get_remote_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def get_stats(self) -> dict:
+        """Попадания в кэш процесса и в Redis (для промахов кэша процесса)"""
+        return {'local': self._local.get_stats(), 'remote': self._remote_stats.get_stats()}
@@ -0,0 +1,149 @@
+import logging
+import os
+import time
+from datetime import datetime
+from functools import cache
+
+from celery import current_app
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_init,
+    worker_process_shutdown,
+)
+from django.conf import settings
+from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# Метрики задач Celery. Воркер отдает их на порту WORKER_METRICS_PORT, длина очередей в брокере
+# отдается вместе с метриками Django (/metrics, см. QueueLengthCollector).
+# Задачи выполняются в дочерних процессах воркера, поэтому нужна переменная окружения PROMETHEUS_MULTIPROC_DIR
+
+TASK_DURATION = Histogram(
+    'celery_task_duration_seconds', 'Время выполнения задачи', ('task', 'state'),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+TASK_QUEUE_WAIT = Histogram(
+    'celery_task_queue_wait_seconds', 'Время от отправки задачи (или ее ETA) до начала выполнения', ('task',),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900),
+)
+TASKS = Counter('celery_tasks_total', 'Выполненные задачи по итоговому состоянию', ('task', 'state'))
+TASK_RETRIES = Counter('celery_task_retries_total', 'Повторы задач', ('task',))
+TASK_FAILURES = Counter('celery_task_failures_total', 'Ошибки задач по типу исключения', ('task', 'exception'))
+
+# Время начала выполняемых в процессе задач по id
+_started_at: dict[str, float] = {}
+
+
+@before_task_publish.connect
+def set_published_at(headers=None, **kwargs):
+    # Повторная отправка (retry) тоже перезаписывает время
+    if headers is not None:
+        headers['published_at'] = time.time()
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    now = time.time()
+    _started_at[task_id] = time.perf_counter()
+    published_at = getattr(task.request, 'published_at', None)
+    if published_at is None:
+        return
+    eta = task.request.eta
+    if eta:
+        published_at = max(published_at, datetime.fromisoformat(eta).timestamp())
+    TASK_QUEUE_WAIT.labels(task.name).observe(max(now - published_at, 0))
+
+
+@task_postrun.connect
+def record_task_end(task_id=None, task=None, state=None, **kwargs):
+    started_at = _started_at.pop(task_id, None)
+    state = state or 'UNKNOWN'
+    if started_at is not None:
+        TASK_DURATION.labels(task.name, state).observe(time.perf_counter() - started_at)
+    TASKS.labels(task.name, state).inc()
+
+
+@task_retry.connect
+def record_task_retry(sender=None, **kwargs):
+    TASK_RETRIES.labels(sender.name).inc()
+
+
+@task_failure.connect
+def record_task_failure(sender=None, exception=None, **kwargs):
+    TASK_FAILURES.labels(sender.name, type(exception).__name__).inc()
+
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    if not settings.WORKER_METRICS_PORT:
+        return
+    multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        # Файлы прошлого запуска удаляются до старта воркера (docker-compose.stage.yaml), здесь - уже поздно:
+        # в каталог пишут и процессы текущего запуска
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(settings.WORKER_METRICS_PORT, registry=registry)
+    else:
+        start_http_server(settings.WORKER_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def mark_process_dead(pid=None, **kwargs):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+@cache
+def _get_broker_client():
+    import redis
+    # Сбор метрик не должен зависать, если брокер недоступен
+    return redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_timeout=1, socket_connect_timeout=1)
+
+
+class QueueLengthCollector:
+    """Длина очередей Celery в брокере Redis в момент сбора метрик: задачи, которые ждут воркера
+    (с учетом очередей приоритетов kombu), и задачи, которые воркеры получили, но еще не подтвердили
+    (в том числе отложенные по ETA)
+    """
+    PRIORITY_SEPARATOR = '\x06\x16'
+    PRIORITY_STEPS = (3, 6, 9)
+
+    def collect(self):
+        broker_up = GaugeMetricFamily('celery_broker_up', 'Брокер Celery доступен')
+        if not (settings.CELERY_BROKER_URL or '').startswith(('redis://', 'rediss://')):
+            return
+        queue_names = sorted(current_app.amqp.queues)
+        try:
+            with _get_broker_client().pipeline(transaction=False) as pipeline:
+                for name in queue_names:
+                    pipeline.llen(name)
+                    for priority in self.PRIORITY_STEPS:
+                        pipeline.llen(f'{name}{self.PRIORITY_SEPARATOR}{priority}')
+                pipeline.hlen('unacked')
+                lengths = pipeline.execute()
+        except Exception:
+            logger.exception('Не удалось получить длину очередей Celery')
+            broker_up.add_metric([], 0)
+            yield broker_up
+            return
+        broker_up.add_metric([], 1)
+        yield broker_up
+
+        queue_length = GaugeMetricFamily('celery_queue_length', 'Задачи в очереди брокера', labels=('queue',))
+        step = len(self.PRIORITY_STEPS) + 1
+        for index, name in enumerate(queue_names):
+            queue_length.add_metric([name], sum(lengths[index * step:(index + 1) * step]))
+        yield queue_length
+        yield GaugeMetricFamily('celery_unacked_tasks', 'Задачи, полученные воркерами, но еще не выполненные',
+                                value=lengths[-1])
+
+
+queue_registry = CollectorRegistry()
+queue_registry.register(QueueLengthCollector())
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.utils import OperationalError
+
+
+class ConnectionPool:
+    """Ограничение количества соединений с БД в процессе и их статистика.
+
+    Соединения Django привязаны к потоку и не передаются между потоками, поэтому это не пул
+    в классическом смысле: каждое открытое соединение занимает место, пока не будет закрыто.
+    Если места нет, поток ждет до TIMEOUT секунд, а потоки с постоянными соединениями
+    отдают их в конце запроса (см. PooledDatabaseWrapperMixin.close_if_unusable_or_obsolete).
+    """
+
+    def __init__(self, alias: str, max_size: int | None = None, timeout: float = 10):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self._condition = threading.Condition()
+        self.in_use = 0
+        self.waiting = 0
+        self.connects = 0
+        self.connect_time_total = 0.0
+        self.connect_time_max = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+        self.health_check_failures = 0
+
+    def acquire(self) -> None:
+        """Занять место для нового соединения"""
+        with self._condition:
+            if self.max_size and self.in_use >= self.max_size:
+                started_at = time.monotonic()
+                self.waiting += 1
+                try:
+                    is_acquired = self._condition.wait_for(lambda: self.in_use < self.max_size, timeout=self.timeout)
+                finally:
+                    self.waiting -= 1
+                self.wait_time_max = max(self.wait_time_max, time.monotonic() - started_at)
+                if not is_acquired:
+                    self.timeouts += 1
+                    raise OperationalError(f'Нет свободных соединений с БД "{self.alias}" '
+                                           f'(занято {self.in_use} из {self.max_size}).')
+            self.in_use += 1
+
+    def release(self) -> None:
+        """Освободить место закрытого соединения"""
+        with self._condition:
+            self.in_use -= 1
+            self._condition.notify()
+
+    def record_connect(self, duration: float) -> None:
+        with self._condition:
+            self.connects += 1
+            self.connect_time_total += duration
+            self.connect_time_max = max(self.connect_time_max, duration)
+
+    def record_health_check_failure(self) -> None:
+        with self._condition:
+            self.health_check_failures += 1
+
+    def get_stats(self) -> dict:
+        """Статистика соединений процесса, время в миллисекундах"""
+        with self._condition:
+            return {
+                'pid': os.getpid(),
+                'max_size': self.max_size,
+                'in_use': self.in_use,
+                'waiting': self.waiting,
+                'connects': self.connects,
+                'connect_time_avg': round(self.connect_time_total / self.connects * 1000, 2) if self.connects else None,
+                'connect_time_max': round(self.connect_time_max * 1000, 2),
+                'wait_time_max': round(self.wait_time_max * 1000, 2),
+                'timeouts': self.timeouts,
+                'health_check_failures': self.health_check_failures,
+            }
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, options: dict | None = None) -> ConnectionPool:
+    """Получить пул соединений для БД (один на процесс)"""
+    with _pools_lock:
+        if alias not in _pools:
+            options = options or {}
+            _pools[alias] = ConnectionPool(alias, max_size=options.get('MAX_SIZE'), timeout=options.get('TIMEOUT', 10))
+        return _pools[alias]
+
+
+def get_pools_stats() -> dict[str, dict]:
+    """Статистика всех пулов процесса"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.alias: pool.get_stats() for pool in pools}
+
+
+class PooledDatabaseWrapperMixin:
+    """Примесь к DatabaseWrapper: ограничение количества соединений, статистика и проверка соединения
+    перед повторным использованием.
+
+    Настройки БД:
+    - CONN_HEALTH_CHECKS - проверять постоянное соединение (CONN_MAX_AGE) перед первым запросом
+      в новом запросе к серверу и переподключаться, если оно разорвано (как в Django 4.1+);
+    - POOL - {'MAX_SIZE': максимум соединений в процессе, 'TIMEOUT': сколько секунд ждать свободного места}.
+    """
+
+    def __init__(self, settings_dict, alias=DEFAULT_DB_ALIAS):
+        super().__init__(settings_dict, alias)
+        self.health_check_enabled = settings_dict.get('CONN_HEALTH_CHECKS', False)
+        self.health_check_done = False
+        self.pool = get_pool(alias, settings_dict.get('POOL'))
+        self._holds_pool_slot = False
+
+    def get_new_connection(self, conn_params):
+        self.pool.acquire()
+        started_at = time.monotonic()
+        try:
+            connection = super().get_new_connection(conn_params)
+        except BaseException:
+            self.pool.release()
+            raise
+        self._holds_pool_slot = True
+        self.pool.record_connect(time.monotonic() - started_at)
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            self._release_pool_slot()
+
+    def _release_pool_slot(self):
+        if getattr(self, '_holds_pool_slot', False):
+            self._holds_pool_slot = False
+            self.pool.release()
+
+    def __del__(self):
+        # Соединение потока, который завершился, не закрывается явно
+        self._release_pool_slot()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        if self.connection is None or self.in_atomic_block:
+            return
+        if self.pool.waiting:
+            # Отдать соединение потокам, которые ждут свободного места
+            self.close()
+        else:
+            self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        """Закрыть постоянное соединение, если оно больше не работает (например, закрыто сервером)"""
+        if self.connection is None or not self.health_check_enabled or self.health_check_done or self.in_atomic_block:
+            return
+        if not self.is_usable():
+            self.pool.record_health_check_failure()
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
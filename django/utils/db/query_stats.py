@@ -0,0 +1,162 @@
+import heapq
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.deprecation import MiddlewareMixin
+
+from .slow_queries import current_view_name, log_slow_query
+from ..views import get_view_name
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Запросы к БД, выполненные при обработке одного запроса к серверу"""
+
+    def __init__(self, slowest_size: int = 3):
+        self.count = 0
+        self.duration = 0.0
+        self._slowest: list[tuple[float, str]] = []
+        self._slowest_size = slowest_size
+
+    def record(self, sql: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        if len(self._slowest) < self._slowest_size:
+            heapq.heappush(self._slowest, (duration, sql))
+        else:
+            heapq.heappushpop(self._slowest, (duration, sql))
+
+    @property
+    def slowest(self) -> list[tuple[float, str]]:
+        """Самые медленные запросы: (время в секундах, SQL)"""
+        return sorted(self._slowest, reverse=True)
+
+
+# Статистика текущего запроса к серверу (None - запросы не учитываются).
+# Переходит в потоки, в которых выполняются асинхронные представления (utils.async_views)
+_query_stats: ContextVar[QueryStats | None] = ContextVar('query_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper соединения с БД: учитывает запрос в статистике текущего запроса к серверу
+    и отправляет запросы дольше SLOW_QUERY_THRESHOLD в журнал медленных запросов
+    """
+    started_at = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started_at
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.record(sql, duration)
+        if settings.SLOW_QUERY_THRESHOLD and duration * 1000 >= settings.SLOW_QUERY_THRESHOLD:
+            log_slow_query(context['connection'], sql, params, many, duration)
+
+
+def install_query_recorder(connection) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def install_query_recorder_on_connect(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+class ActionQueryStats:
+    """Запросы к БД по действиям представлений в процессе"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._actions: dict[str, dict] = {}
+
+    def record(self, view_name: str, stats: QueryStats, is_over_budget: bool) -> None:
+        with self._lock:
+            action = self._actions.setdefault(view_name, {
+                'requests': 0, 'queries': 0, 'queries_max': 0, 'time': 0.0, 'time_max': 0.0, 'over_budget': 0,
+            })
+            action['requests'] += 1
+            action['queries'] += stats.count
+            action['queries_max'] = max(action['queries_max'], stats.count)
+            action['time'] += stats.duration
+            action['time_max'] = max(action['time_max'], stats.duration)
+            action['over_budget'] += is_over_budget
+
+    def get_stats(self) -> dict[str, dict]:
+        """Статистика по действиям, время в миллисекундах"""
+        with self._lock:
+            actions = {view_name: dict(action) for view_name, action in self._actions.items()}
+        return {
+            view_name: {
+                'requests': action['requests'],
+                'queries_avg': round(action['queries'] / action['requests'], 2),
+                'queries_max': action['queries_max'],
+                'time_avg': round(action['time'] / action['requests'] * 1000, 2),
+                'time_max': round(action['time_max'] * 1000, 2),
+                'over_budget': action['over_budget'],
+                'budget': settings.QUERY_BUDGETS.get(view_name),
+            }
+            for view_name, action in sorted(actions.items())
+        }
+
+
+action_query_stats = ActionQueryStats()
+
+
+class QueryStatsMiddleware(MiddlewareMixin):
+    """Количество запросов к БД, их общее время и самые медленные запросы для каждого запроса к серверу.
+
+    Статистика копится по действиям представлений (action_query_stats) и пишется в лог
+    (при превышении бюджета QUERY_BUDGETS - с уровнем WARNING), а при QUERY_STATS_HEADERS
+    еще и отдается в заголовках ответа (для отладки, не на проде)
+    """
+
+    def process_request(self, request):
+        # Соединения, открытые до подключения обработчика (например, в тестах), учитываются тоже
+        for connection in connections.all():
+            install_query_recorder(connection)
+        request.query_stats = QueryStats(slowest_size=settings.QUERY_STATS_SLOWEST)
+        _query_stats.set(request.query_stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view_name.set(get_view_name(request))
+
+    def process_response(self, request, response):
+        stats = getattr(request, 'query_stats', None)
+        if stats is None:
+            return response
+        _query_stats.set(None)
+        current_view_name.set(None)
+
+        view_name = get_view_name(request)
+        if view_name is None:
+            return response
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        is_over_budget = budget is not None and stats.count > budget
+        action_query_stats.record(view_name, stats, is_over_budget)
+
+        logger.log(logging.WARNING if is_over_budget else logging.INFO, json.dumps({
+            'view': view_name,
+            'status': response.status_code,
+            'queries': stats.count,
+            'budget': budget,
+            'db_time_ms': round(stats.duration * 1000, 2),
+            'slowest': [{'time_ms': round(duration * 1000, 2), 'sql': sql[:1000]} for duration, sql in stats.slowest],
+        }, ensure_ascii=False))
+
+        if settings.QUERY_STATS_HEADERS:
+            response['X-DB-Query-Count'] = stats.count
+            response['X-DB-Query-Time'] = f'{stats.duration * 1000:.2f}'
+            response['Server-Timing'] = f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+            for number, (duration, sql) in enumerate(stats.slowest, 1):
+                sql = ' '.join(sql.split())[:500].encode('ascii', 'backslashreplace').decode()
+                response[f'X-DB-Slowest-Query-{number}'] = f'{duration * 1000:.2f}ms {sql}'
+        return response
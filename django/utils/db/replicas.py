@@ -0,0 +1,107 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.deprecation import MiddlewareMixin
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Реплика, из которой читает текущий запрос (None - чтение из основной БД)
+_replica_alias: ContextVar[str | None] = ContextVar('replica_alias', default=None)
+
+
+def _get_pinned_key(user_id: int) -> str:
+    return f'db:pinned:{user_id}'
+
+
+def pin_to_primary(user_id: int) -> None:
+    """Читать данные пользователя из основной БД, пока реплики не догонят его изменения"""
+    cache.set(_get_pinned_key(user_id), True, timeout=settings.DATABASE_REPLICA_STICKINESS)
+
+
+def is_pinned_to_primary(user) -> bool:
+    return bool(user and user.is_authenticated and cache.get(_get_pinned_key(user.pk)))
+
+
+def _choose_replica() -> str | None:
+    return random.choice(settings.DATABASE_REPLICAS) if settings.DATABASE_REPLICAS else None  # noqa: S311
+
+
+@contextmanager
+def read_from_replica():
+    """Выполнять запросы на чтение внутри блока на случайной реплике (если реплики настроены)"""
+    token = _replica_alias.set(_choose_replica())
+    try:
+        yield
+    finally:
+        _replica_alias.reset(token)
+
+
+@contextmanager
+def read_from_primary():
+    """Выполнять запросы внутри блока в основной БД, даже если текущий запрос читает с реплики"""
+    token = _replica_alias.set(None)
+    try:
+        yield
+    finally:
+        _replica_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Роутер БД: чтение внутри read_from_replica идет на реплику, остальные запросы - в основную БД"""
+
+    def db_for_read(self, model, **hints):
+        return _replica_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Явно, иначе Django запишет объект, прочитанный с реплики, обратно в реплику
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Примесь к ViewSet: действия из replica_read_actions читают данные с реплики.
+
+    Пользователь, который недавно что-то изменил (см. ReplicaStickinessMiddleware), читает из основной БД,
+    чтобы видеть свои изменения
+    """
+    replica_read_actions: tuple[str, ...] = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (settings.DATABASE_REPLICAS and request.method in SAFE_METHODS
+                and self.action in self.replica_read_actions and not is_pinned_to_primary(request.user)):
+            self._replica_token = _replica_alias.set(_choose_replica())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica_token = getattr(self, '_replica_token', None)
+        if replica_token is not None:
+            self._replica_token = None
+            _replica_alias.reset(replica_token)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaStickinessMiddleware(MiddlewareMixin):
+    """Закрепляет пользователя за основной БД на DATABASE_REPLICA_STICKINESS секунд после успешного
+    изменяющего запроса (read-your-writes)
+    """
+
+    def process_response(self, request, response):
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS and response.status_code < 400:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+        return response
@@ -0,0 +1,77 @@
+import json
+import logging
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Запросы самого журнала не учитываются, чтобы запись медленного запроса не порождала новые
+_is_disabled: ContextVar[bool] = ContextVar('slow_queries_disabled', default=False)
+# Представление текущего запроса к серверу (задается в QueryStatsMiddleware)
+current_view_name: ContextVar[str | None] = ContextVar('current_view_name', default=None)
+
+
+@contextmanager
+def slow_queries_disabled():
+    """Не записывать медленные запросы внутри блока"""
+    token = _is_disabled.set(True)
+    try:
+        yield
+    finally:
+        _is_disabled.reset(token)
+
+
+def _get_function_name(frame) -> str:
+    """Имя функции с классом для методов (co_qualname есть только с Python 3.11)"""
+    name = frame.f_code.co_name
+    if 'self' in frame.f_locals:
+        return f'{type(frame.f_locals["self"]).__name__}.{name}'
+    if isinstance(frame.f_locals.get('cls'), type):
+        return f'{frame.f_locals["cls"].__name__}.{name}'
+    return name
+
+
+def get_caller() -> str:
+    """Ближайший к запросу вызов из кода приложений, например 'CardRequestService.create (apps/card/services.py:42)'"""
+    apps_dir = str(settings.BASE_DIR / 'apps')
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(apps_dir) and '/migrations/' not in filename:
+            path = filename[len(str(settings.BASE_DIR)) + 1:]
+            return f'{_get_function_name(frame)} ({path}:{frame.f_lineno})'
+        frame = frame.f_back
+    return ''
+
+
+def get_source() -> str:
+    """Представление или задача Celery, которые выполнили запрос"""
+    view_name = current_view_name.get()
+    if view_name:
+        return view_name
+    from celery import current_task
+    return current_task.name if current_task else ''
+
+
+def _to_json(params):
+    return json.loads(json.dumps(params, default=str))
+
+
+def log_slow_query(connection, sql: str, params, many: bool, duration: float) -> None:
+    """Отправить медленный запрос в журнал (apps.core.models.SlowQuery) через Celery.
+    Запись и EXPLAIN выполняются в задаче, чтобы не замедлять запрос еще больше
+    """
+    if _is_disabled.get():
+        return
+    from apps.core.tasks import record_slow_query
+
+    try:
+        record_slow_query.delay(
+            connection.alias, sql, None if many else _to_json(params), round(duration * 1000, 2), get_source(),
+            get_caller(),
+        )
+    except Exception:
+        logger.exception('Не удалось записать медленный запрос')
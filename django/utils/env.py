@@ -0,0 +1,10 @@
+def strtobool(value: str) -> bool:
+    """Преобразовать строку из переменной окружения в bool (y/yes/t/true/on/1 или n/no/f/false/off/0).
+    Замена distutils.util.strtobool: distutils устарел, а его импорт заметно замедляет запуск
+    """
+    value = value.lower()
+    if value in ('y', 'yes', 't', 'true', 'on', '1'):
+        return True
+    if value in ('n', 'no', 'f', 'false', 'off', '0'):
+        return False
+    raise ValueError(f'invalid truth value {value!r}')
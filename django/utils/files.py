@@ -0,0 +1,12 @@
+import hashlib
+
+from django.core.files import File
+
+
+def get_file_hash(file: File) -> str:
+    """Получить SHA-256 содержимого файла (файл читается частями)"""
+    file_hash = hashlib.sha256()
+    for chunk in file.chunks():
+        file_hash.update(chunk)
+    file.seek(0)
+    return file_hash.hexdigest()
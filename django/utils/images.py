@@ -1,42 +1,88 @@
+from functools import lru_cache
 from io import BytesIO
 
 import numpy as np
-from PIL import Image, ImageDraw
-import matplotlib.pyplot as plt
+from PIL import Image, ImageChops, ImageOps
 
+# Во сколько раз размер исходника должен превышать размер миниатюры, чтобы использовать
+# быстрое уменьшение (draft для JPEG и reducing_gap при ресайзе)
+REDUCING_GAP = 2.0
 
-def crop_to_circle(input_image):
-    # Создаем маску круга с размерами изображения
-    mask = Image.new('L', input_image.size, 0)
-    draw = ImageDraw.Draw(mask)
-    draw.ellipse((0, 0, input_image.width, input_image.height), fill=255)
 
-    # Обрезаем изображение по маске
-    result = Image.new('RGBA', input_image.size, 0)
-    result.paste(input_image, mask=mask)
+@lru_cache(maxsize=32)
+def get_circle_mask(size: int) -> Image.Image:
+    """Получить сглаженную маску круга размером size x size.
+    Маски кэшируются и не изменяются, поэтому их можно использовать из нескольких потоков
+    """
+    radius = size / 2
+    coords = np.arange(size, dtype=np.float32) + 0.5 - radius
+    distance = np.sqrt(coords[np.newaxis, :] ** 2 + coords[:, np.newaxis] ** 2)
+    # Пиксели на границе круга получают частичную прозрачность для сглаживания края
+    alpha = np.clip(radius - distance + 0.5, 0, 1) * 255
+    return Image.fromarray(alpha.astype(np.uint8), mode='L')
 
+
+def crop_to_circle(input_image: Image.Image) -> Image.Image:
+    """Обрезать квадратное изображение по кругу (остальное становится прозрачным)"""
+    result = input_image.convert('RGBA')
+    mask = get_circle_mask(result.width)
+    if result.height != result.width:
+        mask = mask.resize(result.size)
+    result.putalpha(ImageChops.multiply(result.getchannel('A'), mask))
     return result
 
 
-def create_round_thumbnail(input_image, size=70):
-    # Интегрируем обрезку в форму круга
-    avatar_circular = crop_to_circle(input_image)
+def create_round_thumbnails(input_image: Image.Image, sizes: list[int]) -> dict[int, BytesIO]:
+    """Создать круглые PNG-миниатюры нескольких размеров.
+    Изображение вписывается в квадрат size x size. Не загруженный JPEG декодируется сразу
+    в уменьшенном виде (Image.draft), поэтому input_image после вызова может стать меньше
+    """
+    max_size = max(sizes)
+    # Для JPEG позволяет декодировать сразу уменьшенное изображение
+    input_image.draft('RGB', (int(max_size * REDUCING_GAP), int(max_size * REDUCING_GAP)))
+    source = input_image.convert('RGBA')
+
+    thumbnails: dict[int, BytesIO] = {}
+    for size in sorted(set(sizes), reverse=True):
+        # Каждую следующую миниатюру получаем из предыдущей, она уже ближе по размеру
+        source = source.resize((size, size), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+        thumb_io = BytesIO()
+        crop_to_circle(source).save(thumb_io, format='PNG')
+        thumbnails[size] = thumb_io
+    return thumbnails
+
+
+def create_round_thumbnail(input_image: Image.Image, size: int = 70) -> BytesIO:
+    """Создать круглую PNG-миниатюру размером size x size"""
+    return create_round_thumbnails(input_image, [size])[size]
+
+
+def get_perceptual_hash(input_image: Image.Image) -> int:
+    """Получить перцептивный хеш изображения (dHash, 64 бита со знаком, чтобы поместиться в BigIntegerField).
+    Хеш не меняется при пересжатии и масштабировании, поэтому совпадает у почти одинаковых изображений
+    """
+    pixels = np.asarray(input_image.convert('L').resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), byteorder='big', signed=True)
 
-    # Создаем круглую миниатюру
-    fig, ax = plt.subplots(figsize=(size/100, size/100), dpi=100)
-    ax.set_xlim(0, 1)
-    ax.set_ylim(0, 1)
-    ax.add_patch(plt.Circle((0.5, 0.5), 0.5, color='none', edgecolor='none'))
 
-    # Рисуем обрезанное изображение в центре круга
-    ax.imshow(np.array(avatar_circular), extent=(0, 1, 0, 1), transform=ax.transAxes)
+def open_image(file) -> Image.Image:
+    """Открыть изображение и повернуть его согласно EXIF-ориентации"""
+    return ImageOps.exif_transpose(Image.open(file))
 
-    # Убираем оси
-    ax.axis('off')
 
-    # Сохраняем миниатюру в байтовый поток
-    thumb_io = BytesIO()
-    plt.savefig(thumb_io, format='png', bbox_inches='tight', pad_inches=0, transparent=True)
-    plt.close()
+def create_image_variant(input_image: Image.Image, max_size: int, image_format: str = 'WEBP',
+                         quality: int = 80) -> BytesIO:
+    """Создать уменьшенную копию изображения, вписанную в квадрат max_size x max_size.
+    Метаданные (EXIF, ICC и т.д.) в копию не переносятся
+    """
+    variant = input_image.copy()
+    variant.thumbnail((max_size, max_size), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+    if image_format == 'JPEG' and variant.mode != 'RGB':
+        variant = variant.convert('RGB')
+    elif variant.mode not in ('RGB', 'RGBA'):
+        variant = variant.convert('RGBA')
 
-    return thumb_io
+    variant_io = BytesIO()
+    variant.save(variant_io, format=image_format, quality=quality)
+    return variant_io
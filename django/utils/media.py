@@ -0,0 +1,89 @@
+import mimetypes
+import posixpath
+from collections.abc import Callable
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db.models import Model, Q, QuerySet
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.utils._os import safe_join
+from django.views.static import serve
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+
+from .storages import check_media_signature, generate_presigned_url, is_s3_storage
+
+# Модели, файлы которых отдает ProtectedMediaView: модель, ее файловые поля и объекты, файлы которых доступны
+media_owners: list[tuple[type[Model], tuple[str, ...], Callable[[QuerySet], QuerySet]]] = []
+
+
+def register_media_owner(model: type[Model], fields: tuple[str, ...],
+                         get_queryset: Callable[[QuerySet], QuerySet] = lambda queryset: queryset) -> None:
+    """Разрешить отдачу файлов из полей fields модели, пока на файл ссылается объект из get_queryset"""
+    media_owners.append((model, fields, get_queryset))
+
+
+def has_media_owner(path: str) -> bool:
+    """Ссылается ли на файл хотя бы один доступный объект"""
+    for model, fields, get_queryset in media_owners:
+        references = Q()
+        for field in fields:
+            references |= Q(**{field: path})
+        if get_queryset(model.objects.all()).filter(references).exists():
+            return True
+    return False
+
+
+def get_media_cache_control(path: str) -> str:
+    """Заголовок Cache-Control для медиафайла.
+    Уменьшенные копии (variants) называются по хешу содержимого и не меняются, их можно кэшировать надолго
+    """
+    if '/variants/' in f'/{path}':
+        return f'private, max-age={settings.MEDIA_IMMUTABLE_CACHE_MAX_AGE}, immutable'
+    return f'private, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+class ProtectedMediaView(APIView):
+    """Отдача медиафайлов по подписанным ссылкам
+
+    Ссылки на файлы подписывает хранилище (utils.storages.SignedMediaUrlMixin), их получают только пользователи,
+    которым API отдал объект с файлом, и их можно использовать в <img src> без заголовка авторизации.
+    Файл отдается, пока на него ссылается доступный объект (register_media_owner): после удаления фото
+    или смены аватарки старые ссылки перестают работать сразу, а не после истечения.
+
+    Сам файл отдает nginx из internal location (X-Accel-Redirect), поэтому воркер не занят передачей файла.
+    Без nginx (MEDIA_ACCEL_REDIRECT=False) файл отдает Django, из S3-совместимого хранилища -
+    перенаправление на временную ссылку хранилища.
+    """
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    @extend_schema(exclude=True)
+    def get(self, request, path):
+        path = posixpath.normpath(path).lstrip('/')
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404
+        if not check_media_signature(path, request.GET.get('expires', ''), request.GET.get('signature', '')):
+            raise Http404
+        if not has_media_owner(path):
+            raise Http404
+
+        if is_s3_storage(default_storage):
+            return HttpResponseRedirect(generate_presigned_url(default_storage, path,
+                                                               expires_in=settings.MEDIA_REDIRECT_URL_EXPIRES))
+
+        if settings.MEDIA_ACCEL_REDIRECT:
+            content_type, encoding = mimetypes.guess_type(full_path)
+            response = HttpResponse(content_type=content_type or 'application/octet-stream')
+            if encoding:
+                response['Content-Encoding'] = encoding
+            response['X-Accel-Redirect'] = quote(f'{settings.MEDIA_ACCEL_REDIRECT_LOCATION}{path}')
+        else:
+            response = serve(request, path, document_root=settings.MEDIA_ROOT)
+        response['Cache-Control'] = get_media_cache_control(path)
+        return response
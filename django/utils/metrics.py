@@ -0,0 +1,77 @@
+import os
+import time
+
+from django.utils.deprecation import MiddlewareMixin
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+from .views import get_view_name
+
+# Метрики Prometheus. С переменной окружения PROMETHEUS_MULTIPROC_DIR (несколько воркеров gunicorn)
+# каждый процесс пишет значения в свои файлы в этом каталоге, а /metrics собирает их со всех процессов.
+# Каталог очищается при запуске (entrypoint.sh), файлы завершившихся воркеров - в gunicorn.conf.py
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Время обработки запроса', ('view', 'status'),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Размер тела ответа', ('view',),
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Количество запросов к БД при обработке запроса', ('view',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_DURATION = Histogram(
+    'http_request_db_duration_seconds', 'Время запросов к БД при обработке запроса', ('view',),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'Запросы, которые обрабатываются сейчас', multiprocess_mode='livesum',
+)
+MODEL_CACHE_REQUESTS = Counter(
+    'model_cache_requests_total', 'Обращения к кэшу моделей (utils.cache.ModelCache) по результату',
+    ('cache', 'result'),
+)
+CACHE_TIER_REQUESTS = Counter(
+    'cache_tier_requests_total', 'Обращения к уровням двухуровневого кэша (utils.cache_backends.TwoTierCache)',
+    ('alias', 'tier', 'result'),
+)
+
+
+def get_metrics() -> bytes:
+    """Метрики в текстовом формате Prometheus (в multiprocess-режиме - всех процессов) и длина очередей Celery"""
+    from .celery_metrics import queue_registry
+
+    registry = REGISTRY
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry) + generate_latest(queue_registry)
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """Время обработки, размер ответа и запросы к БД (из QueryStatsMiddleware) по действиям представлений.
+
+    Подключается первой, чтобы учитывать время остальных промежуточных слоев
+    """
+
+    def process_request(self, request):
+        request._metrics_started_at = time.perf_counter()
+        REQUESTS_IN_PROGRESS.inc()
+
+    def process_response(self, request, response):
+        started_at = getattr(request, '_metrics_started_at', None)
+        if started_at is None:
+            return response
+        REQUESTS_IN_PROGRESS.dec()
+
+        view_name = get_view_name(request) or 'unresolved'
+        REQUEST_DURATION.labels(view_name, response.status_code).observe(time.perf_counter() - started_at)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(view_name).observe(len(response.content))
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            REQUEST_DB_QUERIES.labels(view_name).observe(stats.count)
+            REQUEST_DB_DURATION.labels(view_name).observe(stats.duration)
+        return response
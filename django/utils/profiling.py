@@ -0,0 +1,95 @@
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import time
+from asyncio import iscoroutinefunction
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .views import get_view_name
+
+logger = logging.getLogger(__name__)
+
+
+def _get_staff_user(request):
+    """Сотрудник, отправивший запрос (по сессии админки или токену API), или None"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user if user.is_staff else None
+    drf_request = Request(request)
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication_class().authenticate(drf_request)
+        except APIException:
+            return None
+        if result is not None:
+            return result[0] if result[0].is_staff else None
+    return None
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """Профилирование одного запроса сотрудника через cProfile.
+
+    Включается заголовком PROFILING_HEADER или параметром PROFILING_QUERY_PARAM. Профиль (дамп pstats
+    и самые затратные функции) сохраняется в RequestProfile и доступен в админке, ссылка - в заголовке
+    X-Profile-Url ответа. Без флага запрос выполняется как обычно
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not (request.headers.get(settings.PROFILING_HEADER) or settings.PROFILING_QUERY_PARAM in request.GET):
+            return None
+        user = _get_staff_user(request)
+        if user is None:
+            return None
+
+        # Асинхронная обертка (utils.async_views) выполняет представление в другом потоке, который cProfile
+        # не видит, поэтому профилируется исходное синхронное представление
+        if iscoroutinefunction(view_func):
+            view_func = view_func.__wrapped__
+
+        def render_view():
+            response = view_func(request, *view_args, **view_kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+
+        profiler = cProfile.Profile()
+        started_at = time.perf_counter()
+        response = profiler.runcall(render_view)
+        duration = time.perf_counter() - started_at
+        try:
+            profile = self._save_profile(request, response, profiler, user, duration)
+        except Exception:
+            logger.exception('Не удалось сохранить профиль запроса')
+            return response
+        response['X-Profile-Id'] = profile.id
+        response['X-Profile-Url'] = request.build_absolute_uri(
+            reverse('admin:core_requestprofile_change', args=(profile.id,)))
+        return response
+
+    @staticmethod
+    def _save_profile(request, response, profiler: cProfile.Profile, user, duration: float):
+        from apps.core.models import RequestProfile
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(settings.PROFILING_SUMMARY_SIZE)
+        query_stats = getattr(request, 'query_stats', None)
+        return RequestProfile.objects.create(
+            user=user,
+            method=request.method,
+            path=request.get_full_path(),
+            view=get_view_name(request) or '',
+            status_code=response.status_code,
+            duration=duration * 1000,
+            queries=query_stats.count if query_stats is not None else None,
+            summary=summary.getvalue(),
+            stats=marshal.dumps(stats.stats),
+        )
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.urls import URLPattern
+from rest_framework.routers import DefaultRouter
+
+from .async_views import async_read_view
+
+
+class AsyncReadRouter(DefaultRouter):
+    """Роутер, который при ASYNC_READ_VIEWS отдает действия из async_read_actions ViewSet
+    через асинхронное представление (utils.async_views.async_read_view)
+    """
+
+    def get_urls(self):
+        urls = super().get_urls()
+        if not settings.ASYNC_READ_VIEWS:
+            return urls
+
+        async_urls = []
+        for url in urls:
+            view = url.callback
+            async_read_actions = getattr(getattr(view, 'cls', None), 'async_read_actions', ())
+            if getattr(view, 'actions', {}).get('get') in async_read_actions:
+                url = URLPattern(url.pattern, async_read_view(view), url.default_args, url.name)
+            async_urls.append(url)
+        return async_urls
@@ -0,0 +1,9 @@
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from .storages import SignedMediaUrlMixin
+
+
+class S3MediaStorage(SignedMediaUrlMixin, S3Boto3Storage):
+    """S3-совместимое хранилище медиафайлов: бакет закрыт, ссылки ведут на utils.media.ProtectedMediaView,
+    которое после проверки перенаправляет на временную ссылку хранилища
+    """
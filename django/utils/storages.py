@@ -0,0 +1,102 @@
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from urllib.parse import urlencode, urljoin
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.encoding import filepath_to_uri
+
+
+def is_s3_storage(storage: Storage) -> bool:
+    """Является ли хранилище S3-совместимым"""
+    from storages.backends.s3boto3 import S3Boto3Storage
+    return isinstance(storage, S3Boto3Storage)
+
+
+def get_media_url_expires() -> int:
+    """Время истечения подписанных ссылок на медиафайлы (unix timestamp).
+    Ссылки меняются раз в MEDIA_URL_EXPIRES секунд и действуют после этого еще столько же,
+    поэтому закэшированные представления с ними не устаревают раньше ссылок
+    """
+    return (int(time.time()) // settings.MEDIA_URL_EXPIRES + 2) * settings.MEDIA_URL_EXPIRES
+
+
+def get_media_urls_changed_at() -> datetime:
+    """Время последней смены подписанных ссылок на медиафайлы"""
+    return datetime.fromtimestamp(get_media_url_expires() - 2 * settings.MEDIA_URL_EXPIRES, tz=timezone.utc)
+
+
+def get_media_signature(name: str, expires: int) -> str:
+    return salted_hmac('utils.storages.media', f'{name}:{expires}', algorithm='sha256').hexdigest()
+
+
+def check_media_signature(name: str, expires: str, signature: str) -> bool:
+    """Подписана ли ссылка на файл и не истекла ли она"""
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return constant_time_compare(get_media_signature(name, int(expires)), signature)
+
+
+class SignedMediaUrlMixin:
+    """Ссылки на файлы ведут на utils.media.ProtectedMediaView и подписаны на время (get_media_url_expires).
+    Ссылки абсолютные (от MEDIA_BASE_URL) и не зависят от адреса запроса, поэтому представления с ними кэшируются
+    """
+
+    def url(self, name):
+        expires = get_media_url_expires()
+        query = urlencode({'expires': expires, 'signature': get_media_signature(name, expires)})
+        return f'{settings.MEDIA_BASE_URL}{urljoin(settings.MEDIA_URL, filepath_to_uri(name))}?{query}'
+
+
+class MediaStorage(SignedMediaUrlMixin, FileSystemStorage):
+    """Локальное хранилище медиафайлов с подписанными ссылками"""
+
+
+@lru_cache(maxsize=1)
+def _get_public_client(endpoint_url: str | None, access_key: str | None, secret_key: str | None,
+                       region_name: str | None):
+    """Клиент S3 для подписи ссылок, которые открывает клиент (адрес хранилища может отличаться от внутреннего)"""
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client('s3', endpoint_url=endpoint_url, aws_access_key_id=access_key,
+                        aws_secret_access_key=secret_key, region_name=region_name,
+                        config=Config(signature_version='s3v4',
+                                      s3={'addressing_style': settings.AWS_S3_ADDRESSING_STYLE}))
+
+
+def generate_presigned_post(storage: Storage, name: str, content_type: str, max_size: int,
+                            expires_in: int) -> dict | None:
+    """Получить адрес и поля формы для загрузки файла напрямую в хранилище (POST multipart/form-data).
+    Хранилище само проверяет размер и тип файла. Возвращает None, если хранилище не S3-совместимое
+    """
+    if not is_s3_storage(storage):
+        return None
+
+    return _get_client_for(storage).generate_presigned_post(
+        Bucket=storage.bucket_name,
+        Key=_get_key(storage, name),
+        Fields={'Content-Type': content_type},
+        Conditions=[
+            {'Content-Type': content_type},
+            ['content-length-range', 1, max_size],
+        ],
+        ExpiresIn=expires_in,
+    )
+
+
+def generate_presigned_url(storage: Storage, name: str, expires_in: int) -> str:
+    """Получить ссылку на скачивание файла напрямую из S3-совместимого хранилища"""
+    return _get_client_for(storage).generate_presigned_url(
+        'get_object', Params={'Bucket': storage.bucket_name, 'Key': _get_key(storage, name)}, ExpiresIn=expires_in)
+
+
+def _get_key(storage: Storage, name: str) -> str:
+    return f'{storage.location.rstrip("/")}/{name}' if storage.location else name
+
+
+def _get_client_for(storage: Storage):
+    return _get_public_client(getattr(settings, 'AWS_S3_PUBLIC_ENDPOINT_URL', None) or storage.endpoint_url,
+                              storage.access_key, storage.secret_key, storage.region_name)
@@ -0,0 +1,23 @@
+from django.conf import settings
+
+from .views import get_view_name
+
+
+def assert_query_budget(response, budget: int | None = None) -> None:
+    """Проверить, что запрос к серверу уложился в бюджет запросов к БД (по умолчанию - из QUERY_BUDGETS).
+
+    Ответ должен быть получен тестовым клиентом Django с QueryStatsMiddleware, например:
+
+        response = client.get('/api/cards/')
+        assert_query_budget(response)
+    """
+    request = response.wsgi_request
+    stats = getattr(request, 'query_stats', None)
+    assert stats is not None, 'QueryStatsMiddleware не подключена'
+    view_name = get_view_name(request)
+    if budget is None:
+        assert view_name in settings.QUERY_BUDGETS, f'Нет бюджета запросов для {view_name} в QUERY_BUDGETS'
+        budget = settings.QUERY_BUDGETS[view_name]
+    slowest = '\n'.join(f'{duration * 1000:.2f} ms: {sql}' for duration, sql in stats.slowest)
+    assert stats.count <= budget, (f'{view_name}: {stats.count} запросов к БД при бюджете {budget}. '
+                                   f'Самые медленные:\n{slowest}')
@@ -0,0 +1,68 @@
+import re
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+
+# Сигнатуры в начале файла для допустимых форматов изображений
+IMAGE_SIGNATURES = (
+    (0, b'\xff\xd8\xff'),               # JPEG
+    (0, b'\x89PNG\r\n\x1a\n'),          # PNG
+    (4, b'ftypheic'),                   # HEIC
+    (4, b'ftypheix'),
+    (4, b'ftypmif1'),
+    (4, b'ftypmsf1'),
+)
+
+
+def get_upload_field_name(field_name: str) -> str:
+    """Получить имя поля без префикса вложенного сериализатора ('photos[0]photo' -> 'photo')"""
+    return re.split(r'[\].]', field_name)[-1]
+
+
+def is_image_header(data: bytes) -> bool:
+    """Начинаются ли данные с сигнатуры допустимого формата изображения"""
+    return any(data[offset:offset + len(signature)] == signature for offset, signature in IMAGE_SIGNATURES)
+
+
+class LimitedImageUploadHandler(FileUploadHandler):
+    """Обработчик загрузки, прерывающий ее сразу при превышении допустимого размера
+
+    Стоит перед обработчиками из FILE_UPLOAD_HANDLERS: проверяет каждую часть файла и передает ее дальше.
+    Для полей из IMAGE_UPLOAD_MAX_SIZES ограничивает размер и по первой части проверяет, что это изображение.
+    Ошибки - ValidationError DRF, поэтому обработчик подключается только к запросам DRF (LimitedMultiPartParser)
+    """
+
+    def handle_raw_input(self, input_data, meta, content_length, boundary, encoding=None):
+        if content_length and content_length > settings.UPLOAD_MAX_REQUEST_SIZE:
+            raise ValidationError(f'Размер запроса превышает максимальный '
+                                  f'({settings.UPLOAD_MAX_REQUEST_SIZE // (1024 * 1024)} МБ).')
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.max_size = settings.IMAGE_UPLOAD_MAX_SIZES.get(get_upload_field_name(self.field_name))
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.max_size is None:
+            return raw_data
+        if start == 0 and not is_image_header(raw_data):
+            raise ValidationError({self.field_name: ['Файл не является изображением (jpg, jpeg, png, heic).']})
+        if start + len(raw_data) > self.max_size:
+            raise ValidationError({self.field_name: [f'Размер файла превышает максимальный размер '
+                                                     f'({self.max_size // (1024 * 1024)} МБ).']})
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class LimitedMultiPartParser(MultiPartParser):
+    """Парсер multipart/form-data для API с проверкой загрузок через LimitedImageUploadHandler.
+    Остальные представления (админка) загружают файлы обработчиками из FILE_UPLOAD_HANDLERS
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']._request
+        request.upload_handlers = [LimitedImageUploadHandler(request), *request.upload_handlers]
+        return super().parse(stream, media_type, parser_context)
@@ -0,0 +1,11 @@
+def get_view_name(request) -> str | None:
+    """Имя представления для метрик: 'CardViewSet.list' для ViewSet, 'DatabasePoolStatsView.get' для APIView"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = match.func
+    view_class = getattr(view, 'cls', None) or getattr(view, 'view_class', None)
+    if view_class is None:
+        return f'{view.__module__}.{view.__name__}'
+    method = request.method.lower()
+    return f'{view_class.__name__}.{getattr(view, "actions", {}).get(method, method)}'